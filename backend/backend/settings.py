@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,9 +43,11 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'billing',
+    'store',
 ]
 
 MIDDLEWARE = [
+    'billing.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -84,9 +89,101 @@ DATABASES = {
         'PASSWORD': 'mynewpass',
         'HOST': 'db',
         'PORT': '5432',
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Reports, exports and lag-tolerant list endpoints read from a streaming
+# standby of 'default' when BILLING_REPLICA_HOST names one
+# (billing.routers.ReplicaRouter). Without it there is no 'replica' alias
+# and those reads stay on the primary. Under `manage.py test` there is always
+# one, mirroring 'default', so the routing can be tested with two aliases.
+if os.environ.get('BILLING_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['BILLING_REPLICA_HOST'],
+        'TEST': {'MIRROR': 'default'},
+    }
+elif sys.argv[1:2] == ['test']:
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['billing.routers.ReplicaRouter']
+
+# Each worker process keeps a pool of open connections (psycopg 3) instead of
+# connecting per request. CONN_HEALTH_CHECKS checks a connection before it is
+# handed out, so one dropped by a database restart is replaced instead of
+# failing the request. Keep workers x max_size below max_connections.
+for database in DATABASES.values():
+    if find_spec('psycopg_pool'):
+        database['OPTIONS'] = {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 10}}
+    else:
+        # psycopg2 has no pool: keep per-thread connections open instead.
+        database['CONN_MAX_AGE'] = 60
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'billing.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'billing.pagination.BillingCursorPagination',
+    'PAGE_SIZE': 50,
+    'DEFAULT_FILTER_BACKENDS': [
+        'billing.filters.FieldFilterBackend',
+        'rest_framework.filters.OrderingFilter',
+    ],
+}
+
+# Local memory is per process; point this at a shared backend (Redis,
+# Memcached) when running several workers so invalidations reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+BILLING_CATALOGUE_CACHE_TIMEOUT = 300
+
+# Server-side bill numbers, e.g. INV/2026-27/000123. 'gapless' numbers bills
+# strictly in commit order; 'block' lets each worker prefetch a block of
+# numbers for higher checkout throughput at the cost of gaps.
+BILLING_BILL_SERIES = 'INV'
+BILLING_BILL_NUMBER_MODE = 'gapless'
+BILLING_BILL_NUMBER_BLOCK_SIZE = 50
+BILLING_FINANCIAL_YEAR_START_MONTH = 4
+
+# manage.py archive_bills keeps this many financial years (counting the
+# current one) in billing_history and bill_items and moves older bills to
+# the archive tables. Lookups by id or bill_no still find archived bills.
+BILLING_HOT_FINANCIAL_YEARS = 2
+
+# Stored Idempotency-Key responses are purged after this many hours
+# (manage.py purge_idempotency_keys).
+BILLING_IDEMPOTENCY_TTL_HOURS = 24
+
+# Products expiring within this many days get a stock alert
+# (manage.py refresh_stock_alerts, run daily).
+BILLING_EXPIRY_ALERT_DAYS = 30
+
+# Customer phone lookups use a sorted in-memory index per worker (a few MB
+# per 100k customers). Set to False to query the database index instead.
+BILLING_CUSTOMER_PHONE_INDEX = True
+
+# Server-side invoices. Point BILLING_INVOICE_FONT at a TTF (e.g. Noto Sans)
+# to print the rupee sign and Tamil text; the default Helvetica cannot.
+BILLING_INVOICE_COMPANY = {'name': 'RP SMART ENERGY', 'lines': []}
+# A batch invoice job still running this long is taken to have lost its
+# worker and is handed to the next one. Keep it above the slowest render.
+BILLING_INVOICE_JOB_LEASE_SECONDS = 1800
+
+# SQL slower than this is logged to 'billing.slow_queries' with the view that
+# ran it; per-view timings are served at /api/_metrics for Prometheus.
+BILLING_SLOW_QUERY_MS = 200
+
+# Replica reads go back to the primary while the replica is more than this
+# many seconds behind (None: never check). Lag is re-read every
+# BILLING_REPLICA_LAG_CHECK_SECONDS per worker.
+BILLING_REPLICA_DATABASE = 'replica'
+BILLING_REPLICA_MAX_LAG = 10
+BILLING_REPLICA_LAG_CHECK_SECONDS = 5
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
     "https://app.rpsoftwares.com",
@@ -129,6 +226,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Rendered batch invoices (billing.InvoiceJob files) are written here.
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
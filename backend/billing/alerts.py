@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Product, StockAlert
+
+BATCH_SIZE = 1000
+ALL_KINDS = (StockAlert.LOW_STOCK, StockAlert.EXPIRING)
+ALERT_FIELDS = ['id', 'stock_qty', 'low_stock_alert', 'expire_date', 'batch_no', 'active_product']
+
+
+def expiry_horizon():
+    return timezone.localdate() + timedelta(days=getattr(settings, 'BILLING_EXPIRY_ALERT_DAYS', 30))
+
+
+def _matches(product, kind, horizon):
+    if not product.active_product:
+        return False
+    if kind == StockAlert.LOW_STOCK:
+        return product.low_stock_alert is not None and product.stock_qty <= product.low_stock_alert
+    return product.expire_date is not None and product.expire_date <= horizon
+
+
+def _alert(product, kind, now):
+    return StockAlert(
+        product_id=product.pk,
+        kind=kind,
+        stock_qty=product.stock_qty,
+        threshold=product.low_stock_alert,
+        expire_date=product.expire_date,
+        batch_no=product.batch_no,
+        updated_at=now,
+    )
+
+
+def _save(alerts):
+    StockAlert.objects.bulk_create(
+        alerts,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['product', 'kind'],
+        update_fields=['stock_qty', 'threshold', 'expire_date', 'batch_no', 'updated_at'],
+    )
+
+
+def update_alerts(products, kinds=ALL_KINDS):
+    """Re-evaluate the alerts of products already in memory with their new
+    values; at most one upsert and one delete. Call inside the transaction
+    that changed them."""
+    now = timezone.now()
+    horizon = expiry_horizon()
+    raised = []
+    cleared = Q()
+    for kind in kinds:
+        cleared_ids = []
+        for product in products:
+            if _matches(product, kind, horizon):
+                raised.append(_alert(product, kind, now))
+            else:
+                cleared_ids.append(product.pk)
+        if cleared_ids:
+            cleared |= Q(kind=kind, product_id__in=cleared_ids)
+    if raised:
+        _save(raised)
+    if cleared:
+        StockAlert.objects.filter(cleared).delete()
+
+
+def refresh_alerts():
+    """Rebuild the whole alert list. Both queries are served by the partial
+    indexes on products, so the cost follows the number of alerts rather
+    than the catalogue size. Returns {kind: count}."""
+    now = timezone.now()
+    sources = {
+        StockAlert.LOW_STOCK: Product.objects.filter(active_product=True, stock_qty__lte=F('low_stock_alert')),
+        StockAlert.EXPIRING: Product.objects.filter(
+            active_product=True, expire_date__isnull=False, expire_date__lte=expiry_horizon(),
+        ),
+    }
+    counts = {}
+    with transaction.atomic():
+        for kind, products in sources.items():
+            alerts = [_alert(p, kind, now) for p in products.only(*ALERT_FIELDS).iterator(chunk_size=BATCH_SIZE)]
+            _save(alerts)
+            counts[kind] = len(alerts)
+        # Every alert still valid was just stamped with ``now``.
+        StockAlert.objects.filter(updated_at__lt=now).delete()
+    return counts
@@ -0,0 +1,121 @@
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Prefetch
+from django.utils import timezone
+
+from .models import ArchivedBill, ArchivedBillItem, Bill, BillItem
+from .numbering import financial_year
+from .serializers import ArchivedBillSerializer
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def year_start(label):
+    """First day of a '2024-25' style financial year."""
+    return date(int(label[:4]), getattr(settings, 'BILLING_FINANCIAL_YEAR_START_MONTH', 4), 1)
+
+
+def archive_cutoff(keep=None, today=None):
+    """Start of the oldest financial year kept in billing_history; ``keep``
+    counts the current year. Bills created before it can be archived."""
+    keep = getattr(settings, 'BILLING_HOT_FINANCIAL_YEARS', 2) if keep is None else keep
+    start = year_start(financial_year(today or timezone.localdate()))
+    return start.replace(year=start.year - keep + 1)
+
+
+def archived_until(using=None):
+    """The first day after the last archived financial year, or None when
+    nothing is archived. billing_history only holds bills from then on."""
+    last = ArchivedBill.objects.using(using).aggregate(last=Max('created_at'))['last']
+    if last is None:
+        return None
+    start = year_start(financial_year(timezone.localdate(last)))
+    return start.replace(year=start.year + 1)
+
+
+def ensure_partitions(years):
+    """Create the archive partitions for these financial years (PostgreSQL only)."""
+    if connection.vendor != 'postgresql':
+        return
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for model in (ArchivedBill, ArchivedBillItem):
+            table = model._meta.db_table
+            for year in sorted(years):
+                partition = f"{table}_{year.replace('-', '_')}"
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {qn(partition)} PARTITION OF {qn(table)} FOR VALUES IN (%s)",
+                    [year],
+                )
+
+
+def _archived(bill, year):
+    customer = bill.customer
+    return ArchivedBill(
+        id=bill.pk,
+        financial_year=year,
+        bill_no=bill.bill_no,
+        customer_id=bill.customer_id,
+        customer_name=customer.name if customer else None,
+        address=customer.address if customer else None,
+        phone=customer.phone if customer else None,
+        total_amount=bill.total_amount,
+        payment_mode=bill.payment_mode,
+        created_at=bill.created_at,
+        quotation_id=bill.quotation_id,
+    )
+
+
+def archive_bills(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move bills created before the ``before`` date, with their items, into
+    the archive tables, one transaction per batch. Returns the number moved.
+
+    The sales rollups are left as they are: they already count these bills.
+    """
+    until = timezone.make_aware(datetime.combine(before, time.min))
+    moved = 0
+    while True:
+        with transaction.atomic():
+            bills = list(
+                Bill.objects.select_related('customer').select_for_update(of=('self',))
+                .filter(created_at__lt=until).order_by('id')[:batch_size]
+            )
+            if not bills:
+                return moved
+            years = {bill.pk: financial_year(timezone.localdate(bill.created_at)) for bill in bills}
+            ensure_partitions(set(years.values()))
+            ArchivedBill.objects.bulk_create([_archived(bill, years[bill.pk]) for bill in bills])
+            items = BillItem.objects.select_related('product').filter(bill_id__in=years).order_by('id')
+            ArchivedBillItem.objects.bulk_create([
+                ArchivedBillItem(
+                    id=item.pk,
+                    financial_year=years[item.bill_id],
+                    bill_id=item.bill_id,
+                    product_id=item.product_id,
+                    product_name=item.product.product_name,
+                    hsn_code=item.product.product_id,
+                    qty=item.qty,
+                    price=item.price,
+                    gst_percent=item.gst_percent,
+                )
+                for item in items
+            ], batch_size=batch_size)
+            BillItem.objects.filter(bill_id__in=years).delete()
+            Bill.objects.filter(pk__in=years).delete()
+        moved += len(bills)
+
+
+def archived_bills():
+    """Archived bills with their items, as ArchivedBillSerializer reads them."""
+    return ArchivedBill.objects.prefetch_related(
+        Prefetch('items', queryset=ArchivedBillItem.objects.order_by('id'))
+    )
+
+
+def find_archived_bill(pk=None, bill_no=None):
+    """An archived bill by id or bill_no, serialized like BillSerializer, or None."""
+    bills = archived_bills()
+    bill = bills.filter(pk=pk).first() if pk is not None else bills.filter(bill_no=bill_no).first()
+    return None if bill is None else ArchivedBillSerializer(bill).data
@@ -0,0 +1,76 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from .archive import find_archived_bill
+from .customer_lookup import LOOKUP_DEFAULT_LIMIT, LOOKUP_MAX_LIMIT, lookup_customers
+from .renderers import FastJSONRenderer
+from .search import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, search_products
+from .serializers import BillSerializer, CustomerSerializer, ProductSerializer
+from .views import BillViewSet
+
+# The hottest read endpoints as async views. Under ASGI they stay on the event
+# loop and only hop to a thread for the ORM work, so one worker can hold many
+# in-flight lookups while each waits on its pooled connection. They answer the
+# same URLs with the same JSON as the viewset routes they shadow.
+
+_renderer = FastJSONRenderer()
+
+bill_detail_view = BillViewSet.as_view({'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'})
+
+
+def _json(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type='application/json')
+
+
+def _limit(request, default, maximum):
+    return max(min(int(request.GET.get('limit', default)), maximum), 1)
+
+
+def _search(query, include_inactive, limit):
+    return ProductSerializer(search_products(query, include_inactive=include_inactive, limit=limit), many=True).data
+
+
+def _lookup(query, limit):
+    return CustomerSerializer(lookup_customers(query, limit=limit), many=True).data
+
+
+def _bill(pk):
+    bill = BillViewSet.queryset.filter(pk=pk).first()
+    return find_archived_bill(pk=pk) if bill is None else BillSerializer(bill).data
+
+
+async def product_search(request):
+    """Typeahead: ?q=<code or name>&limit=&include_inactive="""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return _json([])
+    try:
+        limit = _limit(request, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT)
+    except ValueError:
+        return _json({"error": "limit must be a number"}, status=400)
+    include_inactive = request.GET.get('include_inactive', '').lower() in ('1', 'true', 'yes')
+    return _json(await sync_to_async(_search)(query, include_inactive, limit))
+
+
+async def customer_lookup(request):
+    """Typeahead for the billing screen: ?q=<phone digits or name>&limit="""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return _json([])
+    try:
+        limit = _limit(request, LOOKUP_DEFAULT_LIMIT, LOOKUP_MAX_LIMIT)
+    except ValueError:
+        return _json({"error": "limit must be a number"}, status=400)
+    return _json(await sync_to_async(_lookup)(query, limit))
+
+
+@csrf_exempt
+async def bill_detail(request, pk):
+    """GET is served here; edits and deletes go to BillViewSet as before."""
+    if request.method not in ('GET', 'HEAD'):
+        return await sync_to_async(bill_detail_view)(request, pk=pk)
+    data = await sync_to_async(_bill)(pk)
+    if data is None:
+        return _json({"detail": "No Bill matches the given query."}, status=404)
+    return _json(data)
@@ -0,0 +1,214 @@
+import http.client
+import platform
+import random
+import re
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+import django
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cache import invalidate_products
+from .models import Bill, BillItem, Customer, Product, Quotation, ServiceEntry
+from .seed import BENCH_PREFIX, PRODUCT_PREFIX
+
+BULK_IMPORT_ROWS = 500
+OK_STATUSES = (200, 201, 202)
+_SERVER_TIMING = re.compile(r'db;desc="(\d+) queries";dur=([\d.]+)')
+
+
+class Scenario:
+    """One timed API call. ``request(i)`` returns the response of the i-th
+    iteration; ``before(i)``, if given, runs untimed ahead of it."""
+
+    def __init__(self, name, request, before=None):
+        self.name = name
+        self.request = request
+        self.before = before
+
+
+def scenarios(client, rng, product_ids, customer_ids):
+    def lines(count):
+        return rng.sample(product_ids, min(count, len(product_ids)))
+
+    def bill_create(i):
+        items = [{"product_id": pk, "qty": 1, "price": "10.00", "gst_percent": "18"} for pk in lines(3)]
+        return client.post("/api/bills/", {
+            "customer": rng.choice(customer_ids),
+            "total_amount": "30.00",
+            "payment_mode": "CASH",
+            "items": items,
+        }, format="json")
+
+    def bulk_import(i):
+        # Half updates of seeded products, half new rows.
+        rows = [
+            {"Product ID": f"{PRODUCT_PREFIX}{n:07d}" if n % 2 else f"{BENCH_PREFIX}{i}-{n}", "Product Name": f"Imported {n}", "Sell Price": "99"}
+            for n in range(BULK_IMPORT_ROWS)
+        ]
+        return client.post("/api/products/bulk_import/", rows, format="json")
+
+    def quotation_create(i):
+        return client.post("/api/quotations/", {
+            "customer": rng.choice(customer_ids),
+            "total_amount": "300.00",
+            "items": [{"product": pk, "quantity": 1} for pk in lines(3)],
+        }, format="json")
+
+    def place_order(i):
+        return client.post("/api/place-order/", {
+            "customer_name": "Bench",
+            "customer_phone": "9000000000",
+            "address": "Main Road",
+            "total_amount": "30.00",
+            "items": [{"id": pk, "name": f"Item {pk}", "qty": 1, "price": "10"} for pk in lines(3)],
+        }, format="json")
+
+    return [
+        Scenario('bill_create', bill_create),
+        Scenario('product_list', lambda i: client.get("/api/products/"), before=lambda i: invalidate_products()),
+        Scenario('product_list_cached', lambda i: client.get("/api/products/")),
+        Scenario('product_detail', lambda i: client.get(f"/api/products/{rng.choice(product_ids)}/")),
+        Scenario('bulk_import', bulk_import),
+        Scenario('quotation_create', quotation_create),
+        Scenario('place_order', place_order),
+    ]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(timings, queries, db_ms, errors):
+    summary = {'iterations': len(timings), 'errors': errors}
+    if timings:
+        summary.update(
+            mean_ms=round(statistics.fmean(timings), 3),
+            p50_ms=round(_percentile(timings, 50), 3),
+            p95_ms=round(_percentile(timings, 95), 3),
+            p99_ms=round(_percentile(timings, 99), 3),
+            min_ms=round(min(timings), 3),
+            max_ms=round(max(timings), 3),
+            per_second=round(1000 / statistics.fmean(timings), 1),
+        )
+    if queries:
+        summary.update(queries=round(statistics.fmean(queries), 1), db_ms=round(statistics.fmean(db_ms), 3))
+    return summary
+
+
+def environment():
+    return {
+        'started_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'rows': {
+            'products': Product.objects.count(),
+            'customers': Customer.objects.count(),
+            'bills': Bill.objects.count(),
+            'bill_items': BillItem.objects.count(),
+            'quotations': Quotation.objects.count(),
+            'services': ServiceEntry.objects.count(),
+        },
+    }
+
+
+def run(iterations=50, warmup=5, seed=42, only=None):
+    """Time each scenario through the full Django stack in-process (no HTTP
+    server). DB query counts come from the Server-Timing header when the
+    metrics middleware is installed. Writes happen for real, so point this at
+    a database seeded with ``manage.py seed_data``, not production."""
+    rng = random.Random(seed)
+    product_ids = list(
+        Product.objects.filter(product_id__startswith=PRODUCT_PREFIX).order_by('id').values_list('id', flat=True)
+    )
+    if not product_ids:
+        raise ValueError("No seeded products; run manage.py seed_data first")
+    customer_ids = list(Customer.objects.order_by('id').values_list('id', flat=True)[:10_000])
+    if not customer_ids:
+        raise ValueError("No customers; run manage.py seed_data first")
+    results = {'environment': environment(), 'iterations': iterations, 'seed': seed, 'scenarios': {}}
+    for scenario in scenarios(APIClient(), rng, product_ids, customer_ids):
+        if only and scenario.name not in only:
+            continue
+        timings, queries, db_ms, errors = [], [], [], 0
+        for i in range(warmup + iterations):
+            if scenario.before:
+                scenario.before(i)
+            started = time.perf_counter()
+            response = scenario.request(i)
+            elapsed = (time.perf_counter() - started) * 1000
+            if i < warmup:
+                continue
+            if response.status_code not in OK_STATUSES:
+                errors += 1
+                continue
+            timings.append(elapsed)
+            match = _SERVER_TIMING.search(response.get('Server-Timing', ''))
+            if match:
+                queries.append(int(match.group(1)))
+                db_ms.append(float(match.group(2)))
+        results['scenarios'][scenario.name] = _summary(timings, queries, db_ms, errors)
+    return results
+
+
+def compare(baseline, current):
+    """Rows of (scenario, baseline p50, current p50, change %) for scenarios in both runs."""
+    rows = []
+    for name, stats in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name, {})
+        if 'p50_ms' in before and 'p50_ms' in stats:
+            change = (stats['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            rows.append((name, before['p50_ms'], stats['p50_ms'], round(change, 1)))
+    return rows
+
+
+def load(base_url, paths, concurrency=32, duration=10.0):
+    """Drive a running server over HTTP: ``concurrency`` keep-alive clients
+    request ``paths`` round-robin for ``duration`` seconds. Returns requests
+    per second and latency percentiles, for comparing serving setups."""
+    url = urlsplit(base_url)
+    timings, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        mine, failed, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', url.path.rstrip('/') + path)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+                ok = False
+            if ok:
+                mine.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        conn.close()
+        with lock:
+            timings.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    summary = _summary(timings, [], [], sum(errors))
+    summary.update(concurrency=concurrency, seconds=round(elapsed, 2), requests_per_second=round(len(timings) / elapsed, 1))
+    return {'url': base_url, 'paths': paths, 'started_at': timezone.now().isoformat(), 'load': summary}
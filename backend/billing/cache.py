@@ -0,0 +1,94 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .renderers import FastJSONRenderer
+
+# Bumped by bulk imports: invalidates every cached list and detail response.
+GENERATION_KEY = 'billing:products:generation'
+# Bumped by any product change: invalidates cached list pages only.
+LIST_VERSION_KEY = 'billing:products:list_version'
+
+
+def _timeout():
+    return getattr(settings, 'BILLING_CATALOGUE_CACHE_TIMEOUT', 300)
+
+
+def _product_version_key(pk):
+    return f'billing:products:version:{pk}'
+
+
+def _tokens(*keys):
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            # Random tokens rather than counters, so an evicted version can
+            # never come back and resurrect entries cached under it.
+            cache.add(key, uuid.uuid4().hex, None)
+            tokens[key] = cache.get(key)
+    return ':'.join(tokens[key] for key in keys)
+
+
+# Cache keys embed the current version tokens, so an invalidation that lands
+# while a response is being rendered leaves the stale copy under a key that
+# is never read again.
+def product_list_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'billing:products:list:{_tokens(GENERATION_KEY, LIST_VERSION_KEY)}:{path}'
+
+
+def product_detail_key(pk):
+    return f'billing:products:detail:{pk}:{_tokens(GENERATION_KEY, _product_version_key(pk))}'
+
+
+def _invalidate(product_ids):
+    if product_ids is None:
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+        return
+    tokens = {_product_version_key(pk): uuid.uuid4().hex for pk in product_ids}
+    tokens[LIST_VERSION_KEY] = uuid.uuid4().hex
+    cache.set_many(tokens, None)
+
+
+def invalidate_products(product_ids=None):
+    """Drop cached catalogue responses for the given product pks, or for the
+    whole catalogue when no pks are given.
+
+    Runs after the surrounding transaction commits so a concurrent reader
+    cannot re-cache the old rows in between.
+    """
+    ids = list(product_ids) if product_ids is not None else None
+    transaction.on_commit(lambda: _invalidate(ids))
+
+
+def _etag(data):
+    return '"%s"' % hashlib.md5(FastJSONRenderer().render(data)).hexdigest()
+
+
+def _not_modified(request, etag):
+    header = request.headers.get('If-None-Match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+def cached_response(request, key, render):
+    """Serve a GET from the cache, honouring If-None-Match with a 304.
+
+    ``render`` builds the uncached Response; only 200s are stored.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        response = render()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry = (_etag(response.data), response.data)
+        cache.set(key, entry, _timeout())
+    etag, data = entry
+    if _not_modified(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return Response(data, headers={'ETag': etag})
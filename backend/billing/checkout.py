@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+
+from .alerts import update_alerts
+from .cache import invalidate_products
+from .models import ArchivedBill, Bill, BillItem, Product, Quotation, StockAlert, StockMovement, SyncClock
+from .numbering import next_bill_no
+from .rollup import record_bill
+from .stock import record_movements
+
+
+class CheckoutError(Exception):
+    pass
+
+
+def to_decimal(value):
+    return Decimal(str(value or 0))
+
+
+def lock_products(product_ids):
+    """Lock the given products with one SELECT ... FOR UPDATE, in id order so
+    concurrent checkouts always acquire row locks in the same sequence."""
+    products = {
+        p.id: p
+        for p in Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+    }
+    missing = set(product_ids) - set(products)
+    if missing:
+        raise CheckoutError(f"Product(s) not found: {', '.join(str(i) for i in sorted(missing))}")
+    return products
+
+
+def decrement_stock(products, required):
+    """Check locked stock against the required quantities, then decrement all of
+    them in a single UPDATE using DB-side expressions."""
+    if not required:
+        return
+    for product_id, qty in required.items():
+        p = products[product_id]
+        if (p.stock_qty or 0) < qty:
+            raise CheckoutError(f"Insufficient stock for {p.product_name}")
+    Product.objects.filter(id__in=required).update(
+        stock_qty=Case(
+            *[When(id=product_id, then=F('stock_qty') - Value(qty)) for product_id, qty in required.items()],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+        sync_version=SyncClock.tick(),
+    )
+    for product_id, qty in required.items():
+        products[product_id].stock_qty -= qty
+    update_alerts([products[product_id] for product_id in required], kinds=[StockAlert.LOW_STOCK])
+    invalidate_products(required)
+
+
+def create_bill(bill_fields, items_data):
+    """Create a bill and its items and take the sold quantities off stock.
+
+    Runs a fixed number of queries however many lines the bill has.
+    """
+    lines = []
+    required = {}
+    for item in items_data:
+        product_id = int(item['product_id'])
+        qty = to_decimal(item['qty'])
+        if qty <= 0:
+            raise CheckoutError("Quantity must be greater than zero")
+        lines.append((product_id, qty, to_decimal(item['price']), to_decimal(item.get('gst_percent'))))
+        required[product_id] = required.get(product_id, 0) + qty
+    # The unique constraint only covers billing_history; generated numbers
+    # carry the financial year, so only given ones can clash with the archive.
+    bill_no = bill_fields.get('bill_no')
+    if bill_no and ArchivedBill.objects.filter(bill_no=bill_no).exists():
+        raise CheckoutError(f"Bill number {bill_no} is already used by an archived bill")
+
+    with transaction.atomic():
+        products = lock_products(required)
+        decrement_stock(products, required)
+        if not bill_fields.get('bill_no'):
+            # Allocated after the product locks, so the series row (which
+            # every checkout touches) is held for as short a time as possible.
+            bill_fields = {**bill_fields, 'bill_no': next_bill_no()}
+        bill = Bill.objects.create(**bill_fields)
+        BillItem.objects.bulk_create([
+            BillItem(bill=bill, product_id=product_id, qty=qty, price=price, gst_percent=gst_percent)
+            for product_id, qty, price, gst_percent in lines
+        ])
+        record_bill(bill, lines)
+        record_movements({pk: -qty for pk, qty in required.items()}, StockMovement.SALE, f"bill:{bill.pk}")
+    return bill
+
+
+def convert_quotation(quotation_id, bill_fields):
+    """Bill a quotation's items as quoted and link the bill to it.
+
+    Adds four queries (quotation lock, converted checks on live and
+    archived bills, items) to create_bill's fixed cost, whatever the number
+    of lines.
+    """
+    with transaction.atomic():
+        try:
+            quotation = Quotation.objects.select_for_update().get(pk=quotation_id)
+        except Quotation.DoesNotExist:
+            raise CheckoutError(f"Quotation {quotation_id} not found")
+        existing = (
+            Bill.objects.filter(quotation=quotation).values_list('bill_no', flat=True).first()
+            or ArchivedBill.objects.filter(quotation_id=quotation.pk).values_list('bill_no', flat=True).first()
+        )
+        if existing:
+            raise CheckoutError(f"Quotation already converted to bill {existing}")
+        items = [
+            {'product_id': item.product_id, 'qty': item.quantity, 'price': item.price, 'gst_percent': item.product.gst_percent}
+            for item in quotation.items.select_related('product').order_by('id')
+        ]
+        if not items:
+            raise CheckoutError("Quotation has no items")
+        return create_bill(
+            {
+                'customer_id': quotation.customer_id,
+                'total_amount': quotation.total_amount,
+                **bill_fields,
+                'quotation_id': quotation.pk,
+            },
+            items,
+        )
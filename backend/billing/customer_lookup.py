@@ -0,0 +1,143 @@
+import bisect
+import re
+import threading
+
+from django.conf import settings
+from django.db.models import CharField, Func, Value
+from django.db.models.functions import Replace
+
+from .models import Customer, SyncClock, SyncTombstone
+
+LOOKUP_DEFAULT_LIMIT = 10
+LOOKUP_MAX_LIMIT = 50
+# Name substrings shorter than this only match as prefixes (see search.py).
+MIN_SUBSTRING_LENGTH = 3
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def phone_key(phone):
+    return _NON_DIGITS.sub('', phone or '')
+
+
+class PhoneDigits(Func):
+    """phone_key() in SQL. PostgreSQL strips every non-digit, matching the
+    customers_phone_digits index; other databases strip the separators
+    numbers are written with."""
+    template = "REGEXP_REPLACE(%(expressions)s, '\\D', '', 'g')"
+    output_field = CharField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        expression = self.source_expressions[0]
+        for separator in ' +-().':
+            expression = Replace(expression, Value(separator))
+        return compiler.compile(expression)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class PhoneIndex:
+    """Per-worker sorted index of customer phone digits.
+
+    Kept current from the delta-sync versions: each lookup first applies the
+    customers changed or deleted since the last version it saw, which is two
+    index seeks that are almost always empty. Prefix matches are then a
+    bisect into the sorted key list, independent of the number of customers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = 0
+        self._keys = []  # sorted (digits, pk)
+        self._by_pk = {}  # pk -> (digits, pk)
+
+    def _add(self, pk, phone):
+        entry = (phone_key(phone), pk)
+        self._remove(pk)
+        bisect.insort(self._keys, entry)
+        self._by_pk[pk] = entry
+
+    def _remove(self, pk):
+        entry = self._by_pk.pop(pk, None)
+        if entry is not None:
+            i = bisect.bisect_left(self._keys, entry)
+            del self._keys[i]
+
+    def _refresh(self):
+        # Read the horizon before the rows: versions below it are settled,
+        # anything from it on is read again next time.
+        horizon = SyncClock.horizon()
+        if not self._loaded:
+            self._keys = sorted((phone_key(phone), pk) for pk, phone in Customer.objects.values_list('id', 'phone'))
+            self._by_pk = {pk: (key, pk) for key, pk in self._keys}
+            self._version = horizon - 1
+            self._loaded = True
+            return
+        changed = list(
+            Customer.objects.filter(sync_version__gt=self._version)
+            .order_by('sync_version').values_list('id', 'phone')
+        )
+        deleted = list(
+            SyncTombstone.objects.filter(model='customer', sync_version__gt=self._version)
+            .values_list('object_id', flat=True)
+        )
+        for pk, phone in changed:
+            self._add(pk, phone)
+        for pk in deleted:
+            self._remove(pk)
+        self._version = max(self._version, horizon - 1)
+
+    def prefix(self, digits, limit):
+        """Return up to ``limit`` customer pks whose phone starts with ``digits``."""
+        with self._lock:
+            self._refresh()
+            start = bisect.bisect_left(self._keys, (digits,))
+            pks = []
+            for key, pk in self._keys[start:start + limit]:
+                if not key.startswith(digits):
+                    break
+                pks.append(pk)
+            return pks
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+            self._version = 0
+            self._keys = []
+            self._by_pk = {}
+
+
+phone_index = PhoneIndex()
+
+
+def _by_phone(digits, limit):
+    if getattr(settings, 'BILLING_CUSTOMER_PHONE_INDEX', True):
+        pks = phone_index.prefix(digits, limit)
+        customers = Customer.objects.in_bulk(pks)
+        return [customers[pk] for pk in pks if pk in customers]
+    # Served by the customers_phone_digits index.
+    return list(
+        Customer.objects.annotate(digits=PhoneDigits('phone'))
+        .filter(digits__startswith=digits).order_by('digits', 'id')[:limit]
+    )
+
+
+def _by_name(query, limit):
+    results = list(Customer.objects.filter(name__istartswith=query)[:limit])
+    if len(results) < limit and len(query) >= MIN_SUBSTRING_LENGTH:
+        results += Customer.objects.filter(name__icontains=query).exclude(
+            id__in=[c.id for c in results]
+        )[:limit - len(results)]
+    return results
+
+
+def lookup_customers(query, limit=LOOKUP_DEFAULT_LIMIT):
+    """Cashier typeahead: a query of digits matches phone prefixes, anything
+    else matches names (prefixes first, then substrings)."""
+    query = query.strip()
+    digits = phone_key(query)
+    if digits and not re.search(r'[^\d\s+\-()]', query):
+        return _by_phone(digits, limit)
+    return _by_name(query, limit)
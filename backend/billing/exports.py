@@ -0,0 +1,190 @@
+import csv
+import tempfile
+from datetime import datetime, time
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .archive import archived_until
+from .models import ArchivedBill, ArchivedBillItem, Bill, BillItem, Product
+
+CHUNK_SIZE = 2000
+# Lines (or file blocks) handed to the ASGI server per trip to the sync thread.
+ASYNC_BATCH_SIZE = 500
+
+# Export name -> (model, {column: ORM path}). Bill columns follow
+# BillSerializer/BillItemSerializer naming so exports match the API.
+EXPORTS = {
+    'bills': (Bill, {
+        'id': 'id',
+        'bill_no': 'bill_no',
+        'customer': 'customer_id',
+        'customer_name': 'customer__name',
+        'address': 'customer__address',
+        'phone': 'customer__phone',
+        'total_amount': 'total_amount',
+        'payment_mode': 'payment_mode',
+        'created_at': 'created_at',
+    }),
+    'bill_items': (BillItem, {
+        'bill_id': 'bill_id',
+        'bill_no': 'bill__bill_no',
+        'created_at': 'bill__created_at',
+        'customer_name': 'bill__customer__name',
+        'payment_mode': 'bill__payment_mode',
+        'product_name': 'product__product_name',
+        'hsn_code': 'product__product_id',
+        'qty': 'qty',
+        'price': 'price',
+        'gst_percent': 'gst_percent',
+    }),
+    'products': (Product, {f.name: f.attname for f in Product._meta.concrete_fields}),
+}
+DATE_FIELDS = {'bills': 'created_at', 'bill_items': 'bill__created_at'}
+# The same columns read from the archive tables, for bills from closed years.
+ARCHIVE_EXPORTS = {
+    'bills': (ArchivedBill, {
+        'id': 'id',
+        'bill_no': 'bill_no',
+        'customer': 'customer_id',
+        'customer_name': 'customer_name',
+        'address': 'address',
+        'phone': 'phone',
+        'total_amount': 'total_amount',
+        'payment_mode': 'payment_mode',
+        'created_at': 'created_at',
+    }),
+    'bill_items': (ArchivedBillItem, {
+        'bill_id': 'bill_id',
+        'bill_no': 'bill__bill_no',
+        'created_at': 'bill__created_at',
+        'customer_name': 'bill__customer_name',
+        'payment_mode': 'bill__payment_mode',
+        'product_name': 'product_name',
+        'hsn_code': 'hsn_code',
+        'qty': 'qty',
+        'price': 'price',
+        'gst_percent': 'gst_percent',
+    }),
+}
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back, so csv.writer
+    can feed a streaming response without buffering."""
+
+    def write(self, value):
+        return value
+
+
+class AsyncBatchMixin:
+    """Iterate a sync streaming_content a batch at a time under ASGI.
+
+    StreamingHttpResponse.__aiter__ reads a sync iterator with
+    sync_to_async(list), i.e. the whole export ends up in memory before the
+    first byte is sent. The batches are pulled on the request's sync thread,
+    where a server-side cursor opened by the iterator lives.
+    """
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        iterator = iter(self.streaming_content)
+        next_batch = sync_to_async(lambda: list(islice(iterator, ASYNC_BATCH_SIZE)))
+        while batch := await next_batch():
+            for part in batch:
+                yield part
+
+
+class CSVStreamingResponse(AsyncBatchMixin, StreamingHttpResponse):
+    pass
+
+
+class ExportFileResponse(AsyncBatchMixin, FileResponse):
+    pass
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        # openpyxl cannot store aware datetimes; use local wall-clock time.
+        return timezone.make_naive(value) if timezone.is_aware(value) else value
+    return value
+
+
+def select_columns(name, requested):
+    """Return the export's {column: path} limited to ``requested`` (comma separated)."""
+    columns = EXPORTS[name][1]
+    if not requested:
+        return columns
+    wanted = [c.strip() for c in requested.split(',') if c.strip()]
+    unknown = [c for c in wanted if c not in columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}. Available: {', '.join(columns)}")
+    return {c: columns[c] for c in wanted}
+
+
+def _sources(name, columns, since, using):
+    """(model, ORM paths) to read in turn: the archive first when the range
+    reaches back into archived years, then the live table."""
+    sources = []
+    if name in ARCHIVE_EXPORTS:
+        archived_to = archived_until(using)
+        if archived_to is not None and (since is None or since < timezone.make_aware(datetime.combine(archived_to, time.min))):
+            model, paths = ARCHIVE_EXPORTS[name]
+            sources.append((model, [paths[column] for column in columns]))
+    sources.append((EXPORTS[name][0], list(columns.values())))
+    return sources
+
+
+def export_rows(name, columns, since=None, until=None, using=None):
+    """Yield rows as tuples, fetched in server-side chunks ordered by id
+    from the ``using`` database alias (routed as usual when None). Bill
+    exports include archived bills, which come first as the older ones."""
+    date_field = DATE_FIELDS.get(name)
+    for model, paths in _sources(name, columns, since, using):
+        queryset = model.objects.using(using)
+        if date_field and since:
+            queryset = queryset.filter(**{f'{date_field}__gte': since})
+        if date_field and until:
+            queryset = queryset.filter(**{f'{date_field}__lt': until})
+        rows = queryset.order_by('id').values_list(*paths).iterator(chunk_size=CHUNK_SIZE)
+        for row in rows:
+            yield tuple(_cell(v) for v in row)
+
+
+def csv_response(filename, columns, rows):
+    writer = csv.writer(Echo())
+
+    def stream():
+        yield writer.writerow(list(columns))
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = CSVStreamingResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_response(filename, columns, rows):
+    from openpyxl import Workbook
+
+    # write_only mode streams rows to disk as they are appended; the finished
+    # file is then streamed from a temp file.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(filename)
+    sheet.append(list(columns))
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return ExportFileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
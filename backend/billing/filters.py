@@ -0,0 +1,39 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.filters import BaseFilterBackend
+
+
+def day_start(value):
+    return timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min))
+
+
+def next_day_start(value):
+    return day_start(value) + timedelta(days=1)
+
+
+class FieldFilterBackend(BaseFilterBackend):
+    """Filter a list on the query params a view whitelists in ``filter_fields``.
+
+    Each entry maps a query param to an ORM lookup, or to a ``(lookup,
+    converter)`` pair when the raw string needs converting first, e.g. a date
+    into the datetime bounds of that day so ``created_at`` ranges stay
+    index-friendly.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        try:
+            for param, lookup in getattr(view, 'filter_fields', {}).items():
+                value = request.query_params.get(param)
+                if value in (None, ''):
+                    continue
+                if isinstance(lookup, tuple):
+                    lookup, convert = lookup
+                    value = convert(value)
+                filters[lookup] = value
+            return queryset.filter(**filters)
+        except (ValueError, ValidationError) as e:
+            raise ParseError(f"Invalid filter value: {e}")
@@ -0,0 +1,71 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def ttl():
+    return timedelta(hours=getattr(settings, 'BILLING_IDEMPOTENCY_TTL_HOURS', 24))
+
+
+def purge_expired_keys():
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - ttl()).delete()[0]
+
+
+def _fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def idempotent(scope):
+    """Make a create view replayable with an ``Idempotency-Key`` header.
+
+    The key row is inserted in the same transaction as the view's writes, so
+    a concurrent retry blocks on the unique index until the first attempt
+    commits and then replays its stored response. Only 2xx responses are
+    stored; a failed attempt releases the key so the client can retry.
+
+    ``scope`` may name URL kwargs, e.g. ``'quotations.convert:{pk}'``, so a
+    key is bound to the object it was first used on.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = next(a for a in args if isinstance(a, Request))
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_func(*args, **kwargs)
+            if len(key) > 255:
+                return Response({"error": f"{HEADER} must be at most 255 characters"}, status=status.HTTP_400_BAD_REQUEST)
+            fingerprint = _fingerprint(request.data)
+            with transaction.atomic():
+                record, created = IdempotencyKey.objects.get_or_create(
+                    scope=scope.format(**kwargs), key=key, defaults={'request_hash': fingerprint},
+                )
+                if not created:
+                    if record.request_hash != fingerprint:
+                        return Response(
+                            {"error": f"{HEADER} was already used for a different request"},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        )
+                    return Response(record.response_body, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+                response = view_func(*args, **kwargs)
+                if not status.is_success(response.status_code):
+                    transaction.set_rollback(True)
+                    return response
+                record.status_code = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=['status_code', 'response_body'])
+                return response
+        return wrapper
+    return decorator
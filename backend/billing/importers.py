@@ -0,0 +1,302 @@
+import csv
+import io
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from .alerts import update_alerts
+from .models import Customer, Product, ServiceEntry, StockMovement, SyncClock
+from .stock import record_movements
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Model field -> accepted column headers, first match wins.
+PRODUCT_COLUMNS = {
+    "product_id": ["Product ID", "product_id"],
+    "product_name": ["Product Name", "product_name"],
+    "product_note": ["Product Note"],
+    "selling_price": ["Sell Price", "Selling Price"],
+    "gst_percent": ["Tax %", "GST%"],
+    "stock_qty": ["Stock Qty"],
+    "purchase_price_include_tax": ["Purchase Price (Incl. Tax)", "Purchase Price (Include Tax)"],
+    "hsn_sac_code": ["HSN/SAC Code", "hsn_sac_code"],
+    "unit_of_measurement": ["Unit of Measurement"],
+    "product_type": ["Product Type"],
+    "no_itc": ["No-ITC"],
+    "active_product": ["Active Product"],
+    "is_service_product": ["Is Service Product ?"],
+    "non_salable_product": ["Non-Salable Product?"],
+    "product_group": ["Product Group"],
+    "stock_type": ["Stock Type"],
+    "stock_id": ["Stock ID"],
+    "batch_no": ["Batch No"],
+    "model_no": ["Model No"],
+    "size": ["Size"],
+    "mfg_date": ["Mfg. Date"],
+    "expire_date": ["Expiry Date", "Expire Date"],
+    "mrp": ["MRP"],
+    "low_stock_alert": ["Low Stock Alert"],
+    "discount": ["Discount"],
+    "discount_in": ["Discount In"],
+}
+
+BOOLEAN_FIELDS = {"no_itc", "active_product", "is_service_product", "non_salable_product"}
+FALSE_STRINGS = {"", "0", "false", "no", "n", "off"}
+UPDATE_FIELDS = [name for name in PRODUCT_COLUMNS if name != "product_id"]
+
+# The service's customer is given by id, or else found by phone.
+SERVICE_COLUMNS = {
+    "customer": ["customer", "Customer ID", "customer_id"],
+    "customer_phone": ["customer_phone", "Customer Phone"],
+    "phone": ["phone", "Phone"],
+    "address": ["address", "Address"],
+    "call_for": ["call_for", "Call For"],
+    "status": ["status", "Status"],
+    "amount": ["amount", "Amount"],
+    "notes": ["notes", "Notes"],
+}
+SERVICE_FIELDS = ["phone", "address", "call_for", "status", "amount", "notes"]
+
+
+def map_row(item, columns=PRODUCT_COLUMNS):
+    mapped = {}
+    for field, headers in columns.items():
+        value = None
+        for header in headers:
+            value = item.get(header)
+            if value not in (None, ""):
+                break
+        if isinstance(value, str):
+            value = value.strip()
+        mapped[field] = value
+    return mapped
+
+
+def _clean_value(field, value):
+    if value in (None, ""):
+        value = None if field.null else field.get_default()
+    return field.clean(value, None)
+
+
+def clean_row(mapped):
+    """Validate a mapped row in memory; return (Product, None) or (None, errors)."""
+    values = {}
+    errors = {}
+    for name, value in mapped.items():
+        field = Product._meta.get_field(name)
+        if name in BOOLEAN_FIELDS:
+            if isinstance(value, str):
+                value = value.lower() not in FALSE_STRINGS
+            values[name] = bool(value)
+            continue
+        try:
+            values[name] = _clean_value(field, value)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if not values.get("product_id"):
+        errors["product_id"] = ["Product ID is required."]
+    if errors:
+        return None, errors
+    return Product(**values), None
+
+
+def read_rows(upload):
+    """Yield dict rows from an uploaded CSV or XLSX file without loading it whole."""
+    ext = os.path.splitext(upload.name or "")[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("XLSX import requires openpyxl to be installed")
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+            for row in rows:
+                if any(cell not in (None, "") for cell in row):
+                    yield dict(zip(header, row))
+        finally:
+            workbook.close()
+    elif ext in (".csv", ".txt", ""):
+        text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        for row in csv.DictReader(text):
+            yield {k.strip(): v for k, v in row.items() if k}
+    else:
+        raise ValueError(f"Unsupported file type '{ext}', expected .csv or .xlsx")
+
+
+def _upsert(chunk):
+    """Insert or update a chunk of products; returns (created, updated)."""
+    # Later rows win, matching the old row-by-row update_or_create behaviour.
+    products = list({p.product_id: p for p in chunk}.values())
+    codes = [p.product_id for p in products]
+    with transaction.atomic():
+        # Lock existing rows first so the stock deltas logged below are exact.
+        before = dict(
+            Product.objects.select_for_update().filter(product_id__in=codes)
+            .order_by('id').values_list('product_id', 'stock_qty')
+        )
+        version = SyncClock.tick()
+        for p in products:
+            p.sync_version = version
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=["product_id"],
+            update_fields=[*UPDATE_FIELDS, "sync_version"],
+        )
+        ids = dict(Product.objects.filter(product_id__in=codes).values_list('product_id', 'id'))
+        for p in products:
+            p.pk = ids[p.product_id]
+        record_movements(
+            {p.pk: p.stock_qty - before.get(p.product_id, 0) for p in products},
+            StockMovement.IMPORT,
+            'import',
+        )
+        update_alerts(products)
+    return len(products) - len(before), len(before)
+
+
+def import_products(rows, chunk_size=CHUNK_SIZE):
+    """Upsert product rows keyed on product_id, a fixed few queries per chunk.
+
+    Bad rows are collected into the report instead of aborting the import.
+    """
+    created = 0
+    updated = 0
+    failed = 0
+    errors = []
+    chunk = []
+    for index, item in enumerate(rows, start=1):
+        if not isinstance(item, dict):
+            product, row_errors = None, {"non_field_errors": ["Expected an object"]}
+        else:
+            product, row_errors = clean_row(map_row(item))
+        if row_errors:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                product_id = item.get("Product ID") or item.get("product_id") if isinstance(item, dict) else None
+                errors.append({"row": index, "product_id": product_id, "errors": row_errors})
+            continue
+        chunk.append(product)
+        if len(chunk) >= chunk_size:
+            new, existing = _upsert(chunk)
+            created += new
+            updated += existing
+            chunk = []
+    if chunk:
+        new, existing = _upsert(chunk)
+        created += new
+        updated += existing
+    return {
+        "imported": created + updated,
+        "created": created,
+        "updated": updated,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
+
+
+def clean_service_row(mapped):
+    """Validate a mapped service row; return (ServiceEntry, customer key, None)
+    or (None, None, errors). The key is ("id", pk) or ("phone", phone)."""
+    for name in ("customer_phone", "phone"):
+        # Spreadsheets hand numeric phone cells back as floats.
+        if isinstance(mapped[name], float) and mapped[name].is_integer():
+            mapped[name] = str(int(mapped[name]))
+    values = {}
+    errors = {}
+    for name in SERVICE_FIELDS:
+        try:
+            values[name] = _clean_value(ServiceEntry._meta.get_field(name), mapped[name])
+        except ValidationError as e:
+            errors[name] = e.messages
+    key = None
+    if mapped["customer"] not in (None, ""):
+        try:
+            key = ("id", int(mapped["customer"]))
+        except (TypeError, ValueError):
+            errors["customer"] = [f"'{mapped['customer']}' is not a customer id."]
+    elif mapped["customer_phone"] or mapped["phone"]:
+        key = ("phone", str(mapped["customer_phone"] or mapped["phone"]))
+    else:
+        errors["customer"] = ["Customer id or phone is required."]
+    if errors:
+        return None, None, errors
+    return ServiceEntry(**values), key, None
+
+
+def _insert_services(chunk):
+    """Resolve every customer in the chunk with one query, then bulk-insert the
+    rows whose customer exists. Returns (inserted, errors)."""
+    ids = {key for kind, key in (k for _, _, k in chunk) if kind == "id"}
+    phones = {key for kind, key in (k for _, _, k in chunk) if kind == "phone"}
+    known_ids = set()
+    by_phone = {}
+    for pk, phone in Customer.objects.filter(Q(id__in=ids) | Q(phone__in=phones)).values_list("id", "phone"):
+        known_ids.add(pk)
+        by_phone[phone] = pk
+
+    entries = []
+    errors = []
+    for index, entry, (kind, key) in chunk:
+        customer_id = (key if key in known_ids else None) if kind == "id" else by_phone.get(key)
+        if customer_id is None:
+            errors.append({"row": index, "customer": key, "errors": {"customer": ["Customer not found."]}})
+            continue
+        entry.customer_id = customer_id
+        entries.append(entry)
+    if entries:
+        with transaction.atomic():
+            version = SyncClock.tick()
+            for entry in entries:
+                entry.sync_version = version
+            ServiceEntry.objects.bulk_create(entries)
+    return len(entries), errors
+
+
+def import_services(rows, chunk_size=CHUNK_SIZE):
+    """Insert service rows in chunks of one customer lookup and one INSERT.
+
+    Bad rows are collected into the report instead of aborting the import.
+    """
+    imported = 0
+    failed = 0
+    errors = []
+
+    def report(row_errors):
+        nonlocal failed
+        failed += len(row_errors)
+        errors.extend(row_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+    chunk = []
+    for index, item in enumerate(rows, start=1):
+        if not isinstance(item, dict):
+            report([{"row": index, "customer": None, "errors": {"non_field_errors": ["Expected an object"]}}])
+            continue
+        mapped = map_row(item, SERVICE_COLUMNS)
+        entry, key, row_errors = clean_service_row(mapped)
+        if row_errors:
+            customer = mapped["customer"] or mapped["customer_phone"] or mapped["phone"]
+            report([{"row": index, "customer": customer, "errors": row_errors}])
+            continue
+        chunk.append((index, entry, key))
+        if len(chunk) >= chunk_size:
+            inserted, row_errors = _insert_services(chunk)
+            imported += inserted
+            report(row_errors)
+            chunk = []
+    if chunk:
+        inserted, row_errors = _insert_services(chunk)
+        imported += inserted
+        report(row_errors)
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors),
+    }
@@ -0,0 +1,287 @@
+import io
+import re
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .archive import archived_bills, archived_until
+from .filters import day_start, next_day_start
+from .models import Bill, BillItem, InvoiceJob
+from .rollup import CENT, line_totals
+from .serializers import ArchivedBillSerializer, BillSerializer
+
+CHUNK_SIZE = 200
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.27, 841.89  # A4 in points
+MARGIN = 40
+ROW_HEIGHT = 16
+# Column -> (x, alignment). Right-aligned columns are anchored on their right edge.
+COLUMNS = {
+    'S.No': (MARGIN, 'left'),
+    'Product': (MARGIN + 35, 'left'),
+    'HSN': (330, 'left'),
+    'Qty': (420, 'right'),
+    'Rate': (475, 'right'),
+    'GST%': (515, 'right'),
+    'Amount': (PAGE_WIDTH - MARGIN, 'right'),
+}
+PRODUCT_WIDTH = 330 - (MARGIN + 35) - 8
+
+
+@lru_cache(maxsize=None)
+def fonts():
+    """Register the invoice fonts once per process; returns (regular, bold).
+
+    Set BILLING_INVOICE_FONT (and optionally BILLING_INVOICE_BOLD_FONT) to TTF
+    paths for scripts or symbols the built-in Helvetica lacks, such as ₹.
+    """
+    regular_path = getattr(settings, 'BILLING_INVOICE_FONT', None)
+    if not regular_path:
+        return 'Helvetica', 'Helvetica-Bold'
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont('Invoice', regular_path))
+    bold_path = getattr(settings, 'BILLING_INVOICE_BOLD_FONT', None)
+    if not bold_path:
+        return 'Invoice', 'Invoice'
+    pdfmetrics.registerFont(TTFont('Invoice-Bold', bold_path))
+    return 'Invoice', 'Invoice-Bold'
+
+
+def company():
+    return getattr(settings, 'BILLING_INVOICE_COMPANY', {'name': 'RP SMART ENERGY', 'lines': []})
+
+
+@lru_cache(maxsize=4096)
+def _fit(text, font, size, width):
+    """Truncate ``text`` to ``width`` points; cached since product names repeat."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '…', font, size) > width:
+        text = text[:-1]
+    return text + '…'
+
+
+def _money(value):
+    return f"{value.quantize(CENT):,.2f}"
+
+
+class InvoiceRenderer:
+    """Draws BillSerializer data onto a reportlab canvas, one bill after another.
+
+    The letterhead is drawn once per document as a PDF form XObject and then
+    stamped on every page, so repeated pages cost a reference, not a redraw.
+    """
+
+    def __init__(self, stream):
+        from reportlab.pdfgen.canvas import Canvas
+
+        self.regular, self.bold = fonts()
+        self.canvas = Canvas(stream, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+        self.pages = 0
+        self._letterhead()
+
+    def _letterhead(self):
+        c = self.canvas
+        info = company()
+        c.beginForm('letterhead')
+        top = PAGE_HEIGHT - MARGIN
+        c.setFont(self.bold, 16)
+        c.drawString(MARGIN, top - 12, info['name'])
+        c.setFont(self.regular, 8)
+        for i, line in enumerate(info.get('lines', [])):
+            c.drawString(MARGIN, top - 26 - i * 10, line)
+        c.setFont(self.bold, 12)
+        c.drawRightString(PAGE_WIDTH - MARGIN, top - 12, 'TAX INVOICE')
+        c.line(MARGIN, top - 60, PAGE_WIDTH - MARGIN, top - 60)
+        c.endForm()
+
+    def _start_page(self, bill, page):
+        c = self.canvas
+        c.doForm('letterhead')
+        c.setFont(self.regular, 9)
+        y = PAGE_HEIGHT - MARGIN - 76
+        created = parse_datetime(bill['created_at']) if isinstance(bill['created_at'], str) else bill['created_at']
+        c.drawRightString(PAGE_WIDTH - MARGIN, y, f"Invoice No: {bill['bill_no']}")
+        c.drawRightString(PAGE_WIDTH - MARGIN, y - 12, f"Date: {timezone.localtime(created):%d-%m-%Y %H:%M}")
+        c.drawRightString(PAGE_WIDTH - MARGIN, y - 24, f"Payment: {bill['payment_mode']}")
+        c.drawString(MARGIN, y, f"Customer: {bill.get('customer_name') or 'Walk-in'}")
+        if bill.get('phone'):
+            c.drawString(MARGIN, y - 12, f"Phone: {bill['phone']}")
+        if bill.get('address'):
+            c.drawString(MARGIN, y - 24, _fit(' '.join(bill['address'].split()), self.regular, 9, 300))
+        c.drawRightString(PAGE_WIDTH - MARGIN, MARGIN - 15, f"Page {page}")
+        y -= 50
+        c.setFont(self.bold, 9)
+        self._row(y, {name: name for name in COLUMNS})
+        c.line(MARGIN, y - 4, PAGE_WIDTH - MARGIN, y - 4)
+        c.setFont(self.regular, 9)
+        return y - ROW_HEIGHT
+
+    def _next_page(self, bill, page):
+        self.canvas.showPage()
+        self.pages += 1
+        return self._start_page(bill, page)
+
+    def _row(self, y, cells):
+        c = self.canvas
+        for name, text in cells.items():
+            x, align = COLUMNS[name]
+            if align == 'right':
+                c.drawRightString(x, y, text)
+            else:
+                c.drawString(x, y, text)
+
+    def draw(self, bill):
+        c = self.canvas
+        page = 1
+        y = self._start_page(bill, page)
+        taxable_total = gst_total = Decimal(0)
+        for index, item in enumerate(bill['items'], start=1):
+            if y < MARGIN + 30:
+                page += 1
+                y = self._next_page(bill, page)
+            qty, price = Decimal(str(item['qty'])), Decimal(str(item['price']))
+            gst_percent = Decimal(str(item['gst_percent'] or 0))
+            taxable, gst = line_totals(qty, price, gst_percent)
+            taxable_total += taxable
+            gst_total += gst
+            self._row(y, {
+                'S.No': str(index),
+                'Product': _fit(item['product_name'] or '', self.regular, 9, PRODUCT_WIDTH),
+                'HSN': item['hsn_code'] or '',
+                'Qty': f"{qty.normalize():f}",
+                'Rate': _money(price),
+                'GST%': f"{gst_percent.normalize():f}",
+                'Amount': _money(taxable + gst),
+            })
+            y -= ROW_HEIGHT
+
+        if y < MARGIN + 70:
+            # Keep the totals block together.
+            page += 1
+            y = self._next_page(bill, page)
+        c.line(MARGIN, y + ROW_HEIGHT - 4, PAGE_WIDTH - MARGIN, y + ROW_HEIGHT - 4)
+        x = PAGE_WIDTH - MARGIN
+        for label, value in (('Taxable value', taxable_total), ('GST', gst_total)):
+            y -= 4
+            c.drawRightString(x - 90, y, label)
+            c.drawRightString(x, y, _money(value))
+            y -= ROW_HEIGHT
+        c.setFont(self.bold, 10)
+        c.drawRightString(x - 90, y - 4, 'Grand Total')
+        c.drawRightString(x, y - 4, _money(Decimal(str(bill['total_amount']))))
+        c.showPage()
+        self.pages += 1
+
+    def save(self):
+        self.canvas.save()
+        return self.pages
+
+
+def render_pdf(bills, stream):
+    """Render every bill into one PDF written to ``stream``; returns the page count."""
+    renderer = InvoiceRenderer(stream)
+    for bill in bills:
+        renderer.draw(bill)
+    return renderer.save()
+
+
+def invoice_filename(bill):
+    return re.sub(r'[^\w.-]+', '-', bill['bill_no']) + '.pdf'
+
+
+def render_zip(bills, stream):
+    """Render one PDF per bill into a zip written to ``stream``; returns the page count."""
+    pages = 0
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for bill in bills:
+            buffer = io.BytesIO()
+            pages += render_pdf([bill], buffer)
+            archive.writestr(invoice_filename(bill), buffer.getvalue())
+    return pages
+
+
+def invoice_bills():
+    return Bill.objects.select_related('customer').prefetch_related(
+        Prefetch('items', queryset=BillItem.objects.select_related('product').order_by('id'))
+    )
+
+
+def job_bills(job):
+    """Serialized bills selected by a job, streamed in chunks in bill order.
+    Bills archived from closed years come first, as the older ones."""
+    sources = [(invoice_bills(), BillSerializer)]
+    archived_to = archived_until()
+    if archived_to is not None and not (job.day and job.day >= archived_to):
+        sources.insert(0, (archived_bills(), ArchivedBillSerializer))
+    for bills, serializer in sources:
+        if job.day:
+            bills = bills.filter(created_at__gte=day_start(job.day.isoformat()), created_at__lt=next_day_start(job.day.isoformat()))
+        if job.customer_id:
+            bills = bills.filter(customer_id=job.customer_id)
+        if job.bill_ids:
+            bills = bills.filter(id__in=job.bill_ids)
+        for bill in bills.order_by('id').iterator(chunk_size=CHUNK_SIZE):
+            yield serializer(bill).data
+
+
+def _claim_job():
+    # A job still running after BILLING_INVOICE_JOB_LEASE_SECONDS lost its
+    # worker (crash, restart) and is claimed again.
+    lease = timedelta(seconds=getattr(settings, 'BILLING_INVOICE_JOB_LEASE_SECONDS', 1800))
+    with transaction.atomic():
+        job = (
+            InvoiceJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=InvoiceJob.PENDING) | Q(status=InvoiceJob.RUNNING, started_at__lt=timezone.now() - lease))
+            .order_by('id').first()
+        )
+        if job is None:
+            return None
+        job.status = InvoiceJob.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def run_next_job():
+    """Claim and render one pending batch job, or one whose worker let its
+    lease run out. Returns the job, or None when the queue is empty. Several
+    workers can run this side by side."""
+    job = _claim_job()
+    if job is None:
+        return None
+    started = time.perf_counter()
+    job.bill_count = 0
+
+    def counted(bills):
+        for bill in bills:
+            job.bill_count += 1
+            yield bill
+
+    try:
+        render = render_zip if job.output_format == InvoiceJob.ZIP else render_pdf
+        with tempfile.TemporaryFile() as output:
+            job.page_count = render(counted(job_bills(job)), output)
+            job.file.save(f'invoices-{job.pk}.{job.output_format}', File(output), save=False)
+        job.status = InvoiceJob.DONE
+    except Exception as e:
+        job.status = InvoiceJob.FAILED
+        job.error = str(e)
+    job.render_seconds = time.perf_counter() - started
+    job.finished_at = timezone.now()
+    job.save()
+    return job
@@ -0,0 +1,38 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from billing.archive import ARCHIVE_BATCH_SIZE, archive_bills, archive_cutoff
+from billing.models import Bill
+
+
+class Command(BaseCommand):
+    help = "Move bills from closed financial years out of billing_history into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep', type=int,
+            help="Financial years to keep in billing_history, counting the current one "
+                 "(default BILLING_HOT_FINANCIAL_YEARS).",
+        )
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="Bills moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the bills that would move.")
+
+    def handle(self, *args, **options):
+        if options['keep'] is not None and options['keep'] < 1:
+            raise CommandError("--keep must be at least 1: the current financial year is never archived.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        cutoff = archive_cutoff(options['keep'])
+        if options['dry_run']:
+            count = Bill.objects.filter(created_at__lt=timezone.make_aware(datetime.combine(cutoff, time.min))).count()
+            self.stdout.write(f"Would archive {count} bills created before {cutoff}.")
+            return
+        moved = archive_bills(cutoff, options['batch_size'])
+        if moved and connection.vendor == 'postgresql' and not connection.in_atomic_block:
+            # Let new bills reuse the freed pages and refresh planner stats.
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM (ANALYZE) billing_history, bill_items")
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} bills created before {cutoff}."))
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing.benchmarks import compare, run
+
+
+class Command(BaseCommand):
+    help = "Time the main billing API calls against the current (seeded) database and write JSON results."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Timed calls per scenario (default 50).")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed calls per scenario first (default 5).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed for the request payloads.")
+        parser.add_argument('--scenario', action='append', help="Only run this scenario (repeatable).")
+        parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument('--compare', help="A previous results file to compare median latencies against.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+        try:
+            results = run(options['iterations'], options['warmup'], options['seed'], options['scenario'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stderr.write(f"Results written to {options['output']}.")
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+
+        for name, stats in results['scenarios'].items():
+            if stats['errors']:
+                self.stderr.write(self.style.WARNING(f"{name}: {stats['errors']} unexpected responses"))
+        if baseline:
+            for name, before, after, change in compare(baseline, results):
+                self.stderr.write(f"{name:<22} p50 {before:>9.2f} ms -> {after:>9.2f} ms ({change:+.1f}%)")
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from billing.benchmarks import load
+from billing.models import Bill
+
+DEFAULT_PATHS = [
+    '/api/products/search/?q=Solar',
+    '/api/customers/lookup/?q=00000',
+    '/api/bills/{bill}/',
+]
+
+
+class Command(BaseCommand):
+    help = "Load-test a running server over HTTP and write req/s and latency percentiles as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server to test (default http://127.0.0.1:8000).")
+        parser.add_argument('--path', action='append', help="Path to request, repeatable. Defaults to the async read endpoints.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Concurrent keep-alive clients (default 32).")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds to run (default 10).")
+        parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        paths = options['path'] or DEFAULT_PATHS
+        if any('{bill}' in path for path in paths):
+            bill = Bill.objects.order_by('-id').values_list('id', flat=True).first()
+            if bill is None:
+                raise CommandError("No bills; run manage.py seed_data first.")
+            paths = [path.replace('{bill}', str(bill)) for path in paths]
+        results = load(options['url'], paths, options['concurrency'], options['duration'])
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+        stats = results['load']
+        self.stderr.write(
+            f"{stats['requests_per_second']} req/s, p50 {stats.get('p50_ms')} ms, "
+            f"p99 {stats.get('p99_ms')} ms, {stats['errors']} errors"
+        )
@@ -0,0 +1,40 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from billing.invoices import run_next_job
+
+
+def _work(once, idle_sleep):
+    done = 0
+    while True:
+        job = run_next_job()
+        if job is not None:
+            done += 1
+            continue
+        if once:
+            return done
+        time.sleep(idle_sleep)
+
+
+class Command(BaseCommand):
+    help = "Render queued batch invoice jobs to PDF or zip files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes rendering jobs in parallel.")
+        parser.add_argument('--once', action='store_true', help="Render what is queued now, then exit.")
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        if workers == 1:
+            done = _work(options['once'], options['idle_sleep'])
+        else:
+            # Jobs are claimed with SKIP LOCKED, so workers never share one.
+            # Children must open their own database connections.
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                done = sum(pool.starmap(_work, [(options['once'], options['idle_sleep'])] * workers))
+        self.stdout.write(self.style.SUCCESS(f"Rendered {done} invoice jobs."))
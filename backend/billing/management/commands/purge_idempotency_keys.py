@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from billing.idempotency import purge_expired_keys, ttl
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency keys older than BILLING_IDEMPOTENCY_TTL_HOURS."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency keys older than {ttl()}."))
@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Round, TruncDate
+
+from billing.archive import archived_until
+from billing.models import Bill, BillItem, DailyProductSales, DailySales
+from billing.rollup import CENT
+
+
+def _decimal(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollup tables from billing_history and bill_items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="First day to rebuild (YYYY-MM-DD). Defaults to the first bill.")
+        parser.add_argument('--until', help="Last day to rebuild (YYYY-MM-DD). Defaults to the last bill.")
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options['since']) if options['since'] else None
+            until = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+        # Archived bills are no longer in billing_history; keep their rollups.
+        hot_since = archived_until()
+        if hot_since and since and since < hot_since:
+            raise CommandError(f"Bills before {hot_since} are archived; rebuild from {hot_since} onwards.")
+        if hot_since and not since:
+            since = hot_since
+
+        bills = Bill.objects.all()
+        items = BillItem.objects.all()
+        daily = DailySales.objects.all()
+        product_daily = DailyProductSales.objects.all()
+        if since:
+            bills = bills.filter(created_at__date__gte=since)
+            items = items.filter(bill__created_at__date__gte=since)
+            daily = daily.filter(day__gte=since)
+            product_daily = product_daily.filter(day__gte=since)
+        if until:
+            bills = bills.filter(created_at__date__lte=until)
+            items = items.filter(bill__created_at__date__lte=until)
+            daily = daily.filter(day__lte=until)
+            product_daily = product_daily.filter(day__lte=until)
+
+        # Same per-line rounding as billing.rollup.line_totals.
+        gross = Round(F('qty') * F('price'), 2)
+        product_totals = (
+            items.annotate(
+                day=TruncDate('bill__created_at'),
+                mode=F('bill__payment_mode'),
+                line_gross=gross,
+                line_taxable=Round(gross * 100 / (100 + F('gst_percent')), 2),
+            )
+            .values('day', 'product_id', 'mode')
+            .annotate(
+                bill_count=Count('bill_id', distinct=True),
+                total_qty=Sum('qty'),
+                taxable=Sum('line_taxable'),
+                gross=Sum('line_gross'),
+            )
+            .order_by()
+        )
+        bill_totals = (
+            bills.annotate(day=TruncDate('created_at'))
+            .values('day', 'payment_mode')
+            .annotate(bill_count=Count('id'), amount=Sum('total_amount'))
+            .order_by()
+        )
+
+        with transaction.atomic():
+            daily.delete()
+            product_daily.delete()
+
+            day_rows = {}
+            product_rows = []
+            for row in product_totals.iterator():
+                taxable, row_gross = _decimal(row['taxable']), _decimal(row['gross'])
+                product_rows.append(DailyProductSales(
+                    day=row['day'], product_id=row['product_id'], payment_mode=row['mode'],
+                    bill_count=row['bill_count'], qty=_decimal(row['total_qty']),
+                    taxable_value=taxable, gst_amount=row_gross - taxable,
+                ))
+                totals = day_rows.setdefault((row['day'], row['mode']), [Decimal(0)] * 3)
+                totals[0] += _decimal(row['total_qty'])
+                totals[1] += taxable
+                totals[2] += row_gross - taxable
+            DailyProductSales.objects.bulk_create(product_rows, batch_size=1000)
+
+            daily_rows = []
+            for row in bill_totals.iterator():
+                qty, taxable, gst = day_rows.get((row['day'], row['payment_mode']), [Decimal(0)] * 3)
+                daily_rows.append(DailySales(
+                    day=row['day'], payment_mode=row['payment_mode'], bill_count=row['bill_count'],
+                    total_amount=_decimal(row['amount']), qty=qty, taxable_value=taxable, gst_amount=gst,
+                ))
+            DailySales.objects.bulk_create(daily_rows, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(daily_rows)} daily and {len(product_rows)} daily product rollup rows."
+        ))
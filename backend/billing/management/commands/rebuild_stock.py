@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from billing.stock import rebuild_stock_qty
+
+
+class Command(BaseCommand):
+    help = "Recompute products.stock_qty from the stock movement ledger and snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report products whose stock has drifted.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_stock_qty(dry_run=options['dry_run'])
+        for pk, (cached, expected) in sorted(drift.items()):
+            self.stdout.write(f"product {pk}: stock_qty {cached} -> {expected}")
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift)} products with drifted stock."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from billing.alerts import refresh_alerts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the low-stock and near-expiry alert list. Run daily so expiry alerts follow the calendar."
+
+    def handle(self, *args, **options):
+        counts = refresh_alerts()
+        summary = ', '.join(f"{count} {kind}" for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Refreshed stock alerts: {summary}."))
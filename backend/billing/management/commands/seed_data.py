@@ -0,0 +1,32 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from billing.seed import SCALES, reset, seed
+
+
+class Command(BaseCommand):
+    help = "Bulk-seed a deterministic set of products, customers, bills and services for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='1k', help="Rows per table (default 1k).")
+        for table in ('products', 'customers', 'bills', 'services'):
+            parser.add_argument(f'--{table}', type=int, help=f"Override the number of {table}.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (default 42).")
+        parser.add_argument('--days', type=int, default=365, help="Spread bills over this many days.")
+        parser.add_argument('--reset', action='store_true', help="Delete previously seeded rows first.")
+
+    def handle(self, *args, **options):
+        size = SCALES[options['scale']]
+        counts = {table: size if options[table] is None else options[table] for table in ('products', 'customers', 'bills', 'services')}
+        if counts['bills'] and not counts['products']:
+            raise CommandError("Bills need at least one product.")
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1.")
+        if options['reset']:
+            reset()
+        seed(seed=options['seed'], days=options['days'], **counts)
+        # Seeded bills bypass checkout, so rebuild the rollups they feed.
+        call_command('rebuild_sales_rollup', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{count} {table}" for table, count in counts.items()) + "."
+        ))
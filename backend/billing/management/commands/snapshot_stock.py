@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from billing.stock import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Snapshot closing stock for products that moved, so stock-as-of reads stay cheap. Run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', help="Day to close (YYYY-MM-DD). Defaults to yesterday.")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['day']) if options['day'] else timezone.localdate() - timedelta(days=1)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if day >= timezone.localdate():
+            raise CommandError("Only days that have already ended can be snapshotted.")
+        count = take_snapshots(day)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} stock snapshots for {day}."))
@@ -0,0 +1,241 @@
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+slow_query_logger = logging.getLogger('billing.slow_queries')
+
+# Upper bounds (seconds) of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ViewStats:
+    __slots__ = (
+        'buckets', 'count', 'seconds', 'db_queries', 'db_seconds', 'serialize_seconds', 'render_seconds',
+        'response_bytes', 'statuses',
+    )
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class Registry:
+    """In-process request aggregates, one entry per (view, method).
+
+    Each worker process keeps its own numbers; Prometheus should scrape
+    every worker (or sum them) as usual for multi-process servers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, method, status_code, seconds, db_queries, db_seconds, serialize_seconds, render_seconds,
+                response_bytes):
+        with self._lock:
+            stats = self._views.get((view, method))
+            if stats is None:
+                stats = self._views[(view, method)] = _ViewStats()
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+                    break
+            stats.count += 1
+            stats.seconds += seconds
+            stats.db_queries += db_queries
+            stats.db_seconds += db_seconds
+            stats.serialize_seconds += serialize_seconds
+            stats.render_seconds += render_seconds
+            stats.response_bytes += response_bytes
+            stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def render(self):
+        """Prometheus text exposition format, version 0.0.4."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                '# HELP api_request_duration_seconds API request latency.',
+                '# TYPE api_request_duration_seconds histogram',
+            ]
+            for (view, method), stats in views:
+                labels = f'view="{view}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f'api_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}')
+                lines.append(f'api_request_duration_seconds_count{{{labels}}} {stats.count}')
+            for name, kind, help_text, attr in (
+                ('api_requests_total', 'counter', 'API requests by response status.', None),
+                ('api_db_queries_total', 'counter', 'Database queries issued by API requests.', 'db_queries'),
+                ('api_db_seconds_total', 'counter', 'Time API requests spent in the database.', 'db_seconds'),
+                ('api_serialize_seconds_total', 'counter', 'Time serializers spent building response data.',
+                 'serialize_seconds'),
+                ('api_render_seconds_total', 'counter', 'Time spent rendering API responses.', 'render_seconds'),
+                ('api_response_bytes_total', 'counter', 'Bytes of non-streaming API responses.', 'response_bytes'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for (view, method), stats in views:
+                    labels = f'view="{view}",method="{method}"'
+                    if attr is None:
+                        for code, count in sorted(stats.statuses.items()):
+                            lines.append(f'{name}{{{labels},status="{code}"}} {count}')
+                    else:
+                        lines.append(f'{name}{{{labels}}} {getattr(stats, attr)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class _RequestStats:
+    def __init__(self):
+        self.view = 'unmatched'
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serializing = False
+        self.serialize_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+
+
+# The stats of the request being served. Context variables follow the request
+# into the threads that sync_to_async runs ORM calls in, so queries are
+# counted whichever thread (and pooled connection) ends up running them.
+_current = contextvars.ContextVar('billing_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+        if elapsed * 1000 >= getattr(settings, 'BILLING_SLOW_QUERY_MS', 200):
+            slow_query_logger.warning(
+                "%.1f ms in %s (%s): %s", elapsed * 1000, stats.view, context['connection'].alias, sql,
+            )
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """Counts the time a serializer spends building response data towards
+    the request's serialize timing. Only the outermost to_representation()
+    is timed, less the queries it runs, which db already counts."""
+
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started, db_seconds = time.perf_counter(), stats.db_seconds
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializing = False
+            stats.serialize_seconds += time.perf_counter() - started - (stats.db_seconds - db_seconds)
+
+
+class MetricsMiddleware:
+    """Times every request and reports it in a Server-Timing header and the
+    /api/_metrics aggregates: DB query count and time, serializer time,
+    response rendering time, total time and response size. Queries slower than
+    BILLING_SLOW_QUERY_MS are logged to ``billing.slow_queries`` with the
+    view that issued them.
+
+    Works in both sync (WSGI) and async (ASGI) stacks, so async views are
+    not pushed back onto a thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _start(self, request):
+        stats = _RequestStats()
+        request._metrics = stats
+        return stats, _current.set(stats), time.perf_counter()
+
+    def _finish(self, request, response, stats, started):
+        total = time.perf_counter() - started
+        size = 0 if response.streaming else len(response.content)
+        app = max(total - stats.db_seconds - stats.serialize_seconds - stats.render_seconds, 0)
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{stats.db_queries} queries";dur={stats.db_seconds * 1000:.1f}',
+            f'serialize;dur={stats.serialize_seconds * 1000:.1f}',
+            f'render;dur={stats.render_seconds * 1000:.1f}',
+            f'app;dur={app * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        registry.observe(
+            stats.view, request.method, response.status_code, total,
+            stats.db_queries, stats.db_seconds, stats.serialize_seconds, stats.render_seconds, size,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        request._metrics.view = match.view_name or match._func_path
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        stats = request._metrics
+        stats.render_started = time.perf_counter()
+
+        def rendered(response):
+            stats.render_seconds += time.perf_counter() - stats.render_started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_quotation_product_active_product_product_batch_no_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='serviceentry',
+            name='created_on',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
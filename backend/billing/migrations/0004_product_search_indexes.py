@@ -0,0 +1,47 @@
+from django.db import migrations
+
+SEARCH_COLUMNS = ['product_name', 'product_id', 'model_no', 'hsn_sac_code']
+
+
+def create_search_indexes(apps, schema_editor):
+    # Only PostgreSQL gets dedicated search indexes; SQLite (tests) falls back
+    # to plain LIKE scans.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trigram = cursor.fetchone() is not None
+    if has_trigram:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in SEARCH_COLUMNS:
+        # icontains/istartswith compile to UPPER(col::text) LIKE UPPER(%s),
+        # so index that same expression.
+        if has_trigram:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS products_{column}_search '
+                f'ON products USING gin (UPPER({column}::text) gin_trgm_ops)'
+            )
+        else:
+            # Without pg_trgm only prefix matches can use an index.
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS products_{column}_search '
+                f'ON products (UPPER({column}::text) text_pattern_ops)'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS products_{column}_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0003_serviceentry_created_on_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0004_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_mode', models.CharField(max_length=50)),
+                ('bill_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('taxable_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('gst_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'db_table': 'daily_sales',
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_mode'), name='daily_sales_day_mode_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_mode', models.CharField(max_length=50)),
+                ('bill_count', models.IntegerField(default=0)),
+                ('qty', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('taxable_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('gst_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='billing.product')),
+            ],
+            options={
+                'db_table': 'daily_product_sales',
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'payment_mode'), name='daily_product_sales_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0005_daily_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['created_at'], name='bill_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['payment_mode', 'created_at'], name='bill_mode_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['customer', 'created_at'], name='bill_customer_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name'], name='customer_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['date'], name='quotation_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['customer', 'date'], name='quotation_customer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceentry',
+            index=models.Index(fields=['status', 'call_for'], name='service_status_call_for_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceentry',
+            index=models.Index(fields=['call_for'], name='service_call_for_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceentry',
+            index=models.Index(fields=['customer', 'call_for'], name='service_customer_call_for_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:35
+
+from django.db import migrations, models
+
+
+def start_clock(apps, schema_editor):
+    # Existing rows share version 1 so a first sync from cursor 0 returns them.
+    apps.get_model('billing', 'SyncClock').objects.create(id=1, version=1)
+    for name in ('Product', 'Customer', 'ServiceEntry'):
+        apps.get_model('billing', name).objects.update(sync_version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0008_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncClock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sync_clock',
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('sync_version', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='sync_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sync_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='serviceentry',
+            name='sync_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['sync_version', 'id'], name='customer_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sync_version', 'id'], name='product_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceentry',
+            index=models.Index(fields=['sync_version', 'id'], name='service_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['sync_version', 'id'], name='sync_tombstone_version_idx'),
+        ),
+        migrations.RunPython(start_clock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def opening_balances(apps, schema_editor):
+    # Seed the ledger with current stock so it sums back to stock_qty.
+    Product = apps.get_model('billing', 'Product')
+    StockMovement = apps.get_model('billing', 'StockMovement')
+    today = timezone.localdate()
+    movements = (
+        StockMovement(product_id=pk, kind='opening', qty=qty, day=today, reference='migration')
+        for pk, qty in Product.objects.exclude(stock_qty=0).values_list('pk', 'stock_qty').iterator()
+    )
+    StockMovement.objects.bulk_create(movements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0009_delta_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Opening'), ('sale', 'Sale'), ('import', 'Import'), ('adjustment', 'Adjustment'), ('return', 'Return')], max_length=20)),
+                ('qty', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('day', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='billing.product')),
+            ],
+            options={
+                'db_table': 'stock_movements',
+                'indexes': [models.Index(fields=['product', 'day'], name='stock_movement_product_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('qty', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='billing.product')),
+            ],
+            options={
+                'db_table': 'stock_snapshots',
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='stock_snapshot_product_day_uniq')],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0010_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low_stock', 'Low stock'), ('expiring', 'Expiring')], max_length=20)),
+                ('stock_qty', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('threshold', models.IntegerField(blank=True, null=True)),
+                ('expire_date', models.DateField(blank=True, null=True)),
+                ('batch_no', models.CharField(blank=True, max_length=100, null=True)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'stock_alerts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('active_product', True), ('stock_qty__lte', models.F('low_stock_alert'))), fields=['id'], name='product_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('active_product', True), ('expire_date__isnull', False)), fields=['expire_date'], name='product_expire_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='billing.product'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(fields=['kind', 'updated_at'], name='stock_alert_kind_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockalert',
+            constraint=models.UniqueConstraint(fields=('product', 'kind'), name='stock_alert_product_kind_uniq'),
+        ),
+    ]
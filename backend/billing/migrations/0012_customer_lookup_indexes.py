@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+def create_lookup_indexes(apps, schema_editor):
+    # PostgreSQL only, as in 0004; SQLite falls back to plain LIKE scans.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trigram = cursor.fetchone() is not None
+    # phone__startswith compiles to a case-sensitive LIKE 'x%'.
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS customers_phone_prefix ON customers (phone varchar_pattern_ops)'
+    )
+    if has_trigram:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS customers_name_search '
+            'ON customers USING gin (UPPER(name::text) gin_trgm_ops)'
+        )
+    else:
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS customers_name_search '
+            'ON customers (UPPER(name::text) text_pattern_ops)'
+        )
+
+
+def drop_lookup_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS customers_phone_prefix')
+    schema_editor.execute('DROP INDEX IF EXISTS customers_name_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0011_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_lookup_indexes, drop_lookup_indexes),
+    ]
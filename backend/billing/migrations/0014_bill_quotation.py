@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0013_invoice_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='quotation',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bill', to='billing.quotation'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ARCHIVE_MODELS = ('ArchivedBill', 'ArchivedBillItem')
+
+
+def create_archive_tables(apps, schema_editor):
+    for name in ARCHIVE_MODELS:
+        model = apps.get_model('billing', name)
+        if schema_editor.connection.vendor != 'postgresql':
+            schema_editor.create_model(model)
+            continue
+        # List-partitioned by financial year; archive_bills adds a partition
+        # per year. The primary key has to include the partition key.
+        sql, params = schema_editor.table_sql(model)
+        sql = sql.replace(' PRIMARY KEY', '', 1).removesuffix(')')
+        sql += ', PRIMARY KEY ("id", "financial_year")) PARTITION BY LIST ("financial_year")'
+        schema_editor.execute(sql, params or None)
+        # Indexes on the parent cascade to every partition.
+        schema_editor.deferred_sql.extend(schema_editor._model_indexes_sql(model))
+
+
+def drop_archive_tables(apps, schema_editor):
+    for name in reversed(ARCHIVE_MODELS):
+        schema_editor.delete_model(apps.get_model('billing', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0014_bill_quotation'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='ArchivedBill',
+                fields=[
+                    ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                    ('financial_year', models.CharField(max_length=7)),
+                    ('bill_no', models.CharField(max_length=100)),
+                    ('customer_id', models.BigIntegerField(blank=True, null=True)),
+                    ('customer_name', models.CharField(blank=True, max_length=255, null=True)),
+                    ('address', models.TextField(blank=True, null=True)),
+                    ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                    ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                    ('payment_mode', models.CharField(max_length=50)),
+                    ('created_at', models.DateTimeField()),
+                    ('quotation_id', models.BigIntegerField(blank=True, null=True)),
+                ],
+                options={
+                    'db_table': 'billing_history_archive',
+                    'indexes': [models.Index(fields=['bill_no'], name='archived_bill_no_idx'), models.Index(fields=['created_at'], name='archived_bill_created_at_idx')],
+                },
+            ),
+            migrations.CreateModel(
+                name='ArchivedBillItem',
+                fields=[
+                    ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                    ('financial_year', models.CharField(max_length=7)),
+                    ('product_id', models.BigIntegerField()),
+                    ('product_name', models.CharField(blank=True, max_length=255, null=True)),
+                    ('hsn_code', models.CharField(blank=True, max_length=100, null=True)),
+                    ('qty', models.DecimalField(decimal_places=2, max_digits=10)),
+                    ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                    ('gst_percent', models.DecimalField(decimal_places=2, default=0.0, max_digits=5)),
+                    ('bill', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='items', to='billing.archivedbill')),
+                ],
+                options={
+                    'db_table': 'bill_items_archive',
+                },
+            ),
+        ]),
+        migrations.RunPython(create_archive_tables, drop_archive_tables),
+    ]
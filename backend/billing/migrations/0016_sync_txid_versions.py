@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+from django.db import migrations
+
+
+def create_clock_functions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # Offset transaction ids so new versions sort after every version the
+        # counter has handed out, and cursors clients already hold stay valid.
+        cursor.execute("SELECT GREATEST(COALESCE(MAX(version), 0) - txid_current(), 0) FROM sync_clock")
+        base = int(cursor.fetchone()[0])
+        cursor.execute(
+            "CREATE OR REPLACE FUNCTION sync_clock_tick() RETURNS bigint "
+            f"LANGUAGE sql VOLATILE AS $$ SELECT txid_current() + {base} $$"
+        )
+        # The oldest transaction still running: every id below it has
+        # committed or rolled back.
+        cursor.execute(
+            "CREATE OR REPLACE FUNCTION sync_clock_horizon() RETURNS bigint "
+            f"LANGUAGE sql STABLE AS $$ SELECT txid_snapshot_xmin(txid_current_snapshot()) + {base} $$"
+        )
+
+
+def drop_clock_functions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        # Carry on counting from the last version handed out.
+        cursor.execute(
+            "INSERT INTO sync_clock (id, version) VALUES (1, sync_clock_tick()) "
+            "ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version"
+        )
+        cursor.execute("DROP FUNCTION IF EXISTS sync_clock_tick()")
+        cursor.execute("DROP FUNCTION IF EXISTS sync_clock_horizon()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0015_bill_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_clock_functions, drop_clock_functions),
+    ]
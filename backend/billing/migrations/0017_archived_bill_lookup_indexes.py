@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0016_sync_txid_versions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedbill',
+            index=models.Index(fields=['customer_id'], name='archived_bill_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedbill',
+            index=models.Index(fields=['quotation_id'], name='archived_bill_quotation_idx'),
+        ),
+    ]
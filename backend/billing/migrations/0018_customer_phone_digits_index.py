@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def create_digits_index(apps, schema_editor):
+    # PostgreSQL only, as in 0012. The expression must match PhoneDigits.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS customers_phone_prefix')
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS customers_phone_digits "
+        "ON customers ((REGEXP_REPLACE(phone, '\\D', '', 'g')) text_pattern_ops)"
+    )
+
+
+def drop_digits_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS customers_phone_digits')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS customers_phone_prefix ON customers (phone varchar_pattern_ops)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0017_archived_bill_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_digits_index, drop_digits_index),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 STATUS_CHOICES = [
@@ -11,16 +12,86 @@ STATUS_CHOICES = [
     ("Service", "Service"),
 ]
 
-class Customer(models.Model):
+class SyncClock(models.Model):
+    """Hands out change versions for delta sync.
+
+    On PostgreSQL a version is the writing transaction's id, offset so it is
+    above anything the old counter handed out (see migration 0016), and takes
+    no lock. Ids are not assigned in commit order, so readers only go up to
+    horizon(). Elsewhere the single row is a counter; SQLite has one writer
+    at a time anyway.
+    """
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sync_clock'
+
+    @classmethod
+    def tick(cls):
+        """Return the version for rows written in the current transaction."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT sync_clock_tick()")
+            else:
+                table = connection.ops.quote_name(cls._meta.db_table)
+                # Upsert so a flushed table (e.g. TransactionTestCase) restarts the clock.
+                cursor.execute(
+                    f"INSERT INTO {table} (id, version) VALUES (1, 1) "
+                    f"ON CONFLICT (id) DO UPDATE SET version = {table}.version + 1 RETURNING version"
+                )
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def horizon(cls):
+        """Versions below this belong to finished transactions: a row with
+        one that is not visible now never will be, so a sync cursor may pass it."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT sync_clock_horizon()")
+                return cursor.fetchone()[0]
+        return (cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0) + 1
+
+
+class SyncVersionedModel(models.Model):
+    sync_version = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            self.sync_version = SyncClock.tick()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'sync_version'}
+            super().save(*args, **kwargs)
+
+
+class SyncTombstone(models.Model):
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    sync_version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'sync_tombstones'
+        indexes = [
+            models.Index(fields=['sync_version', 'id'], name='sync_tombstone_version_idx'),
+        ]
+
+
+class Customer(SyncVersionedModel):
     name = models.CharField(max_length=255)
     email = models.EmailField(max_length=255, null=True, blank=True)
     phone = models.CharField(max_length=20, unique=True)
     address = models.TextField(null=True, blank=True)
     class Meta:
         db_table = 'customers'
-        managed = True  
+        managed = True
+        indexes = [
+            models.Index(fields=['name'], name='customer_name_idx'),
+            models.Index(fields=['sync_version', 'id'], name='customer_sync_idx'),
+        ]
 
-class Product(models.Model):
+class Product(SyncVersionedModel):
     product_name = models.CharField(max_length=255, null=True, blank=True)
     product_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     product_note = models.TextField(blank=True, null=True)
@@ -53,11 +124,32 @@ class Product(models.Model):
     class Meta:
         db_table = 'products'
         managed = True
+        indexes = [
+            models.Index(fields=['sync_version', 'id'], name='product_sync_idx'),
+            # Partial indexes holding only the products that can raise alerts,
+            # so the alert refresh never walks the whole catalogue.
+            models.Index(
+                fields=['id'],
+                condition=Q(active_product=True, stock_qty__lte=F('low_stock_alert')),
+                name='product_low_stock_idx',
+            ),
+            models.Index(
+                fields=['expire_date'],
+                condition=Q(active_product=True, expire_date__isnull=False),
+                name='product_expire_date_idx',
+            ),
+        ]
 class Quotation(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     date = models.DateField(auto_now_add=True)
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='quotation_date_idx'),
+            models.Index(fields=['customer', 'date'], name='quotation_customer_date_idx'),
+        ]
+
     def __str__(self):
         return f"Quotation #{self.id} - {self.customer.name}"
 
@@ -72,7 +164,7 @@ class QuotationItem(models.Model):
         return f"{self.product.product_name} * {self.quantity}"
 
 
-class ServiceEntry(models.Model):
+class ServiceEntry(SyncVersionedModel):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="services")
     phone = models.CharField(max_length=15, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
@@ -80,9 +172,17 @@ class ServiceEntry(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Followup")
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     notes = models.TextField(blank=True, null=True)
-    created_on = models.DateTimeField(auto_now_add=True)
+    created_on = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'call_for'], name='service_status_call_for_idx'),
+            models.Index(fields=['call_for'], name='service_call_for_idx'),
+            models.Index(fields=['customer', 'call_for'], name='service_customer_call_for_idx'),
+            models.Index(fields=['sync_version', 'id'], name='service_sync_idx'),
+        ]
+
     def __str__(self):
         return f"{self.customer.name} - {self.status} on {self.call_for}"
 
@@ -92,8 +192,14 @@ class Bill(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_mode = models.CharField(max_length=50, default="CASH") 
     created_at = models.DateTimeField(auto_now_add=True) 
+    quotation = models.OneToOneField(Quotation, on_delete=models.SET_NULL, null=True, blank=True, related_name='bill')
     class Meta:
         db_table = 'billing_history'
+        indexes = [
+            models.Index(fields=['created_at'], name='bill_created_at_idx'),
+            models.Index(fields=['payment_mode', 'created_at'], name='bill_mode_created_at_idx'),
+            models.Index(fields=['customer', 'created_at'], name='bill_customer_created_at_idx'),
+        ]
 
 
 class BillItem(models.Model):
@@ -104,4 +210,224 @@ class BillItem(models.Model):
     gst_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
 
     class Meta:
-        db_table = 'bill_items' 
\ No newline at end of file
+        db_table = 'bill_items'
+
+
+class ArchivedBill(models.Model):
+    """A bill from a closed financial year, moved out of billing_history by
+    manage.py archive_bills. Customer details are copied in, so archived
+    rows no longer depend on the live tables. On PostgreSQL the table is
+    list-partitioned by financial_year."""
+    id = models.BigIntegerField(primary_key=True)
+    financial_year = models.CharField(max_length=7)
+    bill_no = models.CharField(max_length=100)
+    customer_id = models.BigIntegerField(null=True, blank=True)
+    customer_name = models.CharField(max_length=255, null=True, blank=True)
+    address = models.TextField(null=True, blank=True)
+    phone = models.CharField(max_length=20, null=True, blank=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_mode = models.CharField(max_length=50)
+    created_at = models.DateTimeField()
+    quotation_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'billing_history_archive'
+        indexes = [
+            models.Index(fields=['bill_no'], name='archived_bill_no_idx'),
+            models.Index(fields=['created_at'], name='archived_bill_created_at_idx'),
+            models.Index(fields=['customer_id'], name='archived_bill_customer_idx'),
+            models.Index(fields=['quotation_id'], name='archived_bill_quotation_idx'),
+        ]
+
+
+class ArchivedBillItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    financial_year = models.CharField(max_length=7)
+    # No database constraint: PostgreSQL cannot reference a partitioned
+    # table by id alone.
+    bill = models.ForeignKey(ArchivedBill, related_name='items', on_delete=models.DO_NOTHING, db_constraint=False)
+    product_id = models.BigIntegerField()
+    product_name = models.CharField(max_length=255, null=True, blank=True)
+    hsn_code = models.CharField(max_length=100, null=True, blank=True)
+    qty = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    gst_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+
+    class Meta:
+        db_table = 'bill_items_archive'
+
+class DailySales(models.Model):
+    day = models.DateField()
+    payment_mode = models.CharField(max_length=50)
+    bill_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    taxable_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gst_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'daily_sales'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_mode'], name='daily_sales_day_mode_uniq'),
+        ]
+
+
+class DailyProductSales(models.Model):
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    payment_mode = models.CharField(max_length=50)
+    bill_count = models.IntegerField(default=0)
+    qty = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    taxable_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gst_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'daily_product_sales'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product', 'payment_mode'], name='daily_product_sales_uniq'),
+        ]
+
+
+class BillSeries(models.Model):
+    name = models.CharField(max_length=20)
+    financial_year = models.CharField(max_length=7)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'bill_series'
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'financial_year'], name='bill_series_name_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}/{self.financial_year} @ {self.last_number}"
+
+
+class IdempotencyKey(models.Model):
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+class StockMovement(models.Model):
+    """Append-only stock ledger; ``Product.stock_qty`` is its running total."""
+    OPENING = 'opening'
+    SALE = 'sale'
+    IMPORT = 'import'
+    ADJUSTMENT = 'adjustment'
+    RETURN = 'return'
+    KIND_CHOICES = [
+        (OPENING, 'Opening'),
+        (SALE, 'Sale'),
+        (IMPORT, 'Import'),
+        (ADJUSTMENT, 'Adjustment'),
+        (RETURN, 'Return'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    qty = models.DecimalField(max_digits=12, decimal_places=2)
+    day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    reference = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        db_table = 'stock_movements'
+        indexes = [
+            models.Index(fields=['product', 'day'], name='stock_movement_product_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.qty} of product {self.product_id}"
+
+
+class StockSnapshot(models.Model):
+    """Closing stock of a product at the end of ``day``."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    day = models.DateField()
+    qty = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        db_table = 'stock_snapshots'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='stock_snapshot_product_day_uniq'),
+        ]
+
+
+class StockAlert(models.Model):
+    """Materialized list of products that are low on stock or expiring soon."""
+    LOW_STOCK = 'low_stock'
+    EXPIRING = 'expiring'
+    KIND_CHOICES = [
+        (LOW_STOCK, 'Low stock'),
+        (EXPIRING, 'Expiring'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_alerts')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    stock_qty = models.DecimalField(max_digits=10, decimal_places=2)
+    threshold = models.IntegerField(null=True, blank=True)
+    expire_date = models.DateField(null=True, blank=True)
+    batch_no = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'stock_alerts'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'kind'], name='stock_alert_product_kind_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'updated_at'], name='stock_alert_kind_updated_idx'),
+        ]
+
+
+class InvoiceJob(models.Model):
+    """Batch invoice render queued for the process_invoice_jobs workers."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    PDF = 'pdf'
+    ZIP = 'zip'
+    FORMAT_CHOICES = [
+        (PDF, 'Single PDF'),
+        (ZIP, 'Zip of PDFs'),
+    ]
+
+    day = models.DateField(null=True, blank=True)
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, blank=True)
+    bill_ids = models.JSONField(null=True, blank=True)
+    output_format = models.CharField(max_length=3, choices=FORMAT_CHOICES, default=PDF)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True, default='')
+    file = models.FileField(upload_to='invoices/', blank=True)
+    bill_count = models.PositiveIntegerField(default=0)
+    page_count = models.PositiveIntegerField(default=0)
+    render_seconds = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'invoice_jobs'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='invoice_job_status_idx'),
+        ]
@@ -0,0 +1,84 @@
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils import timezone
+
+from .models import BillSeries
+
+GAPLESS = 'gapless'
+BLOCK = 'block'
+
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def financial_year(day):
+    """'2026-27' style label for the financial year containing ``day``."""
+    start_month = _setting('BILLING_FINANCIAL_YEAR_START_MONTH', 4)
+    year = day.year if day.month >= start_month else day.year - 1
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def format_bill_no(series, year, number):
+    return f"{series}/{year}/{number:06d}"
+
+
+def _reserve(conn, series, year, count):
+    """Advance the series by ``count`` on ``conn`` and return the new last number."""
+    table = conn.ops.quote_name(BillSeries._meta.db_table)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (name, financial_year, last_number) VALUES (%s, %s, 0) "
+            f"ON CONFLICT (name, financial_year) DO NOTHING",
+            [series, year],
+        )
+        cursor.execute(
+            f"UPDATE {table} SET last_number = last_number + %s "
+            f"WHERE name = %s AND financial_year = %s RETURNING last_number",
+            [count, series, year],
+        )
+        return cursor.fetchone()[0]
+
+
+def _next_from_block(series, year):
+    key = (series, year)
+    with _blocks_lock:
+        current, end = _blocks.get(key, (1, 0))
+        if current > end:
+            size = _setting('BILLING_BILL_NUMBER_BLOCK_SIZE', 50)
+            # Reserve on a separate autocommit connection so the block is
+            # committed even if the caller's checkout rolls back; otherwise
+            # another worker could be handed the same numbers.
+            conn = connections.create_connection(DEFAULT_DB_ALIAS)
+            try:
+                end = _reserve(conn, series, year, size)
+            finally:
+                conn.close()
+            current = end - size + 1
+        _blocks[key] = (current + 1, end)
+        return current
+
+
+def next_bill_no(series=None, when=None):
+    """Allocate the next bill number for ``series`` in the current financial year.
+
+    ``gapless`` mode (default) increments the series row in the caller's
+    transaction: the row stays locked until the bill commits, and a rolled
+    back checkout hands its number back. ``block`` mode has each worker
+    reserve BILLING_BILL_NUMBER_BLOCK_SIZE numbers at a time and hand them
+    out from memory, trading gaps (after restarts) and per-worker ordering
+    for no cross-worker contention. Block reservations use a second
+    connection, so that mode is meant for PostgreSQL rather than SQLite.
+    """
+    series = series or _setting('BILLING_BILL_SERIES', 'INV')
+    year = financial_year(timezone.localdate(when))
+    if _setting('BILLING_BILL_NUMBER_MODE', GAPLESS) == BLOCK:
+        number = _next_from_block(series, year)
+    else:
+        number = _reserve(connection, series, year, 1)
+    return format_bill_no(series, year, number)
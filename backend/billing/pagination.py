@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BillingCursorPagination(CursorPagination):
+    """Keyset pagination ordered by each viewset's ``ordering`` attribute.
+
+    Legacy clients can pass ``?paginate=false`` to get the old unpaginated
+    list while they migrate.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('paginate', '').lower() in ('false', '0', 'no'):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None)
+        if ordering:
+            self.ordering = ordering
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        # The cursor counts its way through rows that share a value, so those
+        # rows need the same order on every request: break ties on id.
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
@@ -0,0 +1,74 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySales
+
+CENT = Decimal('0.01')
+
+
+def line_totals(qty, price, gst_percent):
+    """Split a line into (taxable value, GST). Bill prices include tax."""
+    gross = (qty * price).quantize(CENT, ROUND_HALF_UP)
+    taxable = (gross * 100 / (100 + gst_percent)).quantize(CENT, ROUND_HALF_UP)
+    return taxable, gross - taxable
+
+
+def _increment(model, key_columns, rows):
+    """INSERT ... ON CONFLICT DO UPDATE adding each value column onto the
+    existing row, in one statement. Works on PostgreSQL and SQLite."""
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = list(rows[0])
+    value_columns = [c for c in columns if c not in key_columns]
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(c) for c in columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(qn(c) for c in key_columns)}) DO UPDATE SET "
+        + ', '.join(f"{qn(c)} = {table}.{qn(c)} + EXCLUDED.{qn(c)}" for c in value_columns)
+    )
+    params = [row[c] for row in rows for c in columns]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_bill(bill, lines, sign=1):
+    """Add a bill to the daily rollups, or take it back out with ``sign=-1``.
+
+    ``lines`` is a list of (product_id, qty, price, gst_percent) tuples. Must
+    run inside the transaction that writes (or deletes) the bill.
+    """
+    day = timezone.localdate(bill.created_at)
+    mode = bill.payment_mode
+    products = {}
+    for product_id, qty, price, gst_percent in lines:
+        taxable, gst = line_totals(qty, price, gst_percent)
+        totals = products.setdefault(product_id, [Decimal(0), Decimal(0), Decimal(0)])
+        totals[0] += qty
+        totals[1] += taxable
+        totals[2] += gst
+
+    # Sorted so concurrent checkouts take the rollup row locks in one order.
+    product_rows = [
+        {
+            'day': day, 'product_id': product_id, 'payment_mode': mode,
+            'bill_count': sign, 'qty': sign * qty, 'taxable_value': sign * taxable, 'gst_amount': sign * gst,
+        }
+        for product_id, (qty, taxable, gst) in sorted(products.items())
+    ]
+    _increment(DailySales, ['day', 'payment_mode'], [{
+        'day': day, 'payment_mode': mode,
+        'bill_count': sign,
+        'total_amount': sign * Decimal(str(bill.total_amount or 0)),
+        'qty': sum((r['qty'] for r in product_rows), Decimal(0)),
+        'taxable_value': sum((r['taxable_value'] for r in product_rows), Decimal(0)),
+        'gst_amount': sum((r['gst_amount'] for r in product_rows), Decimal(0)),
+    }])
+    _increment(DailyProductSales, ['day', 'product_id', 'payment_mode'], product_rows)
+    if sign < 0:
+        # Drop rows left with no bills, as a rebuild would not have them.
+        DailySales.objects.filter(day=day, payment_mode=mode, bill_count=0).delete()
+        DailyProductSales.objects.filter(day=day, payment_mode=mode, product_id__in=products, bill_count=0).delete()
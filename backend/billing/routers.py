@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+ROUTED_APPS = {'billing', 'store'}
+
+# The alias reads go to inside read_from_replica(), chosen once per block.
+_read_alias = ContextVar('billing_read_alias', default=None)
+# alias -> (monotonic time checked, seconds behind)
+_lag_readings = {}
+
+_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def _replica():
+    return getattr(settings, 'BILLING_REPLICA_DATABASE', 'replica')
+
+
+def replication_lag(alias):
+    """Seconds ``alias`` is behind the primary: 0 when it is not a standby or
+    has replayed everything it received, infinity when it cannot be reached.
+    Checked at most every BILLING_REPLICA_LAG_CHECK_SECONDS per worker."""
+    checked, lag = _lag_readings.get(alias, (None, None))
+    now = time.monotonic()
+    if checked is not None and now - checked < getattr(settings, 'BILLING_REPLICA_LAG_CHECK_SECONDS', 5):
+        return lag
+    connection = connections[alias]
+    lag = 0.0
+    if connection.vendor == 'postgresql':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(_LAG_SQL)
+                lag = float(cursor.fetchone()[0])
+        except DatabaseError:
+            lag = float('inf')
+    _lag_readings[alias] = (now, lag)
+    return lag
+
+
+def replica_alias():
+    """The alias lag-tolerant reads should use now: the replica when one is
+    configured and no more than BILLING_REPLICA_MAX_LAG seconds behind,
+    otherwise the primary. Inside a transaction on the primary it is always
+    the primary."""
+    alias = _replica()
+    if alias not in settings.DATABASES or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    max_lag = getattr(settings, 'BILLING_REPLICA_MAX_LAG', 10)
+    if max_lag is not None and replication_lag(alias) > max_lag:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+@contextmanager
+def read_from_replica():
+    """Route billing and store reads in this block to replica_alias()."""
+    token = _read_alias.set(replica_alias())
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Reads of billing and store models inside read_from_replica() go to the
+    replica. Everything else stays on the primary: all writes, all other
+    reads, and reads inside a transaction on the primary, so a request that
+    has just written always sees its own rows."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label not in ROUTED_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary through replication.
+        if db == _replica() and db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+
+class LagTolerantMixin:
+    """Viewset actions listed in ``lag_tolerant_actions`` read from the replica.
+
+    Only for responses built inside the view; streamed responses that query
+    while streaming should pass ``using=replica_alias()`` themselves.
+    """
+    lag_tolerant_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        action = getattr(self, 'action_map', {}).get(request.method.lower())
+        if action not in self.lag_tolerant_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
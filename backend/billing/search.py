@@ -0,0 +1,43 @@
+from django.db.models import Q
+
+from .models import Product
+
+SEARCH_FIELDS = ['product_name', 'product_id', 'model_no', 'hsn_sac_code']
+CODE_FIELDS = ['product_id', 'model_no', 'hsn_sac_code']
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+# Shorter substrings carry no full trigram and would scan every row, so
+# they only match as prefixes.
+MIN_SUBSTRING_LENGTH = 3
+
+
+def _any(lookup, query, fields):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__{lookup}': query})
+    return condition
+
+
+def search_products(query, include_inactive=False, limit=SEARCH_DEFAULT_LIMIT):
+    """Typeahead search: exact code matches first, then prefixes, then substrings.
+
+    Each tier is a separate LIMITed query with no ORDER BY so the database can
+    stop at the first ``limit`` index hits, even when a short query matches
+    most of the catalogue. Rows are sorted by name within a tier.
+    """
+    products = Product.objects.all()
+    if not include_inactive:
+        products = products.filter(active_product=True, non_salable_product=False)
+    tiers = [_any('iexact', query, CODE_FIELDS), _any('istartswith', query, SEARCH_FIELDS)]
+    if len(query) >= MIN_SUBSTRING_LENGTH:
+        tiers.append(_any('icontains', query, SEARCH_FIELDS))
+
+    results = []
+    for condition in tiers:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        rows = list(products.filter(condition).exclude(id__in=[p.id for p in results])[:remaining])
+        rows.sort(key=lambda p: (p.product_name or '', p.id))
+        results.extend(rows)
+    return results
@@ -0,0 +1,171 @@
+import random
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .alerts import refresh_alerts
+from .models import (
+    STATUS_CHOICES, ArchivedBill, ArchivedBillItem, Bill, BillItem, Customer, Product, ServiceEntry, StockMovement,
+    SyncClock,
+)
+
+BATCH_SIZE = 5000
+# Seeded rows are recognisable by these prefixes, so --reset only removes them.
+PRODUCT_PREFIX = 'SEED-'
+# Products created by the bulk_import benchmark.
+BENCH_PREFIX = 'BENCH-'
+BILL_PREFIX = 'SEED/'
+PHONE_PREFIX = '00'
+SCALES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+GST_RATES = [Decimal(0), Decimal(5), Decimal(12), Decimal(18), Decimal(28)]
+PAYMENT_MODES = ['CASH', 'CASH', 'UPI', 'UPI', 'CARD']
+SERVICE_STATUSES = [value for value, _ in STATUS_CHOICES]
+WORDS = [
+    'Solar', 'Panel', 'Inverter', 'Battery', 'Cable', 'Fuse', 'Switch', 'Meter', 'Charger', 'Lamp',
+    'Street', 'Light', 'Mono', 'Poly', 'Lithium', 'Tubular', 'Hybrid', 'Grid', 'Controller', 'Stand',
+]
+NAMES = [
+    'Arun', 'Bala', 'Chitra', 'Devi', 'Ezhil', 'Gowri', 'Hari', 'Indira', 'Jaya', 'Karthik',
+    'Lakshmi', 'Mani', 'Nila', 'Prakash', 'Ravi', 'Selvi', 'Tamil', 'Uma', 'Vijay', 'Yamuna',
+]
+
+
+def phone(i):
+    return f'{PHONE_PREFIX}{i:09d}'
+
+
+def _chunks(total):
+    for start in range(0, total, BATCH_SIZE):
+        yield start, min(start + BATCH_SIZE, total)
+
+
+def reset():
+    """Delete previously seeded rows, and everything hanging off them,
+    including the bills and quotations benchmarks made for seeded customers."""
+    with transaction.atomic():
+        Bill.objects.filter(bill_no__startswith=BILL_PREFIX).delete()
+        ArchivedBillItem.objects.filter(bill__bill_no__startswith=BILL_PREFIX).delete()
+        ArchivedBill.objects.filter(bill_no__startswith=BILL_PREFIX).delete()
+        Customer.objects.filter(phone__startswith=PHONE_PREFIX).delete()
+        Product.objects.filter(product_id__startswith=PRODUCT_PREFIX).delete()
+        Product.objects.filter(product_id__startswith=BENCH_PREFIX).delete()
+
+
+def seed_products(rng, count, version, stock):
+    """Returns {pk: (tax-inclusive price, gst_percent)} of the new products."""
+    today = timezone.localdate()
+    prices = {}
+    for start, stop in _chunks(count):
+        products = []
+        for i in range(start, stop):
+            price = Decimal(rng.randrange(100, 500_000)) / 100
+            gst = rng.choice(GST_RATES)
+            products.append(Product(
+                product_id=f'{PRODUCT_PREFIX}{i:07d}',
+                product_name=' '.join(rng.sample(WORDS, 3)) + f' {i}',
+                selling_price=price,
+                selling_price_include_tax=(price * (100 + gst) / 100).quantize(Decimal('0.01')),
+                gst_percent=gst,
+                hsn_sac_code=str(rng.randrange(8500, 8600)),
+                product_group=rng.choice(WORDS),
+                low_stock_alert=10,
+                # About one product in a hundred is close to expiry.
+                expire_date=today + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.01 else None,
+                stock_qty=stock,
+                sync_version=version,
+            ))
+        Product.objects.bulk_create(products)
+        prices.update((p.pk, (p.selling_price_include_tax, p.gst_percent)) for p in products)
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=p.pk, kind=StockMovement.OPENING, qty=stock, day=today, reference='seed')
+            for p in products
+        ])
+    return prices
+
+
+def seed_customers(rng, count, version):
+    ids = []
+    for start, stop in _chunks(count):
+        ids += [c.pk for c in Customer.objects.bulk_create([
+            Customer(
+                name=f'{rng.choice(NAMES)} {rng.choice(NAMES)}',
+                phone=phone(i),
+                address=f'{rng.randrange(1, 300)}, {rng.choice(WORDS)} Street',
+                sync_version=version,
+            )
+            for i in range(start, stop)
+        ])]
+    return ids
+
+
+def seed_bills(rng, count, prices, customer_ids, days):
+    """Bills of 1-5 lines spread evenly over the last ``days`` days, oldest
+    first, so ids follow dates as they do in production.
+
+    Bill rows are historical; they do not move stock, so the seeded opening
+    balances still agree with the ledger.
+    """
+    today = timezone.localdate()
+    product_ids = list(prices)
+    for start, stop in _chunks(count):
+        bills, lines = [], []
+        for i in range(start, stop):
+            items = [
+                BillItem(product_id=pk, qty=rng.randrange(1, 5), price=prices[pk][0], gst_percent=prices[pk][1])
+                for pk in rng.sample(product_ids, min(rng.randrange(1, 6), len(product_ids)))
+            ]
+            bills.append(Bill(
+                bill_no=f'{BILL_PREFIX}{i:07d}',
+                customer_id=rng.choice(customer_ids) if customer_ids and rng.random() < 0.6 else None,
+                total_amount=sum(item.qty * item.price for item in items),
+                payment_mode=rng.choice(PAYMENT_MODES),
+            ))
+            lines.append(items)
+        Bill.objects.bulk_create(bills)
+        by_day = defaultdict(list)
+        for i, bill, items in zip(range(start, stop), bills, lines):
+            for item in items:
+                item.bill_id = bill.pk
+            by_day[days - 1 - i * days // count].append(bill.pk)
+        BillItem.objects.bulk_create([item for items in lines for item in items])
+        # auto_now_add stamps every row with now; backdate them day by day.
+        for offset, pks in by_day.items():
+            created = timezone.make_aware(datetime.combine(today - timedelta(days=offset), time(12)))
+            Bill.objects.filter(pk__in=pks).update(created_at=created)
+
+
+def seed_services(rng, count, customer_ids, version):
+    today = timezone.localdate()
+    for start, stop in _chunks(count if customer_ids else 0):
+        ServiceEntry.objects.bulk_create([
+            ServiceEntry(
+                customer_id=rng.choice(customer_ids),
+                call_for=today + timedelta(days=rng.randrange(-180, 60)),
+                status=rng.choice(SERVICE_STATUSES),
+                amount=Decimal(rng.randrange(0, 500_000)) / 100,
+                notes=f'{rng.choice(WORDS)} service',
+                sync_version=version,
+            )
+            for _ in range(start, stop)
+        ])
+
+
+def seed(products, customers, bills, services, seed=42, days=365, stock=1_000_000):
+    """Bulk-insert a deterministic data set: the same arguments always give
+    the same names, prices, phones and bill lines. Returns row counts."""
+    rng = random.Random(seed)
+    with transaction.atomic():
+        version = SyncClock.tick()
+        prices = seed_products(rng, products, version, stock)
+        customer_ids = seed_customers(rng, customers, version)
+        seed_bills(rng, bills, prices, customer_ids, days)
+        seed_services(rng, services, customer_ids, version)
+        refresh_alerts()
+    return {'products': products, 'customers': customers, 'bills': bills, 'services': services}
@@ -1,42 +1,34 @@
 from rest_framework import serializers
-from .models import Product, Customer, Quotation, QuotationItem, ServiceEntry, Bill, BillItem  
+from .metrics import TimedSerializerMixin
+from .models import (
+    Product, Customer, Quotation, QuotationItem, ServiceEntry, Bill, BillItem, InvoiceJob, StockAlert,
+    ArchivedBill, ArchivedBillItem,
+)
 
-class ProductSerializer(serializers.ModelSerializer):
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ModelSerializer whose output time shows up as 'serialize' in Server-Timing."""
+
+class ProductSerializer(TimedModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'
+        read_only_fields = ['sync_version']
 
-    # Idhu Meta-kku veliya, Class-kku ulla irukanum
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        decimal_fields = [
-            'selling_price',
-            'selling_price_include_tax',
-            'purchase_price',
-            'purchase_price_include_tax',
-            'gst_percent',
-            'mrp',
-            'discount',
-        ]
-        for field in decimal_fields:
-            value = data.get(field)
-            if value is not None:
-                data[field] = str(value)
-        return data
-
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(TimedModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
+        read_only_fields = ['sync_version']
 
-class QuotationItemSerializer(serializers.ModelSerializer):
+class QuotationItemSerializer(TimedModelSerializer):
     class Meta:
         model = QuotationItem
         fields = '__all__'
 
-class QuotationSerializer(serializers.ModelSerializer):
+class QuotationSerializer(TimedModelSerializer):
     items = QuotationItemSerializer(many=True, read_only=True)
     customer_details = CustomerSerializer(source='customer', read_only=True)
+    bill = serializers.SerializerMethodField()
 
     class Meta:
         model = Quotation
@@ -47,9 +39,14 @@ class QuotationSerializer(serializers.ModelSerializer):
             'date',
             'total_amount',
             'items',
+            'bill',
         ]
 
-class ServiceEntrySerializer(serializers.ModelSerializer):
+    def get_bill(self, obj):
+        bill = getattr(obj, 'bill', None)
+        return bill.id if bill else None
+
+class ServiceEntrySerializer(TimedModelSerializer):
     customer_details = CustomerSerializer(source='customer', read_only=True)
 
     class Meta:
@@ -74,7 +71,7 @@ class ServiceEntrySerializer(serializers.ModelSerializer):
             data['amount'] = str(data['amount'])
         return data
 
-class BillItemSerializer(serializers.ModelSerializer):
+class BillItemSerializer(TimedModelSerializer):
     product_name = serializers.ReadOnlyField(source='product.product_name')
     hsn_code = serializers.ReadOnlyField(source='product.product_id')
 
@@ -82,7 +79,7 @@ class BillItemSerializer(serializers.ModelSerializer):
         model = BillItem
         fields = ['product_name', 'hsn_code', 'qty', 'price', 'gst_percent']
         
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(TimedModelSerializer):
     customer_name = serializers.ReadOnlyField(source='customer.name') 
     address = serializers.ReadOnlyField(source='customer.address')
     phone = serializers.ReadOnlyField(source='customer.phone')
@@ -90,4 +87,62 @@ class BillSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Bill  
-        fields = ['id', 'bill_no', 'customer', 'customer_name', 'address', 'phone', 'total_amount', 'payment_mode', 'created_at', 'items']
\ No newline at end of file
+        fields = ['id', 'bill_no', 'customer', 'customer_name', 'address', 'phone', 'total_amount', 'payment_mode', 'created_at', 'quotation', 'items']
+        # Set only by converting a quotation, which checks it is not billed twice.
+        read_only_fields = ['quotation']
+
+    def validate_bill_no(self, value):
+        if ArchivedBill.objects.filter(bill_no=value).exists():
+            raise serializers.ValidationError("This bill number is already used by an archived bill.")
+        return value
+
+class ArchivedBillItemSerializer(TimedModelSerializer):
+    class Meta:
+        model = ArchivedBillItem
+        fields = ['product_name', 'hsn_code', 'qty', 'price', 'gst_percent']
+
+class ArchivedBillSerializer(TimedModelSerializer):
+    """Same shape as BillSerializer, from the copied-in customer details."""
+    customer = serializers.ReadOnlyField(source='customer_id')
+    quotation = serializers.ReadOnlyField(source='quotation_id')
+    items = ArchivedBillItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedBill
+        fields = ['id', 'bill_no', 'customer', 'customer_name', 'address', 'phone', 'total_amount', 'payment_mode', 'created_at', 'quotation', 'items']
+
+class StockAlertSerializer(TimedModelSerializer):
+    product_name = serializers.CharField(source='product.product_name', read_only=True)
+    product_code = serializers.CharField(source='product.product_id', read_only=True)
+
+    class Meta:
+        model = StockAlert
+        fields = ['id', 'kind', 'product', 'product_name', 'product_code', 'stock_qty', 'threshold', 'expire_date', 'batch_no', 'updated_at']
+
+class InvoiceJobSerializer(TimedModelSerializer):
+    pages_per_second = serializers.SerializerMethodField()
+
+    class Meta:
+        model = InvoiceJob
+        fields = [
+            'id', 'day', 'customer', 'bill_ids', 'output_format', 'status', 'error', 'bill_count',
+            'page_count', 'render_seconds', 'pages_per_second', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'status', 'error', 'bill_count', 'page_count', 'render_seconds', 'created_at', 'started_at', 'finished_at',
+        ]
+
+    def get_pages_per_second(self, obj):
+        if obj.render_seconds:
+            return round(obj.page_count / obj.render_seconds, 1)
+        return None
+
+    def validate_bill_ids(self, value):
+        if value is not None and (not isinstance(value, list) or not all(isinstance(i, int) for i in value)):
+            raise serializers.ValidationError("bill_ids must be a list of bill ids")
+        return value
+
+    def validate(self, attrs):
+        if not (attrs.get('day') or attrs.get('customer') or attrs.get('bill_ids')):
+            raise serializers.ValidationError("Choose bills by day, customer or bill_ids")
+        return attrs
@@ -0,0 +1,21 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .metrics import install_query_recorder
+from .models import Customer, Product, ServiceEntry, SyncClock, SyncTombstone
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=ServiceEntry)
+def record_tombstone(sender, instance, **kwargs):
+    # post_delete also fires for cascaded deletes, e.g. a customer's services.
+    SyncTombstone.objects.create(
+        model=sender._meta.model_name, object_id=instance.pk, sync_version=SyncClock.tick(),
+    )
+
+
+@receiver(connection_created)
+def record_query_metrics(sender, connection, **kwargs):
+    install_query_recorder(connection)
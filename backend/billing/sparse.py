@@ -0,0 +1,77 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers, status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+FIELDS_PARAM = 'fields'
+
+
+def parse_fields(request, available):
+    """The ``?fields=a,b`` names, or None for all. Raises ValueError on unknown names."""
+    raw = request.query_params.get(FIELDS_PARAM, '')
+    wanted = [name.strip() for name in raw.split(',') if name.strip()]
+    if not wanted:
+        return None
+    unknown = [name for name in wanted if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return set(wanted)
+
+
+def _as_api_rows(rows, decimals):
+    rows = list(rows)
+    for row in rows:
+        for name in decimals:
+            value = row[name]
+            if value is not None:
+                row[name] = f'{value:f}'
+    return rows
+
+
+class SparseFieldsMixin:
+    """Lists built straight from ``queryset.values()``, with ``?fields=`` to
+    select only some columns, e.g. ``?fields=product_name,selling_price``.
+
+    No model instances and no serializer calls per row: the serializer is only
+    asked which fields exist and which are decimals, so it must be a plain
+    ModelSerializer over the model's own columns (``fields = '__all__'``).
+    The columns the list is ordered by (``id`` by default) always come back,
+    since the cursor for the next page is built from them.
+    """
+
+    def _list_fields(self):
+        model = self.get_queryset().model
+        columns = {f.attname for f in model._meta.concrete_fields if not f.is_relation}
+        fields = {name: field for name, field in self.get_serializer().fields.items() if not field.write_only}
+        for name, field in fields.items():
+            if field.source != name or name not in columns:
+                raise ImproperlyConfigured(f"{type(self).__name__}: '{name}' is not a plain {model.__name__} column")
+        return fields
+
+    def _ordering_columns(self, request, queryset):
+        if self.paginator is None or not hasattr(self.paginator, 'get_ordering'):
+            return set()
+        return {field.lstrip('-') for field in self.paginator.get_ordering(request, queryset, self)}
+
+    def list(self, request, *args, **kwargs):
+        fields = self._list_fields()
+        try:
+            wanted = parse_fields(request, fields)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.filter_queryset(self.get_queryset())
+        if wanted is not None:
+            wanted |= self._ordering_columns(request, queryset)
+        names = [name for name in fields if wanted is None or name in wanted]
+        # DecimalField renders quantized strings; the column values already
+        # carry the field's decimal places.
+        decimals = [
+            name for name in names
+            if isinstance(fields[name], serializers.DecimalField)
+            and getattr(fields[name], 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        ]
+        rows = queryset.values(*names)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(_as_api_rows(page, decimals))
+        return Response(_as_api_rows(rows, decimals))
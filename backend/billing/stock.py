@@ -0,0 +1,123 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .alerts import update_alerts
+from .cache import invalidate_products
+from .models import Product, StockAlert, StockMovement, StockSnapshot, SyncClock
+
+BATCH_SIZE = 1000
+
+
+def record_movements(deltas, kind, reference=''):
+    """Append a ledger row for each product whose stock changed.
+
+    ``deltas`` maps product pk -> signed quantity; zero deltas are skipped.
+    Callers change ``stock_qty`` themselves in the same transaction.
+    """
+    today = timezone.localdate()
+    StockMovement.objects.bulk_create([
+        StockMovement(product_id=pk, kind=kind, qty=qty, day=today, reference=reference)
+        for pk, qty in sorted(deltas.items()) if qty
+    ])
+
+
+def adjust_stock(product_id, qty, kind=StockMovement.ADJUSTMENT, reference=''):
+    """Add ``qty`` (negative to remove) to a product's stock and log it."""
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        if product.stock_qty + qty < 0:
+            raise ValueError(f"Stock of {product.product_name} cannot go below zero")
+        product.stock_qty += qty
+        product.save(update_fields=['stock_qty'])
+        record_movements({product.pk: qty}, kind, reference)
+        update_alerts([product], kinds=[StockAlert.LOW_STOCK])
+        invalidate_products([product.pk])
+    return product
+
+
+def _with_closing_stock(products, day):
+    """Annotate ``base_qty`` (latest snapshot on or before ``day``) and
+    ``moved`` (sum of the movements after that snapshot, up to ``day``).
+
+    Snapshots are only written for products that moved, so ``moved`` never
+    covers more than the movements since a product's last snapshot.
+    """
+    snapshots = StockSnapshot.objects.filter(product=OuterRef('pk'), day__lte=day).order_by('-day')
+    moved = (
+        StockMovement.objects.filter(
+            product=OuterRef('pk'),
+            day__gt=Coalesce(OuterRef('base_day'), Value(date.min)),
+            day__lte=day,
+        )
+        .order_by().values('product').annotate(total=Sum('qty')).values('total')
+    )
+    return products.annotate(
+        base_day=Subquery(snapshots.values('day')[:1]),
+        base_qty=Subquery(snapshots.values('qty')[:1]),
+    ).annotate(moved=Subquery(moved, output_field=DecimalField(max_digits=12, decimal_places=2)))
+
+
+def _total(base_qty, moved):
+    return (base_qty or Decimal(0)) + (moved or Decimal(0))
+
+
+def stock_as_of(day, product_ids=None):
+    """Return {product pk: closing stock at the end of ``day``} from the ledger."""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    rows = _with_closing_stock(products, day).values_list('pk', 'base_qty', 'moved')
+    return {pk: _total(base_qty, moved) for pk, base_qty, moved in rows}
+
+
+def take_snapshots(day):
+    """Write closing-stock snapshots for ``day`` for every product that moved
+    since its previous snapshot. Returns the number written."""
+    rows = (
+        _with_closing_stock(Product.objects.all(), day)
+        .filter(moved__isnull=False)
+        .values_list('pk', 'base_qty', 'moved')
+    )
+    snapshots = [
+        StockSnapshot(product_id=pk, day=day, qty=_total(base_qty, moved))
+        for pk, base_qty, moved in rows.iterator(chunk_size=BATCH_SIZE)
+    ]
+    StockSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['product', 'day'],
+        update_fields=['qty'],
+    )
+    return len(snapshots)
+
+
+def rebuild_stock_qty(dry_run=False):
+    """Recompute ``Product.stock_qty`` from snapshots and the ledger.
+
+    Returns {product pk: (cached stock_qty, ledger stock)} for every product
+    that had drifted; those rows are corrected unless ``dry_run``.
+    """
+    with transaction.atomic():
+        if not dry_run:
+            # Hold every product row so no checkout moves stock mid-rebuild.
+            list(Product.objects.select_for_update().order_by('id').values_list('id', flat=True))
+        rows = _with_closing_stock(Product.objects.all(), date.max).values_list(
+            'pk', 'stock_qty', 'base_qty', 'moved'
+        )
+        drift = {}
+        for pk, stock_qty, base_qty, moved in rows.iterator(chunk_size=BATCH_SIZE):
+            expected = _total(base_qty, moved)
+            if stock_qty != expected:
+                drift[pk] = (stock_qty, expected)
+        if drift and not dry_run:
+            products = [Product(pk=pk, stock_qty=expected) for pk, (_, expected) in drift.items()]
+            Product.objects.bulk_update(products, ['stock_qty'], batch_size=BATCH_SIZE)
+            Product.objects.filter(pk__in=drift).update(sync_version=SyncClock.tick())
+            invalidate_products(drift)
+    return drift
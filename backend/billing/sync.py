@@ -0,0 +1,79 @@
+from django.db.models import Q
+
+from .models import Customer, Product, ServiceEntry, SyncClock, SyncTombstone
+from .serializers import CustomerSerializer, ProductSerializer, ServiceEntrySerializer
+
+SYNC_DEFAULT_LIMIT = 500
+SYNC_MAX_LIMIT = 2000
+
+# (response key, queryset, serializer). The list position breaks ties between
+# rows of different sources that share a version; tombstones come last.
+SOURCES = [
+    ('products', Product.objects.all(), ProductSerializer),
+    ('customers', Customer.objects.all(), CustomerSerializer),
+    ('services', ServiceEntry.objects.select_related('customer'), ServiceEntrySerializer),
+]
+TOMBSTONE_RANK = len(SOURCES)
+TOMBSTONE_KEYS = {queryset.model._meta.model_name: key for key, queryset, _ in SOURCES}
+
+
+def parse_cursor(value):
+    """Cursor is 'version.rank.id' of the last change the client received.
+
+    No cursor means a full sync, including rows still at version 0.
+    """
+    if not value:
+        return (0, -1, 0)
+    parts = value.split('.')
+    if len(parts) == 1:
+        return (int(parts[0]), TOMBSTONE_RANK, 0)
+    version, rank, pk = (int(p) for p in parts)
+    return (version, rank, pk)
+
+
+def _after(cursor, rank):
+    """Rows of source ``rank`` that sort after ``cursor`` by (version, rank, id)."""
+    version, cursor_rank, pk = cursor
+    if rank > cursor_rank:
+        return Q(sync_version__gte=version)
+    if rank < cursor_rank:
+        return Q(sync_version__gt=version)
+    return Q(sync_version__gt=version) | Q(sync_version=version, id__gt=pk)
+
+
+def changes_since(cursor, limit=SYNC_DEFAULT_LIMIT):
+    """Return up to ``limit`` changes after ``cursor`` across all synced models.
+
+    Each source reads at most ``limit + 1`` rows off its (sync_version, id)
+    index; the results are merged in version order and cut at ``limit``.
+    Changes at or above SyncClock.horizon() wait for the next sync, so a
+    transaction that commits late cannot end up behind the cursor.
+    """
+    horizon = SyncClock.horizon()
+    candidates = []
+    for rank, (key, queryset, serializer) in enumerate(SOURCES):
+        rows = queryset.filter(_after(cursor, rank), sync_version__lt=horizon).order_by('sync_version', 'id')[:limit + 1]
+        candidates.extend(((row.sync_version, rank, row.id), key, row) for row in rows)
+    tombstones = SyncTombstone.objects.filter(
+        _after(cursor, TOMBSTONE_RANK), sync_version__lt=horizon,
+    ).order_by('sync_version', 'id')[:limit + 1]
+    candidates.extend(((t.sync_version, TOMBSTONE_RANK, t.id), None, t) for t in tombstones)
+    candidates.sort(key=lambda c: c[0])
+    page = candidates[:limit]
+
+    changed = {key: [] for key, _, _ in SOURCES}
+    deleted = {key: [] for key, _, _ in SOURCES}
+    for _, key, row in page:
+        if key is None:
+            deleted[TOMBSTONE_KEYS[row.model]].append(row.object_id)
+        else:
+            changed[key].append(row)
+    data = {
+        key: serializer(changed[key], many=True).data
+        for key, _, serializer in SOURCES
+    }
+    data['deleted'] = deleted
+    last = page[-1][0] if page else cursor
+    data['cursor'] = '.'.join(str(p) for p in last)
+    data['has_more'] = len(candidates) > limit
+    return data
@@ -1,3 +1,1493 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import tempfile
+import threading
+import time
+import warnings
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import StreamingHttpResponse
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import (
+    ArchivedBill, ArchivedBillItem, Bill, BillItem, BillSeries, Customer, DailyProductSales, DailySales, IdempotencyKey, InvoiceJob, Product,
+    STATUS_CHOICES, Quotation, QuotationItem, ServiceEntry, StockAlert, StockMovement, StockSnapshot,
+)
+from .alerts import refresh_alerts
+from .archive import archive_cutoff
+from .benchmarks import load
+from .exports import ASYNC_BATCH_SIZE, EXPORTS, csv_response
+from .customer_lookup import phone_index
+from .importers import import_products, import_services
+from .invoices import company, render_pdf, run_next_job
+from .metrics import registry
+from .numbering import _blocks, financial_year
+from .pagination import BillingCursorPagination
+from .renderers import FastJSONRenderer
+from .routers import _lag_readings
+from .serializers import CustomerSerializer, ProductSerializer
+from .stock import adjust_stock, rebuild_stock_qty, stock_as_of, take_snapshots
+from .views import BillViewSet, QuotationViewSet, ServiceEntryViewSet
+
+
+def make_products(count, stock=10, prefix="P"):
+    return Product.objects.bulk_create([
+        Product(product_id=f"{prefix}{i}", product_name=f"Product {i}", selling_price=10, stock_qty=stock)
+        for i in range(count)
+    ])
+
+
+def bill_payload(bill_no, products, qty=1):
+    return {
+        "bill_no": bill_no,
+        "total_amount": "100.00",
+        "payment_mode": "CASH",
+        "items": [
+            {"product_id": p.id, "qty": qty, "price": "10.00", "gst_percent": "18"}
+            for p in products
+        ],
+    }
+
+
+class BillCheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Walk-in", phone="9000000000")
+
+    def test_checkout_decrements_stock_and_creates_items(self):
+        products = make_products(3, stock=5)
+        payload = bill_payload("B-1", products, qty=2)
+        payload["items"].append({"product_id": products[0].id, "qty": 1, "price": "10.00", "gst_percent": None})
+        res = self.client.post("/api/bills/", payload, format="json")
+        self.assertEqual(res.status_code, 201)
+        bill = Bill.objects.get(id=res.data["id"])
+        self.assertEqual(bill.items.count(), 4)
+        stock = dict(Product.objects.values_list("id", "stock_qty"))
+        self.assertEqual(stock[products[0].id], Decimal("2"))
+        self.assertEqual(stock[products[1].id], Decimal("3"))
+
+    def test_insufficient_stock_rolls_back(self):
+        products = make_products(2, stock=1)
+        res = self.client.post("/api/bills/", bill_payload("B-1", products, qty=2), format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("Insufficient stock", res.data["error"])
+        self.assertFalse(Bill.objects.exists())
+        self.assertEqual(set(Product.objects.values_list("stock_qty", flat=True)), {Decimal("1")})
+
+    def test_query_count_does_not_grow_with_lines(self):
+        counts = []
+        for bill_no, lines in (("B-small", 2), ("B-large", 60)):
+            products = make_products(lines, prefix=bill_no)
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post("/api/bills/", bill_payload(bill_no, products), format="json")
+            self.assertEqual(res.status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        Product.objects.bulk_create([
+            Product(product_id="CAB-10", product_name="Copper cable 10m"),
+            Product(product_id="X-1", product_name="Flat cable", model_no="CAB"),
+            Product(product_id="X-2", product_name="Extension with cable"),
+            Product(product_id="X-3", product_name="Cable tie", active_product=False),
+            Product(product_id="X-4", product_name="Cable sample", non_salable_product=True),
+        ])
+
+    def search(self, **params):
+        res = self.client.get("/api/products/search/", params)
+        self.assertEqual(res.status_code, 200)
+        return [p["product_id"] for p in res.json()]
+
+    def test_exact_then_prefix_then_substring(self):
+        self.assertEqual(self.search(q="cab"), ["X-1", "CAB-10", "X-2"])
+
+    def test_inactive_and_non_salable_excluded_by_default(self):
+        self.assertEqual(self.search(q="cable", include_inactive="true"), ["X-4", "X-3", "CAB-10", "X-2", "X-1"])
+
+    def test_short_queries_match_prefixes_only(self):
+        self.assertEqual(self.search(q="ca"), ["CAB-10", "X-1"])
+        self.assertEqual(self.search(q=""), [])
+
+
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = make_products(1, stock=5)[0]
+
+    def test_unchanged_catalogue_returns_304_without_queries(self):
+        res = self.client.get("/api/products/")
+        etag = res["ETag"]
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_checkout_invalidates_list_and_detail(self):
+        detail = f"/api/products/{self.product.id}/"
+        list_etag = self.client.get("/api/products/")["ETag"]
+        detail_etag = self.client.get(detail)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/bills/", bill_payload("B-1", [self.product], qty=2), format="json")
+        res = self.client.get(detail, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["stock_qty"], "3.00")
+        self.assertNotEqual(self.client.get("/api/products/")["ETag"], list_etag)
+
+    def test_edit_and_bulk_import_invalidate(self):
+        detail = f"/api/products/{self.product.id}/"
+        self.client.get(detail)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(detail, {"product_name": "Renamed"}, format="json")
+        self.assertEqual(self.client.get(detail).data["product_name"], "Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/products/bulk_import/", [{"Product ID": "P0", "Product Name": "Imported"}], format="json")
+        self.assertEqual(self.client.get(detail).data["product_name"], "Imported")
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def make_customers(self, count, names=None, start=0):
+        return Customer.objects.bulk_create([
+            Customer(name=names[i % len(names)] if names else f"Customer {i}", phone=f"90000{i:05d}")
+            for i in range(start, start + count)
+        ])
+
+    def get(self, url, params=None):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200)
+        return res.json()
+
+    def walk(self, url, params):
+        """The ids on every page, following next links to the end."""
+        pages = []
+        page = self.get(url, params)
+        while True:
+            pages.append([row["id"] for row in page["results"]])
+            if not page["next"]:
+                return pages
+            page = self.get(page["next"])
+
+    def test_page_size_and_links(self):
+        page_size = BillingCursorPagination.page_size
+        customers = self.make_customers(page_size + 10)
+        first = self.get("/api/customers/")
+        self.assertEqual(len(first["results"]), page_size)
+        self.assertIsNone(first["previous"])
+        self.assertEqual(first["results"][0]["id"], customers[-1].pk)
+
+        second = self.get(first["next"])
+        self.assertEqual(len(second["results"]), 10)
+        self.assertIsNone(second["next"])
+        self.assertEqual(self.get(second["previous"])["results"], first["results"])
+
+        self.assertEqual(len(self.get("/api/customers/", {"page_size": 7})["results"]), 7)
+        self.assertEqual(len(self.get("/api/customers/", {"paginate": "false"})), page_size + 10)
+
+    def test_page_size_is_capped(self):
+        self.make_customers(BillingCursorPagination.max_page_size + 1)
+        page = self.get("/api/customers/", {"page_size": 10_000, "fields": "id"})
+        self.assertEqual(len(page["results"]), BillingCursorPagination.max_page_size)
+
+    def test_inserts_between_pages_do_not_shift_them(self):
+        customers = self.make_customers(12)
+        first = self.get("/api/customers/", {"page_size": 5})
+        self.make_customers(3, names=["Late"], start=12)
+        rest = self.walk(first["next"], {})
+        seen = [row["id"] for row in first["results"]] + [pk for page in rest for pk in page]
+        self.assertEqual(seen, sorted((c.pk for c in customers), reverse=True))
+
+    def test_non_unique_ordering_visits_every_row_once(self):
+        self.make_customers(12, names=["Anbu", "Bala", "Chitra"])
+        pages = self.walk("/api/customers/", {"ordering": "name", "page_size": 5})
+        seen = [pk for page in pages for pk in page]
+        self.assertEqual(len(seen), 12)
+        self.assertEqual(set(seen), set(Customer.objects.values_list("id", flat=True)))
+
+    def test_bills_page_newest_first(self):
+        products = make_products(1, stock=100)
+        for n in range(3):
+            self.client.post("/api/bills/", bill_payload(f"PG-{n}", products), format="json")
+        pages = self.walk("/api/bills/", {"page_size": 2})
+        self.assertEqual([len(page) for page in pages], [2, 1])
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+
+class SparseFieldsTests(TestCase):
+    POS_FIELDS = "product_id,product_name,selling_price_include_tax,gst_percent,stock_qty"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        make_products(3)
+        Product.objects.create(
+            product_id="FULL", product_name="Panel \u2028 Mono", selling_price="1234.50", gst_percent=18,
+            mrp="1500", discount=None, expire_date=date(2027, 1, 31), low_stock_alert=5, stock_qty="2.5",
+        )
+        Customer.objects.create(name="Ravi", phone="9000000001", address="Main Road")
+        Customer.objects.create(name="Arun", phone="9000000002")
+
+    def test_list_matches_serializer_output(self):
+        for endpoint, serializer, model in (("products", ProductSerializer, Product), ("customers", CustomerSerializer, Customer)):
+            res = self.client.get(f"/api/{endpoint}/", {"paginate": "false"})
+            expected = JSONRenderer().render(serializer(model.objects.order_by("-id"), many=True).data)
+            self.assertEqual(res.json(), json.loads(expected))
+
+    def test_fields_selects_only_those_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get("/api/products/", {"fields": self.POS_FIELDS})
+        self.assertEqual(res.status_code, 200)
+        row = res.json()["results"][0]
+        self.assertEqual(set(row), {"id", *self.POS_FIELDS.split(",")})
+        self.assertEqual(row["selling_price_include_tax"], None)
+        self.assertEqual(row["stock_qty"], "2.50")
+        select = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("product_note", select)
+        self.assertNotIn("mrp", select)
+
+    def test_cursor_pages_through_sparse_rows(self):
+        seen, url = [], "/api/customers/?fields=phone&ordering=name&page_size=1"
+        while url:
+            page = self.client.get(url).json()
+            seen += [(row["name"], row["phone"]) for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [("Arun", "9000000002"), ("Ravi", "9000000001")])
+
+    def test_unknown_field(self):
+        res = self.client.get("/api/products/", {"fields": "product_name,secret"})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json(), {"error": "Unknown field(s): secret"})
+
+    def test_fast_renderer_matches_json_renderer(self):
+        data = {
+            "total": Decimal("10.50"),
+            "at": datetime.fromisoformat("2026-01-02T03:04:05.000600+00:00"),
+            "day": date(2026, 1, 2),
+            "took": timedelta(seconds=90),
+            "stock": {1: Decimal("2.00")},
+            "label": gettext_lazy("Product"),
+            "note": "a\u2028b",
+        }
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn("\u2028".encode(), FastJSONRenderer().render(data))
+
+
+class SalesRollupTests(TestCase):
+    ROLLUP_FIELDS = ["day", "payment_mode", "bill_count", "qty", "taxable_value", "gst_amount"]
+
+    def rollups(self):
+        return (
+            sorted(DailySales.objects.values_list(*self.ROLLUP_FIELDS, "total_amount")),
+            sorted(DailyProductSales.objects.values_list("product_id", *self.ROLLUP_FIELDS)),
+        )
+
+    def test_incremental_rollup_matches_rebuild(self):
+        client = APIClient()
+        products = make_products(3, stock=100)
+        for n in range(4):
+            payload = bill_payload(f"B{n}", products[: n % 3 + 1], qty=n + 1)
+            payload["payment_mode"] = "UPI" if n % 2 else "CASH"
+            payload["items"][0]["price"] = "59.99"
+            res = client.post("/api/bills/", payload, format="json")
+            self.assertEqual(res.status_code, 201)
+        client.delete(f"/api/bills/{res.data['id']}/")
+
+        incremental = self.rollups()
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(incremental, self.rollups())
+
+        res = client.get("/api/reports/monthly/")
+        self.assertEqual(res.data["totals"]["bill_count"], 3)
+        self.assertEqual(res.data["totals"]["total_amount"], "300.00")
+
+    def test_edited_bill_moves_in_rollup(self):
+        client = APIClient()
+        products = make_products(2, stock=100)
+        client.post("/api/bills/", bill_payload("E0", products), format="json")
+        bill_id = client.post("/api/bills/", bill_payload("E1", products[:1]), format="json").data["id"]
+        res = client.patch(f"/api/bills/{bill_id}/", {"total_amount": "250.00", "payment_mode": "UPI"}, format="json")
+        self.assertEqual(res.status_code, 200)
+
+        incremental = self.rollups()
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(incremental, self.rollups())
+        self.assertEqual(
+            sorted(DailySales.objects.values_list("payment_mode", "bill_count", "total_amount")),
+            [("CASH", 1, Decimal("100.00")), ("UPI", 1, Decimal("250.00"))],
+        )
+        res = client.get("/api/reports/monthly/")
+        self.assertEqual(res.data["totals"]["total_amount"], "350.00")
+
+
+class FilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Ravi", phone="9000000001")
+        Bill.objects.create(bill_no="B-1", customer=self.customer, total_amount=10, payment_mode="UPI")
+        Bill.objects.create(bill_no="B-2", total_amount=20, payment_mode="CASH")
+        ServiceEntry.objects.create(customer=self.customer, call_for="2026-03-01", status="Repair")
+        ServiceEntry.objects.create(customer=self.customer, call_for="2026-04-01", status="Repair")
+
+    def ids(self, endpoint, **params):
+        res = self.client.get(f"/api/{endpoint}/", params)
+        self.assertEqual(res.status_code, 200)
+        return [row["bill_no"] if endpoint == "bills" else row["call_for"] for row in res.data["results"]]
+
+    def test_bill_filters_and_ordering(self):
+        today = timezone.localdate().isoformat()
+        self.assertEqual(self.ids("bills", payment_mode="UPI"), ["B-1"])
+        self.assertEqual(self.ids("bills", customer=self.customer.id), ["B-1"])
+        self.assertEqual(self.ids("bills", created_from=today, created_to=today, ordering="created_at"), ["B-1", "B-2"])
+        self.assertEqual(self.ids("bills", created_to="2020-01-01"), [])
+
+    def test_service_filters(self):
+        self.assertEqual(self.ids("services", status="Repair", call_for_from="2026-03-15", ordering="call_for"), ["2026-04-01"])
+
+    def test_invalid_filter_and_ordering(self):
+        self.assertEqual(self.client.get("/api/bills/", {"created_from": "yesterday"}).status_code, 400)
+        # Orderings outside the whitelist are ignored, not applied.
+        self.assertEqual(self.ids("bills", ordering="total_amount"), ["B-2", "B-1"])
+
+
+class FilterIndexTests(TestCase):
+    """EXPLAIN each whitelisted filter and check the planner can answer it
+    from the index added for it."""
+
+    CASES = [
+        (BillViewSet, {"created_from": "2026-01-01", "created_to": "2026-01-31"}, "bill_created_at_idx"),
+        (BillViewSet, {"payment_mode": "UPI", "created_from": "2026-01-01"}, "bill_mode_created_at_idx"),
+        (BillViewSet, {"customer": "1", "created_from": "2026-01-01"}, "bill_customer_created_at_idx"),
+        (ServiceEntryViewSet, {"status": "Followup", "call_for_from": "2026-01-01"}, "service_status_call_for_idx"),
+        (ServiceEntryViewSet, {"call_for_from": "2026-01-01", "call_for_to": "2026-01-31"}, "service_call_for_idx"),
+        (ServiceEntryViewSet, {"customer": "1", "call_for_from": "2026-01-01"}, "service_customer_call_for_idx"),
+        (QuotationViewSet, {"date_from": "2026-01-01", "date_to": "2026-01-31"}, "quotation_date_idx"),
+        (QuotationViewSet, {"customer": "1", "date_from": "2026-01-01"}, "quotation_customer_date_idx"),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        # Realistically spread rows, so each filter's own index is clearly the
+        # cheapest rather than tied with others on near-empty tables.
+        customers = Customer.objects.bulk_create([Customer(id=i, name=f"C{i}", phone=f"9{i:09d}") for i in range(1, 41)])
+        start = timezone.make_aware(datetime(2024, 1, 1))
+        bills = Bill.objects.bulk_create([
+            Bill(bill_no=f"F{i}", customer=customers[i % 40], total_amount=10, payment_mode="UPI" if i % 20 == 0 else "CASH")
+            for i in range(2000)
+        ])
+        for i, bill in enumerate(bills):
+            bill.created_at = start + timedelta(hours=12 * i)
+        Bill.objects.bulk_update(bills, ["created_at"], batch_size=500)
+        ServiceEntry.objects.bulk_create([
+            ServiceEntry(customer=customers[i % 40], call_for=start.date() + timedelta(days=i * 7919 % 1000), status="Followup" if i % 20 == 0 else "Completed")
+            for i in range(2000)
+        ])
+        quotations = Quotation.objects.bulk_create([Quotation(customer=customers[i % 40]) for i in range(2000)])
+        for i, quotation in enumerate(quotations):
+            quotation.date = start.date() + timedelta(days=i // 2)
+        Quotation.objects.bulk_update(quotations, ["date"], batch_size=500)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def explain(self, viewset, params):
+        view = viewset()
+        view.request = Request(APIRequestFactory().get("/", params))
+        view.format_kwarg = None
+        queryset = view.filter_queryset(view.get_queryset()).order_by()
+        if connection.vendor != "postgresql":
+            return queryset.explain()
+        # Test tables are tiny, so keep PostgreSQL from preferring a seq scan.
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            return queryset.explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET enable_seqscan")
+
+    def test_filters_use_indexes(self):
+        for viewset, params, index in self.CASES:
+            with self.subTest(view=viewset.__name__, params=params):
+                self.assertIn(index, self.explain(viewset, params))
+
+
+class QueryCountTests(TestCase):
+    """List and detail endpoints must cost the same number of queries
+    whatever the number of rows, so N+1 regressions fail loudly."""
+
+    EXPECTED = {
+        "bills": 2,
+        "quotations": 2,
+        "services": 1,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.products = make_products(5)
+
+    def seed(self, count):
+        start = Customer.objects.count()
+        for i in range(start, start + count):
+            customer = Customer.objects.create(name=f"Customer {i}", phone=f"98{i:08d}", address="Main Road")
+            bill = Bill.objects.create(bill_no=f"B{i}", customer=customer, total_amount=50)
+            BillItem.objects.bulk_create([
+                BillItem(bill=bill, product=p, qty=1, price=10) for p in self.products
+            ])
+            quotation = Quotation.objects.create(customer=customer, total_amount=50)
+            QuotationItem.objects.bulk_create([
+                QuotationItem(quotation=quotation, product=p, quantity=1, price=10) for p in self.products
+            ])
+            ServiceEntry.objects.create(customer=customer, call_for="2026-01-01")
+
+    def assert_constant_queries(self, endpoint, expected):
+        for count in (2, 20):
+            self.seed(count)
+            with self.assertNumQueries(expected):
+                res = self.client.get(f"/api/{endpoint}/")
+            self.assertEqual(res.status_code, 200)
+            first_id = res.data["results"][0]["id"]
+            with self.assertNumQueries(expected):
+                res = self.client.get(f"/api/{endpoint}/{first_id}/")
+            self.assertEqual(res.status_code, 200)
+
+    def test_bill_endpoints(self):
+        self.assert_constant_queries("bills", self.EXPECTED["bills"])
+
+    def test_quotation_endpoints(self):
+        self.assert_constant_queries("quotations", self.EXPECTED["quotations"])
+
+    def test_service_endpoints(self):
+        self.assert_constant_queries("services", self.EXPECTED["services"])
+
+    def test_bill_serializer_output(self):
+        self.seed(1)
+        res = self.client.get("/api/bills/")
+        bill = res.data["results"][0]
+        self.assertEqual(bill["customer_name"], "Customer 0")
+        self.assertEqual(bill["address"], "Main Road")
+        self.assertCountEqual([i["product_name"] for i in bill["items"]], [p.product_name for p in self.products])
+
+
+class BillNumberTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.products = make_products(1, stock=3)
+
+    def checkout(self, qty=1, **fields):
+        payload = {**bill_payload("", self.products, qty=qty), **fields}
+        del payload["bill_no"]
+        return self.client.post("/api/bills/", payload, format="json")
+
+    def test_gapless_numbers_skip_failed_checkouts(self):
+        year = financial_year(timezone.localdate())
+        first = self.checkout()
+        # Fails on the bill insert, after the number has been allocated.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.checkout(total_amount="not a number").status_code, 400)
+        self.assertTrue(any("bill_series" in q["sql"] and q["sql"].startswith("UPDATE") for q in queries))
+        self.assertEqual(Product.objects.get().stock_qty, 2)
+        second = self.checkout()
+        self.assertEqual(first.data["bill_no"], f"INV/{year}/000001")
+        self.assertEqual(second.data["bill_no"], f"INV/{year}/000002")
+
+    def test_client_supplied_bill_no_is_kept(self):
+        res = self.client.post("/api/bills/", bill_payload("LEGACY-1", self.products), format="json")
+        self.assertEqual(res.data["bill_no"], "LEGACY-1")
+
+    def test_financial_year_starts_in_april(self):
+        self.assertEqual(financial_year(date(2027, 3, 31)), "2026-27")
+        self.assertEqual(financial_year(date(2027, 4, 1)), "2027-28")
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.products = make_products(1, stock=5)
+
+    def post_bill(self, key, qty=1):
+        payload = bill_payload("", self.products, qty=qty)
+        del payload["bill_no"]
+        return self.client.post("/api/bills/", payload, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_original_without_reexecuting(self):
+        first = self.post_bill("retry-1")
+        replay = self.post_bill("retry-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(Bill.objects.count(), 1)
+        self.assertEqual(Product.objects.get().stock_qty, 4)
+
+    def test_key_reused_for_different_request(self):
+        self.post_bill("retry-2")
+        self.assertEqual(self.post_bill("retry-2", qty=2).status_code, 422)
+
+    def test_failed_attempt_releases_key(self):
+        self.assertEqual(self.post_bill("retry-3", qty=50).status_code, 400)
+        Product.objects.update(stock_qty=100)
+        self.assertEqual(self.post_bill("retry-3", qty=50).status_code, 201)
+
+    def test_expired_keys_are_purged(self):
+        self.post_bill("old")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.post_bill("new")
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+class DeltaSyncTests(TransactionTestCase):
+    """A TransactionTestCase: on PostgreSQL versions are transaction ids, and
+    sync holds back whatever the still-open test transaction wrote."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def sync(self, since="", limit=500):
+        response = self.client.get("/api/sync/", {"since": since, "limit": limit})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_returns_only_changes_after_cursor(self):
+        customer = Customer.objects.create(name="Asha", phone="9000000001")
+        product = Product.objects.create(product_id="SYNC-1", product_name="Cable", stock_qty=5)
+        cursor = self.sync()["cursor"]
+        self.assertEqual(self.sync(cursor)["products"], [])
+
+        self.client.post("/api/bills/", bill_payload("", [product]), format="json")
+        customer_pk = customer.pk
+        customer.delete()
+        changes = self.sync(cursor)
+        self.assertEqual([p["product_id"] for p in changes["products"]], ["SYNC-1"])
+        self.assertEqual(changes["products"][0]["stock_qty"], "4.00")
+        self.assertEqual(changes["deleted"]["customers"], [customer_pk])
+        self.assertFalse(changes["has_more"])
+
+    def test_pages_through_changes(self):
+        for i in range(5):
+            Product.objects.create(product_id=f"SYNC-{i}", product_name=f"Item {i}")
+        seen, cursor = [], ""
+        while True:
+            page = self.sync(cursor, limit=2)
+            seen += [p["product_id"] for p in page["products"]]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(seen, [f"SYNC-{i}" for i in range(5)])
+
+    def test_rejects_bad_cursor(self):
+        self.assertEqual(self.client.get("/api/sync/", {"since": "abc"}).status_code, 400)
+
+    def test_late_commit_is_not_skipped(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("concurrent writers need PostgreSQL")
+        cursor = self.sync()["cursor"]
+        written, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    Product.objects.create(product_id="SYNC-SLOW")
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=slow_writer)
+        thread.start()
+        written.wait(10)
+        # Gets a higher version than SYNC-SLOW but commits first; no lock is shared.
+        Product.objects.create(product_id="SYNC-FAST")
+        self.assertEqual(self.sync(cursor)["products"], [])
+        release.set()
+        thread.join()
+        changes = self.sync(cursor)
+        self.assertEqual([p["product_id"] for p in changes["products"]], ["SYNC-SLOW", "SYNC-FAST"])
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_every_stock_change_is_logged(self):
+        res = self.client.post("/api/products/", {"product_id": "L-1", "product_name": "Lamp", "stock_qty": "10"})
+        product = Product.objects.get(pk=res.data["id"])
+        self.client.post("/api/bills/", bill_payload("L-B1", [product], qty=3), format="json")
+        self.client.post(f"/api/products/{product.pk}/adjust_stock/", {"qty": "1", "kind": "return"})
+        self.client.post("/api/products/bulk_import/", [{"Product ID": "L-1", "Product Name": "Lamp", "Stock Qty": "20"}], format="json")
+        self.client.patch(f"/api/products/{product.pk}/", {"stock_qty": "18"})
+
+        ledger = list(StockMovement.objects.order_by("id").values_list("kind", "qty"))
+        self.assertEqual(ledger, [
+            ("opening", Decimal("10")), ("sale", Decimal("-3")), ("return", Decimal("1")),
+            ("import", Decimal("12")), ("adjustment", Decimal("-2")),
+        ])
+        self.assertEqual(stock_as_of(timezone.localdate()), {product.pk: Decimal("18")})
+        self.assertEqual(rebuild_stock_qty(dry_run=True), {})
+
+    def test_adjustment_cannot_go_negative(self):
+        product = adjust_stock(make_products(1, stock=0)[0].pk, Decimal("2"))
+        res = self.client.post(f"/api/products/{product.pk}/adjust_stock/", {"qty": "-5"})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Product.objects.get().stock_qty, 2)
+
+    def test_stock_as_of_reads_from_snapshots(self):
+        product = make_products(1, stock=0)[0]
+        today = timezone.localdate()
+        for days_ago, qty in ((5, 10), (4, -2), (2, -3), (1, 4)):
+            StockMovement.objects.create(product=product, kind="adjustment", qty=qty, day=today - timedelta(days=days_ago))
+        self.assertEqual(take_snapshots(today - timedelta(days=3)), 1)
+        # Movements already folded into the snapshot are no longer summed.
+        StockMovement.objects.filter(day__lte=today - timedelta(days=3)).delete()
+        self.assertEqual(take_snapshots(today - timedelta(days=3)), 0)
+
+        as_of = {days_ago: stock_as_of(today - timedelta(days=days_ago))[product.pk] for days_ago in (3, 2, 1)}
+        self.assertEqual(as_of, {3: Decimal("8"), 2: Decimal("5"), 1: Decimal("9")})
+        self.assertEqual(StockSnapshot.objects.get().qty, Decimal("8"))
+
+    def test_rebuild_fixes_drifted_projection(self):
+        product = adjust_stock(make_products(1, stock=0)[0].pk, Decimal("7"))
+        Product.objects.update(stock_qty=99)
+        self.assertEqual(rebuild_stock_qty(), {product.pk: (Decimal("99"), Decimal("7"))})
+        self.assertEqual(Product.objects.get().stock_qty, Decimal("7"))
+
+
+class StockAlertTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_checkout_raises_and_restock_clears_low_stock_alert(self):
+        product = Product.objects.create(product_id="A-1", product_name="Fuse", stock_qty=6, low_stock_alert=5)
+        self.client.post("/api/bills/", bill_payload("A-B1", [product], qty=2), format="json")
+        alert = StockAlert.objects.get()
+        self.assertEqual((alert.kind, alert.stock_qty, alert.threshold), ("low_stock", Decimal("4"), 5))
+
+        res = self.client.get("/api/alerts/", {"kind": "low_stock"})
+        self.assertEqual([a["product_code"] for a in res.data["results"]], ["A-1"])
+
+        adjust_stock(product.pk, Decimal("10"))
+        self.assertFalse(StockAlert.objects.exists())
+
+    def test_refresh_rebuilds_alert_list(self):
+        today = timezone.localdate()
+        Product.objects.bulk_create([
+            Product(product_id="LOW", stock_qty=1, low_stock_alert=3),
+            Product(product_id="OK", stock_qty=9, low_stock_alert=3),
+            Product(product_id="EXP", expire_date=today + timedelta(days=10), batch_no="B7"),
+            Product(product_id="LATER", expire_date=today + timedelta(days=400)),
+            Product(product_id="GONE", stock_qty=0, low_stock_alert=3, active_product=False),
+        ])
+        StockAlert.objects.create(
+            product=Product.objects.get(product_id="OK"), kind="low_stock", stock_qty=2, updated_at=timezone.now(),
+        )
+        self.assertEqual(refresh_alerts(), {"low_stock": 1, "expiring": 1})
+        alerts = set(StockAlert.objects.values_list("product__product_id", "kind"))
+        self.assertEqual(alerts, {("LOW", "low_stock"), ("EXP", "expiring")})
+
+    def test_refresh_queries_use_partial_indexes(self):
+        cases = [
+            (Product.objects.filter(active_product=True, stock_qty__lte=F("low_stock_alert")), "product_low_stock_idx"),
+            (Product.objects.filter(active_product=True, expire_date__isnull=False, expire_date__lte=date(2026, 1, 1)), "product_expire_date_idx"),
+        ]
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                if connection.vendor == "postgresql":
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET enable_seqscan = off")
+                try:
+                    self.assertIn(index, queryset.explain())
+                finally:
+                    if connection.vendor == "postgresql":
+                        with connection.cursor() as cursor:
+                            cursor.execute("RESET enable_seqscan")
+
+
+class CustomerLookupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        phone_index.reset()
+        self.addCleanup(phone_index.reset)
+        for phone, name in (("9840012345", "Ravi Kumar"), ("9840099999", "Meena"), ("9841000000", "Kumaran"), ("7000000000", "Anbu")):
+            Customer.objects.create(phone=phone, name=name)
+
+    def lookup(self, q, **params):
+        return [c["phone"] for c in self.client.get("/api/customers/lookup/", {"q": q, **params}).json()]
+
+    def test_phone_prefix(self):
+        self.assertEqual(self.lookup("9840"), ["9840012345", "9840099999"])
+        self.assertEqual(self.lookup("98 4"), ["9840012345", "9840099999", "9841000000"])
+        self.assertEqual(self.lookup("984", limit=1), ["9840012345"])
+        self.assertEqual(self.lookup("555"), [])
+
+    def test_index_follows_changes(self):
+        self.assertEqual(self.lookup("70"), ["7000000000"])
+        Customer.objects.create(phone="7000000001", name="Bala")
+        anbu = Customer.objects.get(phone="7000000000")
+        anbu.phone = "6000000000"
+        anbu.save()
+        Customer.objects.get(name="Meena").delete()
+        self.assertEqual(self.lookup("70"), ["7000000001"])
+        self.assertEqual(self.lookup("6"), ["6000000000"])
+        self.assertEqual(self.lookup("98400"), ["9840012345"])
+
+    def test_name_prefix_then_substring(self):
+        self.assertEqual(self.lookup("kum"), ["9841000000", "9840012345"])
+
+    def test_query_count_is_constant(self):
+        self.lookup("98")
+        # Sync horizon, changed customers, tombstones, then the matches.
+        with self.assertNumQueries(4):
+            self.lookup("98")
+
+    @override_settings(BILLING_CUSTOMER_PHONE_INDEX=False)
+    def test_database_fallback(self):
+        self.assertEqual(self.lookup("9840"), ["9840012345", "9840099999"])
+
+    def test_formatted_phones_match_the_same_in_both_paths(self):
+        Customer.objects.create(phone="+91 (984) 001-2222", name="Selvi")
+        for use_index in (True, False):
+            with self.subTest(use_index=use_index), self.settings(BILLING_CUSTOMER_PHONE_INDEX=use_index):
+                self.assertEqual(self.lookup("91 984"), ["+91 (984) 001-2222"])
+                self.assertEqual(self.lookup("+91-98400"), ["+91 (984) 001-2222"])
+                self.assertEqual(self.lookup("9840"), ["9840012345", "9840099999"])
+
+
+class InvoiceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001", address="12 Main Road")
+        self.products = make_products(3, stock=100)
+
+    def checkout(self, lines=1):
+        payload = bill_payload("", self.products[:1] * lines)
+        del payload["bill_no"]
+        payload["customer"] = self.customer.pk
+        return self.client.post("/api/bills/", payload, format="json").data["id"]
+
+    def test_single_invoice_pdf(self):
+        res = self.client.get(f"/api/bills/{self.checkout()}/invoice/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "application/pdf")
+        self.assertTrue(res.content.startswith(b"%PDF"))
+
+    def test_long_bill_spans_pages(self):
+        bill = self.client.get(f"/api/bills/{self.checkout(lines=90)}/").json()
+        self.assertEqual(render_pdf([bill, bill], io.BytesIO()), 6)
+
+    def test_batch_job_renders_zip_for_customer(self):
+        ids = [self.checkout() for _ in range(3)]
+        res = self.client.post("/api/invoices/", {"customer": self.customer.pk, "output_format": "zip"}, format="json")
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(self.client.get(f"/api/invoices/{res.data['id']}/download/").status_code, 409)
+
+        job = run_next_job()
+        self.assertEqual((job.status, job.bill_count, job.page_count), ("done", 3, 3))
+        self.assertIsNone(run_next_job())
+        download = self.client.get(f"/api/invoices/{job.pk}/download/")
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(download.streaming_content)))
+        bill_nos = Bill.objects.filter(id__in=ids).values_list("bill_no", flat=True)
+        self.assertEqual(sorted(archive.namelist()), sorted(n.replace("/", "-") + ".pdf" for n in bill_nos))
+
+    def test_batch_job_needs_a_selection(self):
+        self.assertEqual(self.client.post("/api/invoices/", {"output_format": "pdf"}, format="json").status_code, 400)
+
+    @override_settings(BILLING_INVOICE_JOB_LEASE_SECONDS=60)
+    def test_job_left_running_is_claimed_again(self):
+        self.checkout()
+        pk = self.client.post("/api/invoices/", {"customer": self.customer.pk}, format="json").data["id"]
+        InvoiceJob.objects.filter(pk=pk).update(status=InvoiceJob.RUNNING, started_at=timezone.now() - timedelta(seconds=30))
+        self.assertIsNone(run_next_job())
+        InvoiceJob.objects.filter(pk=pk).update(started_at=timezone.now() - timedelta(seconds=90))
+        job = run_next_job()
+        self.assertEqual((job.pk, job.status, job.bill_count), (pk, "done", 1))
+
+    def test_company_details_follow_settings(self):
+        self.assertEqual(company()["name"], settings.BILLING_INVOICE_COMPANY["name"])
+        with self.settings(BILLING_INVOICE_COMPANY={"name": "Renamed Traders", "lines": []}):
+            self.assertEqual(company()["name"], "Renamed Traders")
+
+
+class ProductImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.existing = Product.objects.create(product_id="P-OLD", product_name="Old name", stock_qty=5)
+
+    def test_mixed_rows_report_errors_by_row(self):
+        rows = [
+            {"Product ID": "P-OLD", "Product Name": "Renamed", "Stock Qty": "8"},
+            {"Product ID": "P-NEW", "Product Name": "Lamp", "Sell Price": "120.50", "Active Product": "no"},
+            {"Product ID": "P-BAD", "Sell Price": "abc"},
+            {"Product Name": "No code"},
+            "not an object",
+        ]
+        res = self.client.post("/api/products/bulk_import/", rows, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            {k: res.data[k] for k in ("imported", "created", "updated", "failed", "errors_truncated")},
+            {"imported": 2, "created": 1, "updated": 1, "failed": 3, "errors_truncated": False},
+        )
+        errors = {e["row"]: e for e in res.data["errors"]}
+        self.assertEqual(sorted(errors), [3, 4, 5])
+        self.assertEqual(errors[3]["product_id"], "P-BAD")
+        self.assertIn("selling_price", errors[3]["errors"])
+        self.assertIn("product_id", errors[4]["errors"])
+        self.assertIn("non_field_errors", errors[5]["errors"])
+
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.product_name, self.existing.stock_qty), ("Renamed", 8))
+        new = Product.objects.get(product_id="P-NEW")
+        self.assertEqual((new.selling_price, new.active_product), (Decimal("120.50"), False))
+        self.assertFalse(Product.objects.filter(product_id="P-BAD").exists())
+
+    def test_csv_and_xlsx_uploads(self):
+        from openpyxl import Workbook
+
+        upload = SimpleUploadedFile(
+            "products.csv",
+            b"\xef\xbb\xbfProduct ID,Product Name,Stock Qty\nP-OLD,From CSV,3\nP-CSV,Cable,x\nP-CSV2,Plug,4\n",
+            content_type="text/csv",
+        )
+        res = self.client.post("/api/products/bulk_import/", {"file": upload})
+        self.assertEqual((res.status_code, res.data["created"], res.data["updated"]), (201, 1, 1))
+        self.assertEqual([e["row"] for e in res.data["errors"]], [2])
+
+        workbook = Workbook()
+        workbook.active.append(["Product ID", "Product Name", "Sell Price"])
+        workbook.active.append(["P-XLSX", "Switch", 45])
+        workbook.active.append([None, None, None])
+        workbook.active.append(["P-CSV2", "Plug v2", 60])
+        output = io.BytesIO()
+        workbook.save(output)
+        upload = SimpleUploadedFile("products.xlsx", output.getvalue())
+        res = self.client.post("/api/products/bulk_import/", {"file": upload})
+        self.assertEqual((res.status_code, res.data["created"], res.data["updated"], res.data["failed"]), (201, 1, 1, 0))
+        self.assertEqual(Product.objects.get(product_id="P-CSV2").product_name, "Plug v2")
+
+    def test_chunks_count_each_product_once(self):
+        rows = [{"product_id": f"C-{i % 4}", "product_name": f"Row {i}"} for i in range(6)]
+        report = import_products(rows + [{"product_id": "P-OLD"}], chunk_size=3)
+        # Chunks are [C-0 C-1 C-2] [C-3 C-0 C-1] [P-OLD]; C-0 and C-1 exist by the second.
+        self.assertEqual((report["created"], report["updated"]), (4, 3))
+        self.assertEqual(Product.objects.get(product_id="C-1").product_name, "Row 5")
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        counts = []
+        for total in (100, 200):
+            rows = [{"product_id": f"Q-{total}-{i}", "product_name": "Bulk"} for i in range(total)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(import_products(rows, chunk_size=100)["created"], total)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[1], 2 * counts[0])
+
+    def test_nothing_valid_is_rejected(self):
+        res = self.client.post("/api/products/bulk_import/", [{"Product Name": "No code"}], format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data["errors"][0]["row"], 1)
+        self.assertEqual(self.client.post("/api/products/bulk_import/", {"x": 1}, format="json").status_code, 400)
+
+
+class ServiceImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001")
+
+    def test_json_rows_resolve_customer_by_id_or_phone(self):
+        rows = [
+            {"customer": self.customer.pk, "call_for": "2026-11-01", "status": "Service", "amount": "500"},
+            {"customer_phone": "9000000001", "call_for": "2026-11-02"},
+            {"customer_phone": "9999999999", "call_for": "2026-11-03"},
+            {"customer": self.customer.pk, "call_for": "not a date"},
+            {"customer": self.customer.pk, "call_for": "2026-11-04", "status": "Unknown"},
+        ]
+        res = self.client.post("/api/services/bulk_create/", rows, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual((res.data["imported"], res.data["failed"]), (2, 3))
+        self.assertEqual(sorted(e["row"] for e in res.data["errors"]), [3, 4, 5])
+        self.assertEqual(list(ServiceEntry.objects.order_by("call_for").values_list("status", flat=True)), ["Service", "Followup"])
+        self.assertTrue(all(ServiceEntry.objects.values_list("sync_version", flat=True)))
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile(
+            "services.csv",
+            b"Customer Phone,Call For,Status,Amount,Notes\n9000000001,2026-12-01,Repair,250,Inverter\n",
+            content_type="text/csv",
+        )
+        res = self.client.post("/api/services/bulk_create/", {"file": upload})
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(ServiceEntry.objects.get().notes, "Inverter")
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        counts = []
+        for total in (100, 200):
+            rows = [{"customer": self.customer.pk, "call_for": "2026-11-01"}] * total
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(import_services(rows, chunk_size=100)["imported"], total)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[1], 2 * counts[0])
+
+    def test_nothing_valid_is_rejected(self):
+        res = self.client.post("/api/services/bulk_create/", [{"call_for": "2026-11-01"}], format="json")
+        self.assertEqual(res.status_code, 400)
+
+
+class QuotationConvertTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001")
+
+    def quotation(self, lines, qty=2, stock=10):
+        products = make_products(lines, stock=stock, prefix=f"Q{lines}-")
+        quotation = Quotation.objects.create(customer=self.customer, total_amount=Decimal(lines * qty * 10))
+        QuotationItem.objects.bulk_create([
+            QuotationItem(quotation=quotation, product=p, quantity=qty, price=10) for p in products
+        ])
+        return quotation
+
+    def convert(self, quotation, **data):
+        return self.client.post(f"/api/quotations/{quotation.pk}/convert/", data, format="json")
+
+    def test_convert_bills_items_and_links_quotation(self):
+        quotation = self.quotation(3)
+        res = self.convert(quotation, payment_mode="UPI")
+        self.assertEqual(res.status_code, 201)
+        bill = Bill.objects.get(pk=res.data["id"])
+        self.assertEqual((bill.quotation_id, bill.customer_id, bill.payment_mode, bill.total_amount), (quotation.pk, self.customer.pk, "UPI", Decimal("60")))
+        self.assertEqual(bill.items.count(), 3)
+        self.assertEqual(set(Product.objects.values_list("stock_qty", flat=True)), {Decimal("8")})
+        self.assertEqual(self.client.get(f"/api/quotations/{quotation.pk}/").data["bill"], bill.pk)
+
+        again = self.convert(quotation)
+        self.assertEqual(again.status_code, 400)
+        self.assertIn("already converted", again.data["error"])
+
+    def test_bill_edit_cannot_move_the_quotation_link(self):
+        quotation, other = self.quotation(1), self.quotation(2)
+        pk = self.convert(quotation).data["id"]
+        for value in (other.pk, None):
+            res = self.client.patch(f"/api/bills/{pk}/", {"quotation": value, "payment_mode": "CARD"}, format="json")
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.data["quotation"], quotation.pk)
+        self.assertEqual(Bill.objects.get(pk=pk).quotation_id, quotation.pk)
+        self.assertEqual(self.convert(other).status_code, 201)
+        self.assertEqual(self.convert(quotation).status_code, 400)
+
+    def test_insufficient_stock_leaves_quotation_open(self):
+        quotation = self.quotation(2, qty=5, stock=3)
+        self.assertEqual(self.convert(quotation).status_code, 400)
+        self.assertFalse(Bill.objects.exists())
+        self.assertEqual(set(Product.objects.values_list("stock_qty", flat=True)), {Decimal("3")})
+
+    def test_query_count_does_not_grow_with_lines(self):
+        counts = []
+        for lines in (2, 100):
+            quotation = self.quotation(lines)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.convert(quotation).status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class QuotationCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001")
+
+    def create(self, product_ids):
+        items = [{"product": pk, "quantity": 2} for pk in product_ids]
+        return self.client.post("/api/quotations/", {"customer": self.customer.pk, "total_amount": "40.00", "items": items}, format="json")
+
+    def test_query_count_does_not_grow_with_lines(self):
+        counts = []
+        for lines in (2, 60):
+            products = make_products(lines, prefix=f"Q{lines}-")
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.create([p.pk for p in products])
+            self.assertEqual(res.status_code, 201)
+            self.assertEqual(QuotationItem.objects.filter(quotation_id=res.data["id"]).count(), lines)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_unknown_product_is_rejected(self):
+        res = self.create([make_products(1)[0].pk, 999999])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data["error"], "Product 999999 not found")
+        self.assertFalse(Quotation.objects.exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001", address="Main Road")
+        self.products = make_products(2, stock=100)
+        cutoff = timezone.make_aware(datetime.combine(archive_cutoff(), datetime.min.time()))
+        self.bills = {}
+        for bill_no, created_at in (("OLD-1", cutoff - timedelta(days=400)), ("OLD-2", cutoff - timedelta(days=10)), ("NEW-1", None)):
+            payload = bill_payload(bill_no, self.products)
+            payload["customer"] = self.customer.pk
+            pk = self.client.post("/api/bills/", payload, format="json").data["id"]
+            if created_at:
+                Bill.objects.filter(pk=pk).update(created_at=created_at)
+            self.bills[bill_no] = pk
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_bills", *args, stdout=out)
+        return out.getvalue()
+
+    def rollups(self):
+        return sorted(DailySales.objects.values_list("day", "bill_count", "total_amount"))
+
+    def test_moves_closed_years_only(self):
+        self.assertIn("Would archive 2 bills", self.archive("--dry-run"))
+        self.assertEqual(Bill.objects.count(), 3)
+        self.assertIn("Archived 2 bills", self.archive("--batch-size", "1"))
+        self.assertEqual(list(Bill.objects.values_list("bill_no", flat=True)), ["NEW-1"])
+        self.assertEqual(BillItem.objects.count(), 2)
+        self.assertEqual(sorted(ArchivedBill.objects.values_list("bill_no", flat=True)), ["OLD-1", "OLD-2"])
+        self.assertEqual(ArchivedBillItem.objects.count(), 4)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT count(*) FROM pg_inherits WHERE inhparent = 'billing_history_archive'::regclass"
+                )
+                self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertEqual([row["bill_no"] for row in self.client.get("/api/bills/").data["results"]], ["NEW-1"])
+        self.assertIn("Archived 0 bills", self.archive())
+
+    def test_archived_bills_found_by_id_and_bill_no(self):
+        before = {bill_no: self.client.get(f"/api/bills/{pk}/").json() for bill_no, pk in self.bills.items()}
+        self.archive()
+        for bill_no, pk in self.bills.items():
+            self.assertEqual(self.client.get(f"/api/bills/{pk}/").json(), before[bill_no])
+            self.assertEqual(self.client.get("/api/bills/", {"bill_no": bill_no}).json()["results"], [before[bill_no]])
+        self.assertEqual(before["OLD-1"]["customer_name"], "Asha")
+        res = self.client.get(f"/api/bills/{self.bills['OLD-1']}/invoice/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "application/pdf")
+        self.assertEqual(self.client.get("/api/bills/999999/").status_code, 404)
+
+    def test_rollups_survive_archiving_and_rebuild(self):
+        rollups = self.rollups()
+        self.archive()
+        call_command("rebuild_sales_rollup", stdout=StringIO())
+        self.assertEqual(self.rollups(), rollups)
+        with self.assertRaisesMessage(CommandError, "archived"):
+            call_command("rebuild_sales_rollup", since="2000-01-01", stdout=StringIO())
+
+    def test_archived_bill_numbers_stay_taken(self):
+        self.archive()
+        res = self.client.post("/api/bills/", bill_payload("OLD-1", self.products), format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("archived", res.data["error"])
+        self.assertFalse(Bill.objects.filter(bill_no="OLD-1").exists())
+        res = self.client.patch(f"/api/bills/{self.bills['NEW-1']}/", {"bill_no": "OLD-2"}, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("bill_no", res.data)
+
+    def test_archived_bills_cannot_be_changed(self):
+        self.archive()
+        pk = self.bills["OLD-1"]
+        for res in (
+            self.client.patch(f"/api/bills/{pk}/", {"payment_mode": "UPI"}, format="json"),
+            self.client.delete(f"/api/bills/{pk}/"),
+        ):
+            self.assertEqual(res.status_code, 410)
+            self.assertIn("archived", res.json()["error"])
+        self.assertEqual(self.client.delete("/api/bills/999999/").status_code, 404)
+
+    def test_archived_quotation_bill_blocks_convert(self):
+        quotation = Quotation.objects.create(customer=self.customer, total_amount=10)
+        QuotationItem.objects.create(quotation=quotation, product=self.products[0], quantity=1, price=10)
+        Bill.objects.filter(pk=self.bills["OLD-1"]).update(quotation=quotation)
+        self.archive()
+        res = self.client.post(f"/api/quotations/{quotation.pk}/convert/", {}, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("OLD-1", res.data["error"])
+
+    def test_exports_include_archived_bills(self):
+        self.archive()
+        rows = lambda name, **params: [r[0] for r in csv.reader(io.StringIO(b"".join(
+            self.client.get(f"/api/exports/{name}/", {"columns": "bill_no", **params}).streaming_content
+        ).decode()))][1:]
+        self.assertEqual(rows("bills"), ["OLD-1", "OLD-2", "NEW-1"])
+        self.assertEqual(rows("bill_items"), ["OLD-1", "OLD-1", "OLD-2", "OLD-2", "NEW-1", "NEW-1"])
+        self.assertEqual(rows("bills", **{"from": archive_cutoff().isoformat()}), ["NEW-1"])
+        last_year = (archive_cutoff() - timedelta(days=30)).isoformat()
+        self.assertEqual(rows("bills", **{"from": last_year}), ["OLD-2", "NEW-1"])
+
+    def test_invoice_jobs_render_archived_bills(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.archive()
+        res = self.client.post("/api/invoices/", {"customer": self.customer.pk, "output_format": "zip"}, format="json")
+        self.assertEqual(res.status_code, 202)
+        job = run_next_job()
+        self.assertEqual((job.status, job.bill_count), ("done", 3))
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(self.client.get(f"/api/invoices/{job.pk}/download/").streaming_content)))
+        self.assertEqual(sorted(archive.namelist()), ["NEW-1.pdf", "OLD-1.pdf", "OLD-2.pdf"])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        registry.reset()
+        self.addCleanup(registry.reset)
+        Customer.objects.create(phone="9840012345", name="Ravi")
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/customers/")
+        timing = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timing), {"db", "serialize", "render", "app", "total"})
+        self.assertRegex(timing["db"], r'desc="[1-9]\d* queries";dur=[\d.]+')
+        # The customer list is built from values(), without a serializer.
+        self.assertEqual(timing["serialize"], "dur=0.0")
+
+    def test_serializer_time_is_not_app_time(self):
+        products = make_products(3, stock=100)
+        for n in range(20):
+            self.client.post("/api/bills/", bill_payload(f"M{n}", products), format="json")
+        response = self.client.get("/api/bills/", {"page_size": 20})
+        timing = {
+            name: float(value.rsplit("dur=", 1)[1])
+            for name, value in (part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        }
+        self.assertGreater(timing["serialize"], 0)
+        self.assertLessEqual(timing["db"] + timing["serialize"] + timing["render"], timing["total"] + 0.3)
+        body = self.client.get("/api/_metrics").content.decode()
+        self.assertRegex(body, r'api_serialize_seconds_total\{view="bill-list",method="GET"\} [\d.]*[1-9]')
+
+    def test_prometheus_endpoint(self):
+        self.client.get("/api/customers/")
+        self.client.get("/api/customers/")
+        self.client.get("/api/nowhere/")
+        response = self.client.get("/api/_metrics")
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        labels = 'view="customer-list",method="GET"'
+        self.assertIn(f'api_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn(f'api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f'api_requests_total{{{labels},status="200"}} 2', body)
+        self.assertIn('api_requests_total{view="unmatched",method="GET",status="404"} 1', body)
+        self.assertRegex(body, rf'api_response_bytes_total{{{labels}}} [1-9]')
+
+    @override_settings(BILLING_SLOW_QUERY_MS=0)
+    def test_slow_query_log(self):
+        with self.assertLogs("billing.slow_queries", "WARNING") as logs:
+            self.client.get("/api/customers/")
+        self.assertIn("customer-list", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+
+class ExportTests(TestCase):
+    def make_bills(self):
+        products = make_products(2, stock=100)
+        client = APIClient()
+        for bill_no in ("OLD-1", "NEW-1"):
+            self.assertEqual(client.post("/api/bills/", bill_payload(bill_no, products), format="json").status_code, 201)
+        Bill.objects.filter(bill_no="OLD-1").update(created_at=timezone.now() - timedelta(days=10))
+        return products
+
+    def export(self, name, **params):
+        res = self.client.get(f"/api/exports/{name}/", params)
+        self.assertEqual(res.status_code, 200)
+        return res
+
+    def csv_rows(self, name, **params):
+        res = self.export(name, **params)
+        return list(csv.reader(io.StringIO(b"".join(res.streaming_content).decode())))
+
+    def test_csv_headers_and_rows(self):
+        self.make_bills()
+        res = self.export("bills")
+        self.assertIsInstance(res, StreamingHttpResponse)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(res["Content-Disposition"], 'attachment; filename="bills.csv"')
+        for name, rows in (("bills", 2), ("bill_items", 4), ("products", 2)):
+            header, *body = self.csv_rows(name)
+            self.assertEqual(header, list(EXPORTS[name][1]), name)
+            self.assertEqual(len(body), rows, name)
+        self.assertEqual(self.csv_rows("bills", columns="bill_no, total_amount"), [
+            ["bill_no", "total_amount"], ["OLD-1", "100.00"], ["NEW-1", "100.00"],
+        ])
+
+    def test_date_range(self):
+        self.make_bills()
+        today = timezone.localdate()
+        self.assertEqual([r[0] for r in self.csv_rows("bills", columns="bill_no", **{"from": today.isoformat()})[1:]], ["NEW-1"])
+        until = (today - timedelta(days=5)).isoformat()
+        self.assertEqual([r[0] for r in self.csv_rows("bills", columns="bill_no", to=until)[1:]], ["OLD-1"])
+        self.assertEqual({r[0] for r in self.csv_rows("bill_items", columns="bill_no", to=until)[1:]}, {"OLD-1"})
+
+    def test_bad_parameters(self):
+        for params in ({"from": "2024-13-45"}, {"to": "yesterday"}, {"columns": "bill_no,nope"}, {"file_type": "pdf"}):
+            res = self.client.get("/api/exports/bills/", params)
+            self.assertEqual(res.status_code, 400, params)
+            self.assertIn("error", res.json())
+
+    def test_xlsx_opens_in_openpyxl(self):
+        from openpyxl import load_workbook
+
+        self.make_bills()
+        res = self.export("bills", file_type="xlsx")
+        self.assertEqual(res["Content-Disposition"], 'attachment; filename="bills.xlsx"')
+        workbook = load_workbook(io.BytesIO(b"".join(res.streaming_content)), read_only=True)
+        header, *body = workbook["bills"].iter_rows(values_only=True)
+        self.assertEqual(list(header), list(EXPORTS["bills"][1]))
+        self.assertEqual([row[1] for row in body], ["OLD-1", "NEW-1"])
+        self.assertIsInstance(body[0][-1], datetime)
+
+    async def test_csv_streams_over_asgi(self):
+        await sync_to_async(make_products)(ASYNC_BATCH_SIZE * 2 + 1)
+        res = await self.async_client.get("/api/exports/products/")
+        self.assertEqual(res.status_code, 200)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            lines = [line async for line in res]
+        # Django warns when it has to read a sync iterator into a list first.
+        self.assertEqual([str(w.message) for w in caught], [])
+        self.assertEqual(len(lines), ASYNC_BATCH_SIZE * 2 + 2)
+        self.assertTrue(lines[0].startswith(b"id,"))
+
+    async def test_csv_is_read_a_batch_at_a_time(self):
+        pulled = []
+
+        def rows():
+            for i in range(ASYNC_BATCH_SIZE * 3):
+                pulled.append(i)
+                yield (i,)
+
+        parts = aiter(csv_response("numbers", ["n"], rows()))
+        self.assertEqual(await anext(parts), b"n\r\n")
+        self.assertLess(len(pulled), ASYNC_BATCH_SIZE)
+        self.assertEqual(len([part async for part in parts]), ASYNC_BATCH_SIZE * 3)
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Asha", phone="9000000001")
+        self.products = make_products(2, stock=100)
+        payload = bill_payload("", self.products)
+        del payload["bill_no"]
+        payload["customer"] = self.customer.pk
+        self.bill_id = APIClient().post("/api/bills/", payload, format="json").data["id"]
+
+    async def test_bill_detail_over_asgi(self):
+        res = await self.async_client.get(f"/api/bills/{self.bill_id}/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["customer_name"], "Asha")
+        self.assertEqual(len(res.json()["items"]), 2)
+        # Queries run in a sync_to_async thread are still counted.
+        self.assertRegex(res["Server-Timing"], r'db;desc="[1-9]\d* queries"')
+        self.assertEqual((await self.async_client.get("/api/bills/999999/")).status_code, 404)
+
+    async def test_lookups_over_asgi(self):
+        res = await self.async_client.get("/api/customers/lookup/", {"q": "9000"})
+        self.assertEqual([c["name"] for c in res.json()], ["Asha"])
+        res = await self.async_client.get("/api/products/search/", {"q": "P1"})
+        self.assertEqual([p["product_id"] for p in res.json()], ["P1"])
+        res = await self.async_client.get("/api/products/search/", {"q": "P", "limit": "x"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_bill_writes_still_go_to_viewset(self):
+        client = APIClient()
+        res = client.patch(f"/api/bills/{self.bill_id}/", {"payment_mode": "UPI"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(client.get(f"/api/bills/{self.bill_id}/").json()["payment_mode"], "UPI")
+
+
+class BenchmarkTests(TestCase):
+    def seed(self, **options):
+        counts = {"products": 12, "customers": 8, "bills": 10, "services": 5}
+        counts.update(options)
+        call_command("seed_data", *(f"--{k}={v}" for k, v in counts.items()), "--reset", stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by("product_id").values_list("product_id", "product_name", "selling_price")),
+            list(Bill.objects.order_by("bill_no").values_list("bill_no", "total_amount", "payment_mode", "created_at")),
+            sorted(BillItem.objects.values_list("bill__bill_no", "product__product_id", "qty")),
+        )
+
+    def test_seed_is_deterministic(self):
+        self.seed()
+        first = self.snapshot()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual((Product.objects.count(), Customer.objects.count(), Bill.objects.count()), (12, 8, 10))
+        self.assertEqual(rebuild_stock_qty(dry_run=True), {})
+        statuses = set(ServiceEntry.objects.values_list("status", flat=True))
+        self.assertTrue(statuses)
+        self.assertLessEqual(statuses, {value for value, _ in STATUS_CHOICES})
+        self.seed(seed=7)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_benchmark_writes_json(self):
+        self.seed()
+        output = tempfile.NamedTemporaryFile(suffix=".json")
+        self.addCleanup(output.close)
+        call_command("benchmark", "--iterations=2", "--warmup=0", f"--output={output.name}", stderr=StringIO())
+        results = json.load(output)
+        self.assertEqual(set(results["scenarios"]), {
+            "bill_create", "product_list", "product_list_cached", "product_detail",
+            "bulk_import", "quotation_create", "place_order",
+        })
+        for name, stats in results["scenarios"].items():
+            self.assertEqual((stats["iterations"], stats["errors"]), (2, 0), name)
+            self.assertGreater(stats["p50_ms"], 0)
+        self.assertEqual(results["scenarios"]["product_list_cached"]["queries"], 0)
+        self.assertEqual(results["environment"]["rows"]["customers"], 8)
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_load_reports_throughput(self):
+        stats = load(self.live_server_url, ["/api/_metrics", "/api/customers/lookup/?q=1"], concurrency=2, duration=0.5)["load"]
+        self.assertEqual(stats["errors"], 0)
+        self.assertGreater(stats["requests_per_second"], 0)
+        self.assertGreater(stats["p99_ms"], 0)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """'replica' mirrors 'default' under test, so both aliases see the same
+    committed rows; the query log on each shows where reads went."""
+    databases = {"default", "replica"}
+
+    @classmethod
+    def tearDownClass(cls):
+        # The mirror keeps its own connection pool; close it so the test
+        # database can be dropped.
+        if hasattr(connections["replica"], "close_pool"):
+            connections["replica"].close_pool()
+        super().tearDownClass()
+
+    def setUp(self):
+        _lag_readings.clear()
+        self.addCleanup(_lag_readings.clear)
+        self.client = APIClient()
+        self.products = make_products(2)
+
+    def queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            res = getattr(self.client, method)(url, data, format="json")
+            if res.streaming:
+                b"".join(res.streaming_content)
+        self.assertLess(res.status_code, 300, url)
+        return len(primary), len(replica)
+
+    def test_writes_stay_on_primary_and_reports_read_replica(self):
+        primary, replica = self.queries("post", "/api/bills/", bill_payload("B-1", self.products))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        for url in ("/api/reports/monthly/", "/api/alerts/", "/api/exports/bills/"):
+            primary, replica = self.queries("get", url)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+        self.assertEqual(self.queries("get", f"/api/bills/{Bill.objects.get().pk}/invoice/")[1], 0)
+
+    def test_bill_list_reads_primary(self):
+        self.client.post("/api/bills/", bill_payload("B-1", self.products), format="json")
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            res = self.client.get("/api/bills/")
+        self.assertEqual([row["bill_no"] for row in res.data["results"]], ["B-1"])
+        self.assertEqual(len(replica), 0)
+
+    @override_settings(BILLING_REPLICA_MAX_LAG=5)
+    def test_lagging_replica_falls_back_to_primary(self):
+        _lag_readings["replica"] = (time.monotonic(), 60.0)
+        primary, replica = self.queries("get", "/api/reports/monthly/")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentCheckoutTests(TransactionTestCase):
+    THREADS = 8
+    ATTEMPTS_PER_THREAD = 5
+    STOCK = 20
+
+    def test_concurrent_checkouts_never_oversell(self):
+        products = make_products(3, stock=self.STOCK)
+        results = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(n):
+            client = APIClient()
+            barrier.wait()
+            try:
+                for attempt in range(self.ATTEMPTS_PER_THREAD):
+                    # Reverse the line order on odd threads to provoke lock-order deadlocks.
+                    lines = products if n % 2 else list(reversed(products))
+                    res = client.post("/api/bills/", bill_payload(f"T{n}-{attempt}", lines), format="json")
+                    results.append(res.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(self.THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        sold = results.count(201)
+        self.assertEqual(sold, self.STOCK)
+        self.assertEqual(results.count(400), self.THREADS * self.ATTEMPTS_PER_THREAD - self.STOCK)
+        for p in Product.objects.all():
+            self.assertEqual(p.stock_qty, 0)
+            self.assertEqual(BillItem.objects.filter(product=p).count(), sold)
+
+    def test_concurrent_bill_numbers_are_unique(self):
+        for mode in ("gapless", "block"):
+            with self.subTest(mode=mode), self.settings(BILLING_BILL_NUMBER_MODE=mode, BILLING_BILL_NUMBER_BLOCK_SIZE=7):
+                _blocks.clear()
+                Bill.objects.all().delete()
+                BillSeries.objects.all().delete()
+                products = make_products(1, stock=1000, prefix=mode)
+                numbers = []
+
+                def worker():
+                    client = APIClient()
+                    try:
+                        for _ in range(10):
+                            payload = bill_payload("", products)
+                            del payload["bill_no"]
+                            numbers.append(client.post("/api/bills/", payload, format="json").data["bill_no"])
+                    finally:
+                        connection.close()
+
+                threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+                self.assertEqual(len(set(numbers)), self.THREADS * 10)
+                if mode == "gapless":
+                    sequence = sorted(int(n.rsplit("/", 1)[1]) for n in numbers)
+                    self.assertEqual(sequence, list(range(1, self.THREADS * 10 + 1)))
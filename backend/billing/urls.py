@@ -1,6 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, CustomerViewSet, BillViewSet, QuotationViewSet, ServiceEntryViewSet
+from .async_views import bill_detail, customer_lookup, product_search
+from .metrics import metrics_view
+from .views import (
+    ProductViewSet, CustomerViewSet, BillViewSet, QuotationViewSet, ServiceEntryViewSet, SalesReportViewSet,
+    ExportViewSet, SyncViewSet, StockAlertViewSet, InvoiceJobViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
@@ -8,7 +13,17 @@ router.register(r'customers', CustomerViewSet)
 router.register(r'bills', BillViewSet)
 router.register(r'quotations', QuotationViewSet) 
 router.register(r'services', ServiceEntryViewSet)
+router.register(r'reports', SalesReportViewSet, basename='reports')
+router.register(r'exports', ExportViewSet, basename='exports')
+router.register(r'sync', SyncViewSet, basename='sync')
+router.register(r'alerts', StockAlertViewSet)
+router.register(r'invoices', InvoiceJobViewSet)
 
 urlpatterns = [
+    path('_metrics', metrics_view, name='metrics'),
+    # Async reads, ahead of the router routes they take over.
+    path('products/search/', product_search, name='product-search'),
+    path('customers/lookup/', customer_lookup, name='customer-lookup'),
+    path('bills/<int:pk>/', bill_detail, name='bill-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,122 +1,254 @@
+import io
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
 from django.db import transaction
+from django.db.models import Prefetch, Sum
+from django.db.models.functions import TruncMonth
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
-from .models import Product, Customer, Bill, BillItem, Quotation, QuotationItem, ServiceEntry
+from .alerts import update_alerts
+from .archive import find_archived_bill
+from .cache import cached_response, invalidate_products, product_detail_key, product_list_key
+from .checkout import convert_quotation, create_bill
+from .exports import csv_response, export_rows, select_columns, xlsx_response
+from .filters import day_start, next_day_start
+from .idempotency import idempotent
+from .importers import import_products, import_services, read_rows
+from .invoices import invoice_filename, render_pdf
+from .models import (
+    ArchivedBill, Product, Customer, Bill, BillItem, Quotation, QuotationItem, ServiceEntry,
+    DailySales, DailyProductSales, InvoiceJob, StockAlert, StockMovement,
+)
+from .rollup import CENT, record_bill
+from .routers import LagTolerantMixin, replica_alias
 from .serializers import (
     ProductSerializer, CustomerSerializer, 
-    BillSerializer, QuotationSerializer, ServiceEntrySerializer
+    BillSerializer, QuotationSerializer, ServiceEntrySerializer, StockAlertSerializer,
+    InvoiceJobSerializer,
 )
+from .sparse import SparseFieldsMixin
+from .stock import adjust_stock, record_movements, stock_as_of
+from .sync import SYNC_DEFAULT_LIMIT, SYNC_MAX_LIMIT, changes_since, parse_cursor
 
-class ProductViewSet(viewsets.ModelViewSet):
+class BillArchived(APIException):
+    status_code = status.HTTP_410_GONE
+    default_code = 'archived'
+
+class ProductViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    ordering = '-id'
+    ordering_fields = ['id']
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, product_list_key(request), lambda: super(ProductViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, product_detail_key(kwargs['pk']), lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs))
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            product = serializer.instance
+            record_movements({product.pk: product.stock_qty}, StockMovement.OPENING, 'api')
+            update_alerts([product])
+        invalidate_products([product.pk])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            before = Product.objects.select_for_update().values_list('stock_qty', flat=True).get(pk=serializer.instance.pk)
+            super().perform_update(serializer)
+            product = serializer.instance
+            record_movements({product.pk: product.stock_qty - before}, StockMovement.ADJUSTMENT, 'api')
+            update_alerts([product])
+        invalidate_products([product.pk])
+
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        super().perform_destroy(instance)
+        invalidate_products([pk])
+
+    @action(detail=True, methods=['post'])
+    def adjust_stock(self, request, pk=None):
+        """Body: {"qty": signed quantity, "kind": "adjustment" | "return", "reference": ""}"""
+        kind = request.data.get('kind', StockMovement.ADJUSTMENT)
+        if kind not in (StockMovement.ADJUSTMENT, StockMovement.RETURN):
+            return Response({"error": "kind must be 'adjustment' or 'return'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            qty = Decimal(str(request.data.get('qty')))
+            product = adjust_stock(self.get_object().pk, qty, kind, str(request.data.get('reference', ''))[:100])
+        except (InvalidOperation, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(product).data)
+
+    @action(detail=False, methods=['get'])
+    def stock(self, request):
+        """Closing stock from the ledger: ?date=YYYY-MM-DD&ids=1,2,3"""
+        try:
+            day = date.fromisoformat(request.query_params['date']) if request.query_params.get('date') else timezone.localdate()
+            ids = request.query_params.get('ids')
+            ids = [int(i) for i in ids.split(',') if i.strip()] if ids else None
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        stock = stock_as_of(day, ids)
+        return Response({"date": day, "stock": {pk: qty.quantize(CENT) for pk, qty in stock.items()}})
 
     @action(detail=False, methods=['post'])
     def bulk_import(self, request):
-        data = request.data
-        if not isinstance(data, list):
-            return Response({"error": "Expected a list of products"}, status=status.HTTP_400_BAD_REQUEST)
+        upload = request.FILES.get('file')
         try:
-            for item in data:
-                mapped = {
-                    "product_id": item.get("Product ID") or item.get("product_id"),
-                    "product_name": item.get("Product Name") or item.get("product_name"),
-                    "product_note": item.get("Product Note"),
-                    "selling_price": item.get("Sell Price") or item.get("Selling Price"),
-                    "gst_percent": item.get("Tax %") or item.get("GST%"),
-                    "stock_qty": item.get("Stock Qty") or 0,
-                    "purchase_price_include_tax": item.get("Purchase Price (Incl. Tax)") or item.get("Purchase Price (Include Tax)"),
-                    "hsn_sac_code": item.get("HSN/SAC Code") or item.get("hsn_sac_code"),
-                    "unit_of_measurement": item.get("Unit of Measurement"),
-                    "product_type": item.get("Product Type"),
-                    "no_itc": bool(item.get("No-ITC")),
-                    "active_product": bool(item.get("Active Product")),
-                    "is_service_product": bool(item.get("Is Service Product ?")),
-                    "non_salable_product": bool(item.get("Non-Salable Product?")),
-                    "product_group": item.get("Product Group"),
-                    "stock_type": item.get("Stock Type"),
-                    "stock_id": item.get("Stock ID"),
-                    "batch_no": item.get("Batch No"),
-                    "model_no": item.get("Model No"),
-                    "size": item.get("Size"),
-                    "mfg_date": item.get("Mfg. Date"),
-                    "expire_date": item.get("Expiry Date") or item.get("Expire Date"),
-                    "mrp": item.get("MRP"),
-                    "low_stock_alert": item.get("Low Stock Alert"),
-                    "discount": item.get("Discount"),
-                    "discount_in": item.get("Discount In"),
-                   
-                }
-                Product.objects.update_or_create(
-                    product_id=mapped["product_id"],
-                    defaults=mapped
-                )
-            return Response({"message": "✅ Products imported successfully!"}, status=status.HTTP_201_CREATED)
+            if upload is not None:
+                rows = read_rows(upload)
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                return Response({"error": "Expected a list of products or a CSV/XLSX file"}, status=status.HTTP_400_BAD_REQUEST)
+            report = import_products(rows)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if report["imported"]:
+            invalidate_products()
+        if report["imported"] == 0 and report["failed"]:
+            return Response({"error": "No valid products to import", **report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "✅ Products imported successfully!", **report}, status=status.HTTP_201_CREATED)
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    ordering = '-id'
+    ordering_fields = ['id', 'name']
+    filter_fields = {
+        'phone': 'phone',
+    }
 
 class BillViewSet(viewsets.ModelViewSet):
-    queryset = Bill.objects.all().order_by('-id')
+    queryset = Bill.objects.select_related('customer').prefetch_related(
+        Prefetch('items', queryset=BillItem.objects.select_related('product'))
+    ).order_by('-id')
     serializer_class = BillSerializer
+    # The bill list stays on the primary: the POS reads it straight after
+    # saving a bill, before a replica may have caught up.
+    ordering = '-id'
+    ordering_fields = ['id', 'created_at']
+    filter_fields = {
+        'created_from': ('created_at__gte', day_start),
+        'created_to': ('created_at__lt', next_day_start),
+        'payment_mode': 'payment_mode',
+        'customer': 'customer_id',
+        'bill_no': 'bill_no',
+    }
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # A bill_no lookup also finds bills archived from closed years.
+        bill_no = request.query_params.get('bill_no')
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        if bill_no and not rows:
+            archived = find_archived_bill(bill_no=bill_no)
+            if archived is not None:
+                rows.append(archived)
+        return response
+
+    @idempotent('bills.create')
     def create(self, request, *args, **kwargs):
         data = request.data
-        items_data = data.get('items', [])
         try:
-            with transaction.atomic():
-                bill = Bill.objects.create(
-                    bill_no=data.get('bill_no'),
-                    customer_id=data.get('customer'),
-                    total_amount=data.get('total_amount'),
-                    payment_mode=data.get('payment_mode')
-                )
-                for item in items_data:
-                    p = Product.objects.get(id=item['product_id'])
-                    qty_to_reduce = float(item['qty'])
-                    
-                    if float(p.stock_qty or 0) < qty_to_reduce:
-                        raise Exception(f"Insufficient stock for {p.product_name}")
-
-                    BillItem.objects.create(
-                        bill=bill, product=p, qty=qty_to_reduce,
-                        price=float(item['price']),
-                        gst_percent=float(item['gst_percent'] or 0)
-                    )
-                    p.stock_qty = float(p.stock_qty or 0) - qty_to_reduce
-                    p.save()
-                return Response({"message": "Bill Saved!", "id": bill.id}, status=status.HTTP_201_CREATED)
+            bill = create_bill(
+                {
+                    'bill_no': data.get('bill_no'),
+                    'customer_id': data.get('customer'),
+                    'total_amount': data.get('total_amount'),
+                    'payment_mode': data.get('payment_mode'),
+                },
+                data.get('items', []),
+            )
+            return Response({"message": "Bill Saved!", "id": bill.id, "bill_no": bill.bill_no}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            pk = self.kwargs['pk']
+            year = ArchivedBill.objects.filter(pk=pk).values_list('financial_year', flat=True).first() if str(pk).isdigit() else None
+            if year is None:
+                raise
+            raise BillArchived({"error": f"Bill {pk} is archived with financial year {year} and can no longer be changed"})
+
+    def perform_update(self, serializer):
+        # total_amount, payment_mode and created_at all feed the rollups: take
+        # the bill out as it was and add it back as saved.
+        with transaction.atomic():
+            serializer.instance = Bill.objects.select_for_update().get(pk=serializer.instance.pk)
+            lines = [(i.product_id, i.qty, i.price, i.gst_percent) for i in serializer.instance.items.all()]
+            record_bill(serializer.instance, lines, sign=-1)
+            bill = serializer.save()
+            record_bill(bill, lines)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            lines = [(i.product_id, i.qty, i.price, i.gst_percent) for i in instance.items.all()]
+            record_bill(instance, lines, sign=-1)
+            instance.delete()
+
+    @action(detail=True, methods=['get'])
+    def invoice(self, request, pk=None):
+        """The bill's tax invoice as a PDF, rendered server-side."""
+        try:
+            bill = self.get_serializer(self.get_object()).data
+        except BillArchived:
+            bill = find_archived_bill(pk=pk)
+        buffer = io.BytesIO()
+        render_pdf([bill], buffer)
+        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="{invoice_filename(bill)}"'
+        return response
+
 class QuotationViewSet(viewsets.ModelViewSet):
-    queryset = Quotation.objects.all().order_by('-id')
+    queryset = Quotation.objects.select_related('customer', 'bill').prefetch_related('items').order_by('-id')
     serializer_class = QuotationSerializer
+    ordering = '-id'
+    ordering_fields = ['id', 'date']
+    filter_fields = {
+        'date_from': 'date__gte',
+        'date_to': 'date__lte',
+        'customer': 'customer_id',
+    }
 
+    @idempotent('quotations.create')
     def create(self, request, *args, **kwargs):
         data = request.data
         items_data = data.get('items', []) 
         try:
+            # One query for every line's product, so a quotation costs the
+            # same number of queries however many lines it has.
+            product_ids = [int(item['product']) for item in items_data]
+            products = Product.objects.in_bulk(product_ids)
+            missing = sorted(set(product_ids) - set(products))
+            if missing:
+                return Response({"error": f"Product {missing[0]} not found"}, status=status.HTTP_400_BAD_REQUEST)
             with transaction.atomic():
                 quotation = Quotation.objects.create(
                     customer_id=data.get('customer'),
                     total_amount=data.get('total_amount'),
                 )
-                
-                for item in items_data:
-                    p = Product.objects.get(id=item['product'])
-                    
-                    QuotationItem.objects.create(
+
+                QuotationItem.objects.bulk_create([
+                    QuotationItem(
                         quotation=quotation,
                         product=p,
                         quantity=item['quantity'],
                         price=p.selling_price_include_tax or p.selling_price or 0
                     )
-                
+                    for item, p in zip(items_data, map(products.get, product_ids))
+                ])
+
                 return Response({
                     "message": "✅ Quotation Saved with Items!", 
                     "id": quotation.id
@@ -124,14 +256,196 @@ class QuotationViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=['post'])
+    @idempotent('quotations.convert:{pk}')
+    def convert(self, request, pk=None):
+        """Turn the quotation into a bill: {"payment_mode": "CASH", "bill_no": optional}"""
+        data = request.data
+        bill_fields = {'payment_mode': data.get('payment_mode') or 'CASH'}
+        if data.get('bill_no'):
+            bill_fields['bill_no'] = data['bill_no']
+        try:
+            bill = convert_quotation(pk, bill_fields)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "Bill Saved!", "id": bill.id, "bill_no": bill.bill_no, "quotation": bill.quotation_id}, status=status.HTTP_201_CREATED)
+
 class ServiceEntryViewSet(viewsets.ModelViewSet):
-    queryset = ServiceEntry.objects.all().order_by('-created_on')
+    queryset = ServiceEntry.objects.select_related('customer').order_by('-created_on')
     serializer_class = ServiceEntrySerializer
+    ordering = '-created_on'
+    ordering_fields = ['created_on', 'call_for']
+    filter_fields = {
+        'status': 'status',
+        'call_for_from': 'call_for__gte',
+        'call_for_to': 'call_for__lte',
+        'customer': 'customer_id',
+    }
 
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        data = request.data
-        serializer = self.get_serializer(data=data, many=True)
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                rows = read_rows(upload)
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                return Response({"error": "Expected a list of services or a CSV/XLSX file"}, status=status.HTTP_400_BAD_REQUEST)
+            report = import_services(rows)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if report["imported"] == 0 and report["failed"]:
+            return Response({"error": "No valid services to import", **report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": "✅ Services created successfully!", **report}, status=status.HTTP_201_CREATED)
+
+class SalesReportViewSet(LagTolerantMixin, viewsets.ViewSet):
+    """Month and year sales summaries, read from the daily rollup tables."""
+    lag_tolerant_actions = ('monthly', 'yearly')
+    TOTALS = {
+        'bill_count': Sum('bill_count'),
+        'total_amount': Sum('total_amount'),
+        'qty': Sum('qty'),
+        'taxable_value': Sum('taxable_value'),
+        'gst_amount': Sum('gst_amount'),
+    }
+    PRODUCT_TOTALS = {
+        'qty': Sum('qty'),
+        'taxable_value': Sum('taxable_value'),
+        'gst_amount': Sum('gst_amount'),
+    }
+
+    @staticmethod
+    def _clean(rows):
+        return [
+            {k: str(v.quantize(CENT)) if isinstance(v, Decimal) else v for k, v in row.items()}
+            for row in rows
+        ]
+
+    def _summary(self, days, products, period):
+        totals = days.aggregate(**self.TOTALS)
+        return {
+            "totals": self._clean([{k: v or 0 for k, v in totals.items()}])[0],
+            f"by_{period}": self._clean(
+                days.values(period).annotate(**self.TOTALS).order_by(period)
+            ),
+            "by_payment_mode": self._clean(
+                days.values('payment_mode').annotate(**self.TOTALS).order_by('payment_mode')
+            ),
+            "top_products": self._clean(
+                products.values('product_id', 'product__product_name')
+                .annotate(**self.PRODUCT_TOTALS).order_by('-taxable_value')[:20]
+            ),
+        }
+
+    @staticmethod
+    def _int_param(request, name, default=None):
+        value = request.query_params.get(name, default)
+        if value is None:
+            raise ValueError(f"{name} is required")
+        return int(value)
+
+    @action(detail=False, methods=['get'])
+    def monthly(self, request):
+        today = timezone.localdate()
+        try:
+            year = self._int_param(request, 'year', today.year)
+            month = self._int_param(request, 'month', today.month)
+            if not 1 <= month <= 12:
+                raise ValueError("month must be between 1 and 12")
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        days = DailySales.objects.filter(day__year=year, day__month=month)
+        products = DailyProductSales.objects.filter(day__year=year, day__month=month)
+        return Response({"year": year, "month": month, **self._summary(days, products, 'day')})
+
+    @action(detail=False, methods=['get'])
+    def yearly(self, request):
+        try:
+            year = self._int_param(request, 'year', timezone.localdate().year)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        days = DailySales.objects.filter(day__year=year).annotate(month=TruncMonth('day'))
+        products = DailyProductSales.objects.filter(day__year=year)
+        return Response({"year": year, **self._summary(days, products, 'month')})
+
+class ExportViewSet(viewsets.ViewSet):
+    """Streaming CSV/XLSX exports: ?from=&to= (dates) &columns=a,b &file_type=csv|xlsx"""
+
+    def _export(self, request, name):
+        params = request.query_params
+        try:
+            columns = select_columns(name, params.get('columns'))
+            since = day_start(params['from']) if params.get('from') else None
+            until = next_day_start(params['to']) if params.get('to') else None
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        file_type = params.get('file_type', 'csv').lower()
+        if file_type not in ('csv', 'xlsx'):
+            return Response({"error": "file_type must be csv or xlsx"}, status=status.HTTP_400_BAD_REQUEST)
+        # CSV streams after the view returns, so pick the alias up front.
+        rows = export_rows(name, columns, since, until, using=replica_alias())
+        if file_type == 'xlsx':
+            return xlsx_response(name, columns, rows)
+        return csv_response(name, columns, rows)
+
+    @action(detail=False, methods=['get'])
+    def bills(self, request):
+        return self._export(request, 'bills')
+
+    @action(detail=False, methods=['get'])
+    def bill_items(self, request):
+        return self._export(request, 'bill_items')
+
+    @action(detail=False, methods=['get'])
+    def products(self, request):
+        return self._export(request, 'products')
+
+class SyncViewSet(viewsets.ViewSet):
+    """Delta sync for offline POS clients: ?since=<cursor>&limit=
+
+    Returns products, customers and services changed after the cursor plus
+    ids deleted since then, and the cursor to send next time.
+    """
+
+    def list(self, request):
+        try:
+            cursor = parse_cursor(request.query_params.get('since'))
+            limit = min(int(request.query_params.get('limit', SYNC_DEFAULT_LIMIT)), SYNC_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "Invalid sync cursor or limit"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes_since(cursor, max(limit, 1)))
+
+class StockAlertViewSet(LagTolerantMixin, viewsets.ReadOnlyModelViewSet):
+    """Low-stock and near-expiry alerts, kept current by checkout and the
+    daily refresh_stock_alerts job."""
+    queryset = StockAlert.objects.select_related('product')
+    serializer_class = StockAlertSerializer
+    lag_tolerant_actions = ('list',)
+    ordering = '-id'
+    ordering_fields = ['id', 'stock_qty', 'expire_date']
+    filter_fields = {
+        'kind': 'kind',
+        'expires_before': ('expire_date__lte', date.fromisoformat),
+    }
+
+class InvoiceJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Batch reprints: POST {"day"|"customer"|"bill_ids", "output_format": "pdf"|"zip"}
+    queues a job for the process_invoice_jobs workers; poll it, then download."""
+    queryset = InvoiceJob.objects.all()
+    serializer_class = InvoiceJobSerializer
+    ordering = '-id'
+    ordering_fields = ['id']
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response({"message": "✅ Services created successfully!"}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != InvoiceJob.DONE:
+            return Response({"error": f"Invoice job is {job.status}"}, status=status.HTTP_409_CONFLICT)
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=f'invoices-{job.pk}.{job.output_format}')
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.queue import BATCH_SIZE, drain_order_queue
+
+
+class Command(BaseCommand):
+    help = "Drain queued online orders into Order/OrderItem rows in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help="Drain what is queued now, then exit.")
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            handled = drain_order_queue(options['batch_size'])
+            total += handled
+            if handled:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} queued orders."))
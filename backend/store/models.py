@@ -8,6 +8,41 @@ class Order(models.Model):
     items_json = models.TextField() 
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, default='Pending')
+    reference = models.CharField(max_length=36, unique=True, null=True, blank=True)
 
     def __str__(self):
-        return f"Order {self.id} - {self.customer_name}"
\ No newline at end of file
+        return f"Order {self.id} - {self.customer_name}"
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
+    product = models.ForeignKey('billing.Product', related_name='order_items', null=True, blank=True, on_delete=models.SET_NULL)
+    product_name = models.CharField(max_length=255, blank=True, default='')
+    qty = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.product_name} * {self.qty}"
+
+
+class OrderIntake(models.Model):
+    """Raw online orders waiting for the queue worker to turn them into Orders."""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    reference = models.CharField(max_length=36, unique=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='order_intake_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Intake {self.reference} ({self.status})"
@@ -0,0 +1,133 @@
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from billing.models import Product
+
+from .models import Order, OrderIntake, OrderItem
+
+REQUIRED_FIELDS = ['customer_name', 'customer_phone', 'address', 'total_amount', 'items']
+BATCH_SIZE = 500
+
+
+def enqueue_order(data):
+    """Accept an online order into the intake queue with a single INSERT."""
+    missing = [f for f in REQUIRED_FIELDS if data.get(f) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    if not isinstance(data['items'], list):
+        raise ValueError("items must be a list")
+    return OrderIntake.objects.create(reference=str(uuid.uuid4()), payload=dict(data))
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value if value not in (None, '') else 0))
+    except InvalidOperation:
+        raise ValidationError(f"'{value}' is not a number")
+
+
+def _build(intake):
+    """Turn a queued payload into an unsaved, validated Order and its lines."""
+    data = intake.payload
+    order = Order(
+        reference=intake.reference,
+        customer_name=data.get('customer_name'),
+        customer_phone=data.get('customer_phone'),
+        address=data.get('address'),
+        total_amount=_decimal(data.get('total_amount')),
+        items_json=json.dumps(data.get('items')),
+    )
+    order.clean_fields(exclude=['reference'])
+    items = []
+    for n, item in enumerate(data.get('items') or [], 1):
+        if not isinstance(item, dict):
+            raise ValidationError("each item must be an object")
+        product_id = str(item.get('product_id') or item.get('id') or '')
+        line = OrderItem(
+            product_id=int(product_id) if product_id.isdigit() else None,
+            product_name=str(item.get('product_name') or item.get('name') or '')[:255],
+            qty=_decimal(item.get('qty') or item.get('quantity') or 1),
+            price=_decimal(item.get('price') or item.get('selling_price_include_tax')),
+        )
+        # Unknown products are dropped in drain_order_queue, not rejected.
+        try:
+            line.clean_fields(exclude=['order', 'product'])
+        except ValidationError as e:
+            raise ValidationError(f"item {n}: {'; '.join(e.messages)}")
+        items.append(line)
+    return order, items
+
+
+def _insert(built):
+    orders = Order.objects.bulk_create([order for _, order, _ in built])
+    for order, (_, _, items) in zip(orders, built):
+        for item in items:
+            item.order = order
+    OrderItem.objects.bulk_create([item for _, _, items in built for item in items])
+
+
+def drain_order_queue(batch_size=BATCH_SIZE):
+    """Move up to ``batch_size`` pending intakes into Order/OrderItem rows.
+
+    A fixed handful of queries per batch: claim the batch (SKIP LOCKED, so
+    several workers can drain in parallel), look up the referenced products,
+    bulk-insert orders and items, and mark the intakes done or failed.
+    If the database still rejects the bulk insert, each order is retried on
+    its own so only the bad ones fail. Returns the number of intakes handled.
+    """
+    with transaction.atomic():
+        batch = list(
+            OrderIntake.objects.select_for_update(skip_locked=True)
+            .filter(status=OrderIntake.PENDING).order_by('id')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        built = []
+        failed = []
+        for intake in batch:
+            try:
+                built.append((intake, *_build(intake)))
+            except ValidationError as e:
+                intake.error = '; '.join(e.messages)
+                failed.append(intake)
+
+        product_ids = {item.product_id for _, _, items in built for item in items if item.product_id is not None}
+        known = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        for _, _, items in built:
+            for item in items:
+                if item.product_id not in known:
+                    item.product_id = None
+        try:
+            with transaction.atomic():
+                _insert(built)
+        except DatabaseError:
+            inserted = []
+            for intake, order, items in built:
+                order.pk = None
+                for item in items:
+                    item.pk = None
+                try:
+                    with transaction.atomic():
+                        _insert([(intake, order, items)])
+                except DatabaseError as e:
+                    intake.error = str(e)
+                    failed.append(intake)
+                else:
+                    inserted.append((intake, order, items))
+            built = inserted
+
+        now = timezone.now()
+        OrderIntake.objects.filter(id__in=[intake.id for intake, _, _ in built]).update(
+            status=OrderIntake.DONE, processed_at=now,
+        )
+        for intake in failed:
+            intake.status = OrderIntake.FAILED
+            intake.processed_at = now
+        OrderIntake.objects.bulk_update(failed, ['status', 'error', 'processed_at'])
+    return len(batch)
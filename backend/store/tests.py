@@ -1,3 +1,87 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from billing.models import Product
+
+from .models import Order, OrderIntake, OrderItem
+from .queue import drain_order_queue
+
+
+class OrderQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = Product.objects.create(product_id="P1", product_name="Fan")
+
+    def payload(self, **overrides):
+        payload = {
+            "customer_name": "Anu",
+            "customer_phone": "9000000000",
+            "address": "Main Road",
+            "total_amount": "1200.00",
+            "items": [
+                {"id": self.product.id, "name": "Fan", "qty": 2, "price": "600"},
+                {"id": 999999, "name": "Retired item", "qty": 1, "price": "0"},
+            ],
+        }
+        payload.update(overrides)
+        return payload
+
+    def place(self, **overrides):
+        return self.client.post("/api/place-order/", self.payload(**overrides), format="json")
+
+    def test_place_order_queues_then_worker_normalizes(self):
+        res = self.place()
+        self.assertEqual(res.status_code, 202)
+        self.assertFalse(Order.objects.exists())
+
+        self.assertEqual(drain_order_queue(), 1)
+        order = Order.objects.get(reference=res.data["order_ref"])
+        items = {i.product_name: i for i in order.items.all()}
+        self.assertEqual(items["Fan"].product, self.product)
+        self.assertIsNone(items["Retired item"].product)
+        self.assertEqual(OrderItem.objects.filter(product=self.product).count(), 1)
+
+        status = self.client.get(f"/api/orders/{res.data['order_ref']}/").data
+        self.assertEqual(status, {"order_ref": res.data["order_ref"], "status": "done", "order_id": order.id})
+
+    def test_bad_payloads(self):
+        self.assertEqual(self.place(items=None).status_code, 400)
+        ref = self.place(customer_phone="9" * 40).data["order_ref"]
+        self.place()
+        self.assertEqual(drain_order_queue(), 2)
+        self.assertEqual(OrderIntake.objects.get(reference=ref).status, OrderIntake.FAILED)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_out_of_range_line_fails_only_its_order(self):
+        items = [{"id": self.product.id, "name": "Fan", "qty": "1e9", "price": "600"}]
+        ref = self.place(items=items).data["order_ref"]
+        self.place()
+        self.assertEqual(drain_order_queue(), 2)
+        intake = OrderIntake.objects.get(reference=ref)
+        self.assertEqual(intake.status, OrderIntake.FAILED)
+        self.assertIn("item 1", intake.error)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(drain_order_queue(), 0)
+
+    def test_rejected_insert_falls_back_to_one_order_at_a_time(self):
+        ref = self.place().data["order_ref"]
+        self.place()
+        # Passes validation, but the unique reference is already taken.
+        Order.objects.create(reference=ref, customer_name="Anu", customer_phone="9", address="-", total_amount=0, items_json="[]")
+        self.assertEqual(drain_order_queue(), 2)
+        self.assertEqual(list(OrderIntake.objects.values_list("status", flat=True).order_by("id")), ["failed", "done"])
+        self.assertEqual(Order.objects.exclude(reference=ref).get().items.count(), 2)
+
+    def test_batches_use_constant_queries(self):
+        for _ in range(30):
+            self.place()
+        # savepoint, claim, products, savepoint, orders, items, release, mark done, release
+        with self.assertNumQueries(9):
+            self.assertEqual(drain_order_queue(batch_size=30), 30)
+
+    def test_place_order_replay_with_idempotency_key(self):
+        first = self.client.post("/api/place-order/", self.payload(), format="json", HTTP_IDEMPOTENCY_KEY="order-1")
+        replay = self.client.post("/api/place-order/", self.payload(), format="json", HTTP_IDEMPOTENCY_KEY="order-1")
+        self.assertEqual(replay.status_code, 202)
+        self.assertEqual(replay.data["order_ref"], first.data["order_ref"])
+        self.assertEqual(OrderIntake.objects.count(), 1)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import place_order
+from .views import order_status, place_order
 
 urlpatterns = [
     path('place-order/', place_order),
-]
\ No newline at end of file
+    path('orders/<str:reference>/', order_status),
+]
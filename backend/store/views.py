@@ -1,23 +1,31 @@
+from billing.idempotency import idempotent
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .models import Order
-import json
+from .models import Order, OrderIntake
+from .queue import enqueue_order
 
 @api_view(['POST'])
+@idempotent('store.place_order')
 def place_order(request):
     try:
-        data = request.data
-        new_order = Order.objects.create(
-            customer_name=data['customer_name'],
-            customer_phone=data['customer_phone'],
-            address=data['address'],
-            total_amount=data['total_amount'],
-            items_json=json.dumps(data['items']) 
-        )
+        intake = enqueue_order(request.data)
         return Response({
-            "status": "success",
-            "message": "Order synced with Backend!",
-            "order_id": new_order.id
-        }, status=201)
+            "status": "accepted",
+            "message": "Order received!",
+            "order_ref": intake.reference
+        }, status=202)
     except Exception as e:
-        return Response({"status": "error", "message": str(e)}, status=400)
\ No newline at end of file
+        return Response({"status": "error", "message": str(e)}, status=400)
+
+
+@api_view(['GET'])
+def order_status(request, reference):
+    intake = OrderIntake.objects.filter(reference=reference).first()
+    if intake is None:
+        return Response({"status": "error", "message": "Unknown order reference"}, status=404)
+    data = {"order_ref": reference, "status": intake.status}
+    if intake.status == OrderIntake.DONE:
+        data["order_id"] = Order.objects.filter(reference=reference).values_list('id', flat=True).first()
+    elif intake.status == OrderIntake.FAILED:
+        data["message"] = intake.error
+    return Response(data)
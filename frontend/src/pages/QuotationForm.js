@@ -30,7 +30,7 @@ function QuotationForm() {
 
   const loadProducts = async () => {
     try {
-      const res = await API.get("/products/");
+      const res = await API.get("/products/?paginate=false");
       setProducts(res.data || []);
     } catch (err) {
       console.error("Product Fetch Error:", err);
@@ -39,7 +39,7 @@ function QuotationForm() {
 
   const loadCustomers = async () => {
     try {
-      const res = await API.get("/customers/");
+      const res = await API.get("/customers/?paginate=false");
       setCustomers(res.data || []);
     } catch (err) {
       console.error("Customer Fetch Error:", err);
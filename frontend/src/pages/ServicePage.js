@@ -47,7 +47,7 @@ function ServicePage() {
 
   const fetchServices = async () => {
     try {
-      const res = await API.get("/services/");
+      const res = await API.get("/services/?paginate=false");
       setServices(res.data);
     } catch (err) {
       console.error("Failed to fetch services:", err);
@@ -56,7 +56,7 @@ function ServicePage() {
 
   const fetchCustomers = async () => {
     try {
-      const res = await API.get("/customers/");
+      const res = await API.get("/customers/?paginate=false");
       setCustomers(res.data);
     } catch (err) {
       console.error("Failed to fetch customers:", err);
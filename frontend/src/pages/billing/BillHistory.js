@@ -3,8 +3,11 @@ import API from "../../services/api";
 import "./BillHistory.css";
 import { FaPrint, FaEye, FaSearch, FaCalendarAlt, FaTimes, FaSync } from "react-icons/fa";
 
+const PAGE_SIZE = 100;
+
 function BillHistory() {
   const [bills, setBills] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [filteredBills, setFilteredBills] = useState([]);
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedDate, setSelectedDate] = useState("");
@@ -14,15 +17,22 @@ function BillHistory() {
 
   useEffect(() => {
     fetchBills();
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedDate]);
 
-  const fetchBills = async () => {
+  // Newest first, a page at a time off the cursor. A picked date is filtered
+  // on the server, so an old day needs no paging back to it.
+  const fetchBills = async (next = null) => {
     try {
-      setLoading(true);
-      const res = await API.get("/bills/");
-      const data = Array.isArray(res.data) ? [...res.data].reverse() : [];
-      setBills(data);
-      setFilteredBills(data);
+      if (!next) setLoading(true);
+      const params = { page_size: PAGE_SIZE };
+      if (selectedDate) {
+        params.created_from = selectedDate;
+        params.created_to = selectedDate;
+      }
+      const res = next ? await API.get(next) : await API.get("/bills/", { params });
+      setBills((loaded) => (next ? [...loaded, ...res.data.results] : res.data.results));
+      setNextPage(res.data.next);
     } catch (error) {
       console.error("Error fetching bills:", error);
     } finally {
@@ -39,11 +49,8 @@ function BillHistory() {
           b.customer_name?.toLowerCase().includes(searchTerm.toLowerCase())
       );
     }
-    if (selectedDate) {
-      result = result.filter((b) => b.created_at?.includes(selectedDate));
-    }
     setFilteredBills(result);
-  }, [searchTerm, selectedDate, bills]);
+  }, [searchTerm, bills]);
 
   const handleViewBill = async (billId) => {
     try {
@@ -260,7 +267,7 @@ function BillHistory() {
           <FaCalendarAlt className="icon" />
           <input type="date" onChange={(e) => setSelectedDate(e.target.value)} />
         </div>
-        <button className="refresh-btn" onClick={fetchBills}>
+        <button className="refresh-btn" onClick={() => fetchBills()}>
           <FaSync /> Refresh
         </button>
       </div>
@@ -299,6 +306,9 @@ function BillHistory() {
             )}
           </tbody>
         </table>
+        {nextPage && !loading && (
+          <button className="load-more-btn" onClick={() => fetchBills(nextPage)}>Load older bills</button>
+        )}
       </div>
 
       {showModal && selectedBill && (
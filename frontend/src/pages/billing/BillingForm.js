@@ -42,7 +42,7 @@ function BillingForm() {
 
   const loadData = async () => {
     try {
-      const [p, c] = await Promise.all([API.get("/products/"), API.get("/customers/")]);
+      const [p, c] = await Promise.all([API.get("/products/?paginate=false"), API.get("/customers/?paginate=false")]);
       setProducts(p.data);
       setCustomers(c.data);
     } catch (e) { console.error("Load Error", e); }
@@ -114,7 +114,6 @@ function BillingForm() {
   const handleFinalSave = async () => {
     if (!selectedCustomer) return alert("Select Customer!");
     const billData = {
-      bill_no: `INV-${Date.now()}`,
       customer: selectedCustomer,
       total_amount: totals.grandTotal,
       payment_mode: paymentMode,
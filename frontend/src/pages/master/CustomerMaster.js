@@ -14,7 +14,7 @@ function CustomerPage() {
 
   const fetchCustomers = async () => {
     try {
-      const res = await API.get("/customers/");
+      const res = await API.get("/customers/?paginate=false");
       setCustomers(res.data);
     } catch (err) { console.error("❌ Error fetching customers:", err); }
   };
@@ -2,8 +2,11 @@ import React, { useState, useEffect } from "react";
 import API from "../../services/api"; 
 import "./ProductMaster.css";
 
+const PAGE_SIZE = 100;
+
 function ProductPage() {
   const [products, setProducts] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [showForm, setShowForm] = useState(false);
   const [isEdit, setIsEdit] = useState(false);
   const [editId, setEditId] = useState(null);
@@ -22,14 +25,28 @@ function ProductPage() {
 
   const [formData, setFormData] = useState(emptyForm);
 
-  const fetchProducts = async () => {
+  // The list comes a page at a time off the cursor; a search asks the server
+  // rather than filtering only the pages loaded so far.
+  const fetchProducts = async (next = null) => {
     try {
-      const res = await API.get("/products/");
-      setProducts(res.data);
+      const query = searchText.trim();
+      if (query) {
+        const res = await API.get("/products/search/", { params: { q: query, limit: 50, include_inactive: true } });
+        setProducts(res.data);
+        setNextPage(null);
+        return;
+      }
+      const res = next ? await API.get(next) : await API.get("/products/", { params: { page_size: PAGE_SIZE } });
+      setProducts((loaded) => (next ? [...loaded, ...res.data.results] : res.data.results));
+      setNextPage(res.data.next);
     } catch (error) { alert("Backend Connection Error!"); }
   };
 
-  useEffect(() => { fetchProducts(); }, []);
+  useEffect(() => {
+    const timer = setTimeout(() => fetchProducts(), 300);
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [searchText]);
 
   const calculateTaxable = (total, gst) => {
     const taxable = total / (1 + (gst / 100));
@@ -91,7 +108,7 @@ function ProductPage() {
       <div className="filter-bar">
         <input 
           type="text" 
-          placeholder="🔍 Search by Name or HSN..." 
+          placeholder="🔍 Search by Name, Code or HSN..." 
           className="search-box1" 
           onChange={(e) => setSearchText(e.target.value)} 
         />
@@ -112,10 +129,7 @@ function ProductPage() {
             </tr>
           </thead>
           <tbody>
-            {products.filter(p => 
-              p.product_name.toLowerCase().includes(searchText.toLowerCase()) || 
-              (p.hsn_code && p.hsn_code.includes(searchText))
-            ).map((p, index) => (
+            {products.map((p, index) => (
               <tr key={p.id}>
                 <td>{index + 1}</td>
                 <td>
@@ -135,6 +149,9 @@ function ProductPage() {
             ))}
           </tbody>
         </table>
+        {nextPage && (
+          <button className="load-more-btn" onClick={() => fetchProducts(nextPage)}>Load more</button>
+        )}
       </div>
 
       {showForm && (